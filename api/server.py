@@ -0,0 +1,328 @@
+# HTTP API for CARA-Bot, for calling the analysis engine from other systems:
+#
+#   python main.py serve --port 8080 --workers 4
+#
+#   POST   /jobs?filename=msa.pdf      body = file bytes -> 202 {"job_id", ...}
+#   GET    /jobs/<id>                  status, plus "result" once done
+#   GET    /jobs/<id>/events           progress and result as JSON lines
+#   DELETE /jobs/<id>                  cancel
+#   POST   /analyze?filename=nda.docx  synchronous, for small files
+#   GET    /search?q=risk:JURIS_FOREIGN arbitration&limit=50
+#                                      clauses of all analyzed contracts
+#   GET    /health, GET /metrics       liveness / Prometheus metrics
+#
+# Every instance is stateless apart from its in-memory jobs, so instances can
+# be scaled behind a load balancer with sticky routing on the job ID.
+import os
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from pipeline.analyzer import ContractAnalyzer, SUPPORTED_EXTENSIONS
+from pipeline.result_cache import ResultCache
+from pipeline.jobs import JobRunner, DONE, FAILED, CANCELLED
+from search.clause_index import ClauseIndex
+from resources.model_registry import registry, warm_up_from_env
+from resources.tracing import metrics
+
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+SYNC_MAX_BYTES = 1024 * 1024 # larger files must go through /jobs
+SYNC_TIMEOUT = 120.0
+EVENT_INTERVAL = 0.5 # seconds between progress lines on /jobs/<id>/events
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    # Set by make_server
+    runner: JobRunner = None
+    index: Optional[ClauseIndex] = None
+    max_pending = 32
+    request_slots: threading.BoundedSemaphore = None
+
+    server_version = "CARA-Bot"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, headers: Optional[Dict] = None):
+        self._send_json(status, {"error": message}, headers)
+
+    def _reject_upload(self, status: int, message: str, headers: Optional[Dict] = None):
+        # Read the unread body first (up to MAX_UPLOAD_BYTES), so the client
+        # sees the error instead of a broken pipe while still sending
+        remaining = int(self.headers.get("Content-Length") or 0)
+        if remaining <= MAX_UPLOAD_BYTES:
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, 65536))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+        else:
+            self.close_connection = True
+        self._send_error(status, message, headers)
+
+    def _route(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        return parts, {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+    def _handle(self, method):
+        # Bound the number of requests being served at once; beyond that, shed load
+        if not self.request_slots.acquire(blocking=False):
+            self._reject_upload(503, "Server busy, retry later", {"Retry-After": "1"})
+            return
+        try:
+            method()
+        except BrokenPipeError:
+            pass
+        except Exception as e:
+            self._send_error(500, f"{type(e).__name__}: {e}")
+        finally:
+            self.request_slots.release()
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def do_DELETE(self):
+        self._handle(self._delete)
+
+    # -------------------------------------------------
+    # GET
+    # -------------------------------------------------
+    def _get(self):
+        parts, query = self._route()
+        if parts == ["health"]:
+            self._send_json(200, {
+                "status": "ok",
+                "pending_jobs": self.runner.pending(),
+                "max_pending_jobs": self.max_pending,
+                "models": registry.load_times()
+            })
+        elif parts == ["metrics"]:
+            body = metrics().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif parts == ["search"]:
+            if self.index is None:
+                self._send_error(404, "Search index disabled")
+                return
+            try:
+                limit = int(query.get("limit", "50"))
+            except ValueError:
+                self._send_error(400, "limit must be an integer")
+                return
+            try:
+                hits = self.index.query(query.get("q", ""), limit=min(max(limit, 1), 1000))
+            except ValueError as e:
+                self._send_error(400, str(e))
+                return
+            self._send_json(200, {"results": hits})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self.runner.get(parts[1])
+            if job is None:
+                self._send_error(404, "Unknown job")
+                return
+            self._send_json(200, job_payload(job, compact=query.get("compact") == "1"))
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            self._stream_events(parts[1], compact=query.get("compact") == "1")
+        else:
+            self._send_error(404, "Not found")
+
+    def _stream_events(self, job_id: str, compact: bool):
+        job = self.runner.get(job_id)
+        if job is None:
+            self._send_error(404, "Unknown job")
+            return
+
+        # HTTP/1.0 style: no Content-Length, the stream ends when the connection closes
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        sent_risks = 0
+        while True:
+            status = job.to_dict()
+            new_risks = job.partial_risks[sent_risks:]
+            sent_risks += len(new_risks)
+            if job.done:
+                break
+            self._write_line({"event": "progress", **status, "new_risks": new_risks})
+            time.sleep(EVENT_INTERVAL)
+        self._write_line({"event": job.status, **job_payload(job, compact)})
+
+    def _write_line(self, payload: Dict):
+        self.wfile.write(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    # -------------------------------------------------
+    # POST
+    # -------------------------------------------------
+    def _read_upload(self, limit: int):
+        """Returns (file_name, bytes), or None after sending an error response."""
+        _, query = self._route()
+        file_name = query.get("filename") or self.headers.get("X-Filename", "")
+        if not file_name.lower().endswith(SUPPORTED_EXTENSIONS):
+            self._reject_upload(415, f"filename must end with one of {', '.join(SUPPORTED_EXTENSIONS)}")
+            return None
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self._send_error(411, "Content-Length required")
+            return None
+        if length > limit:
+            self._reject_upload(413, f"Upload larger than {limit} bytes")
+            return None
+        return os.path.basename(file_name), self.rfile.read(length)
+
+    def _check_backpressure(self) -> bool:
+        if self.runner.pending() >= self.max_pending:
+            self._reject_upload(429, "Too many pending jobs", {"Retry-After": "5"})
+            return False
+        return True
+
+    def _post(self):
+        parts, query = self._route()
+        if parts == ["jobs"]:
+            if not self._check_backpressure():
+                return
+            upload = self._read_upload(MAX_UPLOAD_BYTES)
+            if upload is None:
+                return
+            previous = None
+            if query.get("previous_job"):
+                previous_job = self.runner.get(query["previous_job"])
+                if previous_job is None or previous_job.result is None:
+                    self._send_error(404, "previous_job not found or not finished")
+                    return
+                previous = previous_job.result
+            job = self.runner.submit(upload[1], upload[0], previous=previous)
+            self._send_json(202, {**job.to_dict(), "status_url": f"/jobs/{job.job_id}"}, {"Location": f"/jobs/{job.job_id}"})
+
+        elif parts == ["analyze"]:
+            if not self._check_backpressure():
+                return
+            upload = self._read_upload(SYNC_MAX_BYTES)
+            if upload is None:
+                return
+            job = self.runner.submit(upload[1], upload[0])
+            try:
+                job.future.result(timeout=SYNC_TIMEOUT)
+            except Exception:
+                pass
+            if not job.done:
+                self._send_json(202, {**job.to_dict(), "status_url": f"/jobs/{job.job_id}"}, {"Location": f"/jobs/{job.job_id}"})
+                return
+            status = 200 if job.status == DONE else 422
+            self._send_json(status, job_payload(job, compact=query.get("compact") == "1"))
+        else:
+            self._reject_upload(404, "Not found")
+
+    # -------------------------------------------------
+    # DELETE
+    # -------------------------------------------------
+    def _delete(self):
+        parts, _ = self._route()
+        if len(parts) != 2 or parts[0] != "jobs":
+            self._send_error(404, "Not found")
+            return
+        job = self.runner.get(parts[1])
+        if job is None:
+            self._send_error(404, "Unknown job")
+            return
+        job.cancel()
+        self._send_json(202, job.to_dict())
+
+
+def job_payload(job, compact: bool = False) -> Dict:
+    """Job status, with the analysis (and revision delta) once finished."""
+    payload = job.to_dict()
+    if job.status == DONE:
+        payload["result"] = job.result.to_dict(compact=compact)
+        if job.delta is not None:
+            payload["delta"] = job.delta
+    elif job.status in (FAILED, CANCELLED):
+        payload["result"] = None
+    return payload
+
+
+def make_server(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    workers: int = 4,
+    max_pending: int = 32,
+    max_requests: int = 64,
+    use_cache: bool = True,
+    use_index: bool = True
+) -> ThreadingHTTPServer:
+    """
+    Creates (but doesn't start) the API server; use port=0 for a free port.
+    `workers` analyses run at once, at most `max_pending` jobs are queued or
+    running (further uploads get 429) and at most `max_requests` requests
+    are served concurrently (further requests get 503). With `use_index`,
+    analyzed contracts are added to the clause search index (GET /search).
+    """
+    index = ClauseIndex() if use_index else None
+    analyzer = ContractAnalyzer(cache=ResultCache() if use_cache else None, index=index)
+    handler = type("ConfiguredApiHandler", (ApiHandler,), {
+        "runner": JobRunner(analyzer, max_workers=workers),
+        "index": index,
+        "max_pending": max_pending,
+        "request_slots": threading.BoundedSemaphore(max_requests)
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CARA-Bot HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="Analyses running at once")
+    parser.add_argument("--max-pending", type=int, default=32, help="Queued + running jobs before uploads are refused")
+    parser.add_argument("--max-requests", type=int, default=64, help="Requests served concurrently")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the analysis result cache")
+    parser.add_argument("--no-index", action="store_true", help="Don't add analyzed contracts to the clause search index")
+    args = parser.parse_args()
+    serve(args)
+
+
+def serve(args):
+    # Keep models warm: load what CARA_WARMUP lists before accepting requests
+    warm_up_from_env()
+    server = make_server(
+        args.host, args.port, args.workers, args.max_pending, args.max_requests,
+        not args.no_cache, not args.no_index
+    )
+    print(f"CARA-Bot API on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.RequestHandlerClass.runner.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from typing import Callable, Dict, List, Optional, Sequence
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.synthetic import FORMATS, NUMBERING_STYLES, generate_corpus
+from pipeline.analyzer import PIPELINE_VERSION, DEFAULT_RULES_PATH, ContractAnalyzer, read_contract
+from preprocessing.text_cleaner import clean_text
+from clause_extraction.extract_clauses import extract_clauses_from_text
+from contract_classifier.classify_contract_type import classify_contract_type
+from clause_classifier.rule_based import classify_clause_rule_based
+from intent_detection.intent_rules import detect_clause_intent
+from risk_engine.risk_evaluator import evaluate_risk
+from risk_engine.rule_set import load_rule_set
+from export.pdf_report import generate_pdf_report
+
+# A stage regresses when its p50 latency grows by more than this fraction
+DEFAULT_TOLERANCE = 0.2
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def measure(fn: Callable, inputs: List, size: Callable = len, repeat: int = 3) -> Dict:
+    """
+    Times fn over every input `repeat` times, then runs it once more under
+    tracemalloc for the peak memory. `size` gives the characters handled
+    per input for the throughput.
+    """
+    latencies = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    for item in inputs:
+        fn(item)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    chars = sum(size(item) for item in inputs) * repeat
+    return {
+        "calls": len(latencies),
+        "total_s": total,
+        "calls_per_s": len(latencies) / total if total else 0.0,
+        "chars_per_s": chars / total if total else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "peak_mb": peak / (1024 * 1024)
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(corpus: List[Dict], repeat: int = 3, rules_path: str = DEFAULT_RULES_PATH) -> Dict:
+    """
+    Times every pipeline stage over the corpus (see synthetic.generate_corpus).
+    Per-clause stages are measured per clause; the others per document.
+    """
+    stages = {}
+    for fmt in FORMATS:
+        paths = [item["path"] for item in corpus if item["format"] == fmt]
+        if paths:
+            stages[f"ingestion_{fmt}"] = measure(read_contract, paths, size=os.path.getsize, repeat=repeat)
+
+    raw_texts = [read_contract(item["path"]) for item in corpus if item["format"] == "txt"]
+    clean_texts = [clean_text(text) for text in raw_texts]
+    clauses = [clause["text"] for text in clean_texts for clause in extract_clauses_from_text(text)]
+    rule_set = load_rule_set(rules_path)
+    labeled = []
+    for clause_text in clauses:
+        scores = classify_clause_rule_based(clause_text)
+        labeled.append((clause_text, max(scores, key=scores.get) if scores else "General"))
+
+    stages["clean_text"] = measure(clean_text, raw_texts, repeat=repeat)
+    stages["extract_clauses"] = measure(extract_clauses_from_text, clean_texts, repeat=repeat)
+    stages["classify_contract_type"] = measure(classify_contract_type, clean_texts, repeat=repeat)
+    stages["classify_clause"] = measure(classify_clause_rule_based, clauses, repeat=repeat)
+    stages["detect_intent"] = measure(detect_clause_intent, clauses, repeat=repeat)
+    stages["evaluate_risk"] = measure(
+        lambda item: evaluate_risk(item[0], item[1], rule_set), labeled,
+        size=lambda item: len(item[0]), repeat=repeat
+    )
+
+    analyzer = ContractAnalyzer(rules_path)
+    stages["analyze_text"] = measure(analyzer.analyze_text, raw_texts, repeat=repeat)
+
+    analyses = [analyzer.analyze_text(text) for text in raw_texts]
+    reports = [
+        {
+            "contract_type": analysis.contract_type["contract_type"],
+            "confidence": analysis.contract_type["confidence"],
+            "risks": analysis.risk_dicts()
+        }
+        for analysis in analyses
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        report_path = os.path.join(temp_dir, "report.pdf")
+        stages["pdf_report"] = measure(
+            lambda data: generate_pdf_report(data, report_path), reports,
+            size=lambda data: sum(len(risk["clause_text"]) for risk in data["risks"]), repeat=repeat
+        )
+
+    return {
+        "meta": {
+            "pipeline_version": PIPELINE_VERSION,
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "documents": len(corpus),
+            "clauses": len(clauses),
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "stages": stages
+    }
+
+
+def run_embedding_benchmarks(
+    clauses: List[str],
+    backends: List[str],
+    threads: int = 0,
+    repeat: int = 3,
+    chunk: int = 256
+) -> Dict:
+    """
+    Times clause embedding with each backend (see EMBEDDING_BACKENDS) in
+    chunks of `chunk` clauses, and checks each backend's embeddings against
+    the float32 PyTorch reference (see check_parity).
+    """
+    from clause_classifier.embedding_based import check_parity, encode_texts, load_embedding_model
+
+    chunks = [clauses[i:i + chunk] for i in range(0, len(clauses), chunk)]
+    stages, parity = {}, {}
+    for backend in backends:
+        embedder = load_embedding_model(backend, threads)
+        stages[f"embed_{backend}"] = measure(
+            lambda texts: encode_texts(texts, embedder=embedder), chunks,
+            size=lambda texts: sum(len(text) for text in texts), repeat=repeat
+        )
+        if backend != "torch":
+            parity[backend] = check_parity(clauses[:chunk], backend, threads)
+    return {"stages": stages, "parity": parity}
+
+
+def compare_results(current: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Lists the stages whose p50 latency regressed by more than `tolerance` against the baseline."""
+    regressions = []
+    for name, stats in current["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before or not before["p50_ms"]:
+            continue
+        change = stats["p50_ms"] / before["p50_ms"] - 1
+        if change > tolerance:
+            regressions.append(f"{name}: p50 {before['p50_ms']:.3f} ms -> {stats['p50_ms']:.3f} ms (+{change:.0%})")
+    return regressions
+
+
+def print_table(results: Dict):
+    print(f"{'stage':<24}{'calls':>8}{'calls/s':>12}{'MB/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'peak MB':>10}")
+    for name, stats in results["stages"].items():
+        print(
+            f"{name:<24}{stats['calls']:>8}{stats['calls_per_s']:>12.1f}{stats['chars_per_s'] / 1e6:>10.2f}"
+            f"{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['peak_mb']:>10.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CARA-Bot pipeline on synthetic contracts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="Number of clauses per contract")
+    parser.add_argument("--styles", nargs="+", default=list(NUMBERING_STYLES), choices=NUMBERING_STYLES)
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the corpus per stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed p50 slowdown (0.2 = 20%%)")
+    parser.add_argument(
+        "--embedding-backends", nargs="+", default=[],
+        help="Also time clause embedding with these backends (torch, torch-int8, onnx, onnx-int8) and check their parity"
+    )
+    parser.add_argument("--embedding-threads", type=int, default=0, help="Inference threads for the embedding backends")
+    args = parser.parse_args()
+
+    # The text stages run on the TXT versions, so always generate them
+    formats = list(dict.fromkeys(["txt"] + args.formats))
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        corpus = generate_corpus(corpus_dir, args.sizes, args.styles, formats, args.seed)
+        results = run_benchmarks(corpus, repeat=args.repeat)
+        if args.embedding_backends:
+            clauses = [
+                clause["text"]
+                for item in corpus if item["format"] == "txt"
+                for clause in extract_clauses_from_text(clean_text(read_contract(item["path"])))
+            ]
+            embedding = run_embedding_benchmarks(clauses, args.embedding_backends, args.embedding_threads, args.repeat)
+            results["stages"].update(embedding["stages"])
+            results["parity"] = embedding["parity"]
+
+    print_table(results)
+    parity_failed = False
+    for backend, check in results.get("parity", {}).items():
+        print(f"parity {backend}: min cosine {check['min_cosine']:.4f}, mean {check['mean_cosine']:.4f}")
+        if not check["passed"]:
+            print(f"PARITY FAILED {backend}")
+            parity_failed = True
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_results(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+    if parity_failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
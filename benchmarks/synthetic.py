@@ -0,0 +1,182 @@
+import os
+import sys
+import random
+import argparse
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from contract_classifier.classify_contract_type import CONTRACT_KEYWORDS
+from clause_classifier.rule_based import CLAUSE_KEYWORDS
+from risk_engine.rule_set import CONDITION_KEYWORDS, load_risk_rules
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "risk_engine", "risk_rules.yaml")
+NUMBERING_STYLES = ("numbered", "nested", "article", "items", "plain")
+FORMATS = ("txt", "docx", "pdf")
+
+FILLER_SENTENCES = [
+    "The parties agree to act in good faith in performing their obligations under this clause.",
+    "Any notice under this clause shall be given in writing to the address set out above.",
+    "This obligation survives for the period stated in the schedule unless agreed otherwise.",
+    "Each party shall bear its own costs in connection with the matters described herein.",
+    "Nothing in this clause shall limit the rights of either party under applicable law.",
+    "The obligations in this clause apply to the parties and their permitted successors.",
+]
+
+ROMAN = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X"]
+
+
+def to_roman(number: int) -> str:
+    # ARTICLE headings beyond X fall back to arabic numbers, which the segmenter also accepts
+    return ROMAN[number - 1] if number <= len(ROMAN) else str(number)
+
+
+def risky_phrases(rules_path: str = DEFAULT_RULES_PATH) -> Dict[str, List[str]]:
+    """Phrases that trigger risk rules, per clause category (from risk_rules.yaml)."""
+    phrases: Dict[str, List[str]] = {}
+    for category, rules in (load_risk_rules(rules_path) or {}).items():
+        for rule in rules or []:
+            if "keyword" in rule:
+                phrases.setdefault(category, []).append(str(rule["keyword"]))
+            elif rule.get("condition") == "unilateral":
+                phrases.setdefault(category, []).extend(CONDITION_KEYWORDS["unilateral"])
+    return phrases
+
+
+def _clause_body(rng: random.Random, category: str, risky: Optional[str], sentences: int) -> List[str]:
+    keywords = CLAUSE_KEYWORDS[category]
+    lines = [f"The {rng.choice(keywords)} provisions of this agreement apply as follows."]
+    for _ in range(sentences):
+        lines.append(rng.choice(FILLER_SENTENCES))
+    if risky:
+        lines.append(f"The parties acknowledge that {risky} applies under this clause.")
+    return lines
+
+
+def _heading(style: str, number: int, title: str) -> str:
+    if style == "article":
+        return f"ARTICLE {to_roman(number)} - {title}"
+    if style == "plain":
+        return title.title()
+    return f"{number}. {title}"
+
+
+def generate_contract(
+    clauses: int = 20,
+    style: str = "numbered",
+    contract_type: Optional[str] = None,
+    risky_ratio: float = 0.3,
+    sentences: int = 3,
+    seed: int = 0,
+    rules_path: str = DEFAULT_RULES_PATH
+) -> str:
+    """
+    Generates a synthetic contract as plain text.
+    Clause categories cycle through CLAUSE_KEYWORDS, the preamble uses the
+    keywords of `contract_type` (random if None) and about `risky_ratio` of
+    the clauses contain a phrase that triggers a risk rule.
+    `style` is one of NUMBERING_STYLES.
+    """
+    if style not in NUMBERING_STYLES:
+        raise ValueError(f"Unknown numbering style '{style}' (expected one of {', '.join(NUMBERING_STYLES)})")
+
+    rng = random.Random(seed)
+    contract_type = contract_type or rng.choice(sorted(CONTRACT_KEYWORDS))
+    phrases = risky_phrases(rules_path)
+    categories = list(CLAUSE_KEYWORDS)
+
+    keywords = CONTRACT_KEYWORDS[contract_type]
+    lines = [
+        contract_type.upper(),
+        f"This {keywords[0]} is entered into by Acme Private Limited and Globex Corporation.",
+        f"It covers the {', '.join(keywords[1:])} described below.",
+        ""
+    ]
+
+    for number in range(1, clauses + 1):
+        category = categories[(number - 1) % len(categories)]
+        risky = None
+        if category in phrases and rng.random() < risky_ratio:
+            risky = rng.choice(phrases[category])
+
+        body = _clause_body(rng, category, risky, sentences)
+        lines.append(_heading(style, number, category.upper()))
+        if style == "nested":
+            # Split the body into numbered sub-clauses
+            lines.extend(f"{number}.{i}. {line}" for i, line in enumerate(body, 1))
+        elif style == "items":
+            lines.append(body[0])
+            lines.extend(f"({chr(ord('a') + i)}) {line}" for i, line in enumerate(body[1:]))
+        else:
+            lines.extend(body)
+        if style == "plain":
+            lines.append("")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_txt(text: str, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def write_docx(text: str, path: str):
+    from docx import Document
+    document = Document()
+    for line in text.split("\n"):
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def write_pdf(text: str, path: str):
+    from xml.sax.saxutils import escape
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph
+
+    style = getSampleStyleSheet()["Normal"]
+    story = [Paragraph(escape(line) or "&nbsp;", style) for line in text.split("\n")]
+    SimpleDocTemplate(path, pagesize=LETTER).build(story)
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+
+def generate_corpus(
+    output_dir: str,
+    sizes: List[int],
+    styles: List[str] = NUMBERING_STYLES,
+    formats: List[str] = FORMATS,
+    seed: int = 0
+) -> List[Dict]:
+    """
+    Writes one contract per (size, style, format) into output_dir.
+    Returns their descriptions: {"path", "clauses", "style", "format", "chars"}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    corpus = []
+    for size in sizes:
+        for style in styles:
+            text = generate_contract(size, style, seed=seed + size)
+            for fmt in formats:
+                path = os.path.join(output_dir, f"contract_{size}_{style}.{fmt}")
+                WRITERS[fmt](text, path)
+                corpus.append({"path": path, "clauses": size, "style": style, "format": fmt, "chars": len(text)})
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic contracts for benchmarking")
+    parser.add_argument("output_dir")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Number of clauses per contract")
+    parser.add_argument("--styles", nargs="+", default=list(NUMBERING_STYLES), choices=NUMBERING_STYLES)
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for item in generate_corpus(args.output_dir, args.sizes, args.styles, args.formats, args.seed):
+        print(item["path"])
+
+
+if __name__ == "__main__":
+    main()
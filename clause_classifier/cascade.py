@@ -0,0 +1,150 @@
+import os
+import time
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from clause_classifier.rule_based import CLAUSE_KEYWORDS, classify_clause_rule_based
+from clause_classifier.embedding_based import classify_clauses_embedding, get_embedding_model
+from clause_classifier.llm_fallback import classify_clauses_llm, llm_available
+from preprocessing.keyword_matcher import KeywordHits
+from resources.tracing import span, count
+
+TIERS = ("rules", "embedding", "llm")
+# Only the keyword rules run by default, which labels clauses as the rule-based
+# classifier always has; the model tiers (the LLM one sends clause text to the
+# Groq API) are opt-in, e.g. CARA_CLASSIFIER_TIERS=rules,embedding,llm
+DEFAULT_TIERS = tuple(
+    tier.strip() for tier in os.getenv("CARA_CLASSIFIER_TIERS", "rules").split(",") if tier.strip()
+)
+FALLBACK_LABEL = "General"
+# Ties between labels go to the category declared first in CLAUSE_KEYWORDS
+CATEGORY_ORDER = {label: i for i, label in enumerate(CLAUSE_KEYWORDS)}
+
+# A tier resolves a clause when its best score reaches the minimum and leads
+# the runner-up by the margin. Rule scores are 0.5 (one keyword) or 0.8 (2+),
+# so by default only clauses without keywords or with tied labels escalate.
+RULE_MIN_SCORE = 0.5
+RULE_MIN_MARGIN = 0.3
+EMBEDDING_MIN_SCORE = 0.35
+EMBEDDING_MIN_MARGIN = 0.05
+
+
+def best_label(scores: Dict[str, float]) -> Tuple[Optional[str], float, float]:
+    """(label, score, lead over the runner-up) of a score dict; (None, 0, 0) if empty."""
+    if not scores:
+        return None, 0.0, 0.0
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], CATEGORY_ORDER.get(item[0], len(CATEGORY_ORDER))))
+    label, score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    return label, score, score - runner_up
+
+
+class ClauseCascade:
+    """
+    Tiered clause classification: keyword rules label every clause, the
+    embedding tier only sees clauses the rules were unsure about (low score
+    or a near tie), and the LLM tier only the clauses still unresolved after
+    that. Each tier runs as one batch. Tiers whose model is unavailable are
+    skipped; clauses nobody resolved keep the best rule label (or "General").
+
+    `stats()` reports, per tier, how many clauses it saw and resolved.
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[str] = DEFAULT_TIERS,
+        rule_min_score: float = RULE_MIN_SCORE,
+        rule_min_margin: float = RULE_MIN_MARGIN,
+        embedding_min_score: float = EMBEDDING_MIN_SCORE,
+        embedding_min_margin: float = EMBEDDING_MIN_MARGIN
+    ):
+        unknown = [tier for tier in tiers if tier not in TIERS]
+        if unknown or "rules" not in tiers:
+            raise ValueError(f"Classifier tiers must include 'rules' and be among {', '.join(TIERS)}")
+        self.tiers = tuple(tier for tier in TIERS if tier in tiers)
+        self.rule_min_score = rule_min_score
+        self.rule_min_margin = rule_min_margin
+        self.embedding_min_score = embedding_min_score
+        self.embedding_min_margin = embedding_min_margin
+        self._stats = {tier: {"clauses": 0, "resolved": 0, "seconds": 0.0} for tier in self.tiers}
+        self._unresolved = 0
+        self._lock = threading.Lock()
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies tiers and thresholds, part of the analysis version (labels depend on them)."""
+        return (
+            f"{'+'.join(self.tiers)}:{self.rule_min_score}/{self.rule_min_margin}"
+            f":{self.embedding_min_score}/{self.embedding_min_margin}"
+        )
+
+    def _record(self, tier: str, clauses: int, resolved: int, seconds: float):
+        with self._lock:
+            stats = self._stats[tier]
+            stats["clauses"] += clauses
+            stats["resolved"] += resolved
+            stats["seconds"] += seconds
+        count(f"classified_by_{tier}", resolved)
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Per tier: clauses seen, clauses resolved and seconds spent since
+        start, plus the number of clauses no tier resolved.
+        """
+        with self._lock:
+            stats = {tier: dict(tier_stats) for tier, tier_stats in self._stats.items()}
+            stats["unresolved"] = self._unresolved
+        return stats
+
+    def classify(self, texts: Sequence[str], hits: Optional[Sequence[KeywordHits]] = None) -> List[str]:
+        """
+        Labels a batch of clauses. `hits` are their keyword scans, if the
+        caller already has them (see classify_clause_rule_based).
+        """
+        labels: List[Optional[str]] = [None] * len(texts)
+        fallback = [FALLBACK_LABEL] * len(texts)
+
+        started = time.perf_counter()
+        pending = []
+        for i, text in enumerate(texts):
+            label, score, margin = best_label(classify_clause_rule_based(text, hits[i] if hits is not None else None))
+            if label is not None:
+                fallback[i] = label
+            if label is not None and score >= self.rule_min_score and margin >= self.rule_min_margin:
+                labels[i] = label
+            else:
+                pending.append(i)
+        self._record("rules", len(texts), len(texts) - len(pending), time.perf_counter() - started)
+
+        if pending and "embedding" in self.tiers and get_embedding_model() is not None:
+            started = time.perf_counter()
+            with span("classify_embedding", clauses=len(pending)):
+                scores = classify_clauses_embedding([texts[i] for i in pending])
+            still_pending = []
+            for i, clause_scores in zip(pending, scores):
+                label, score, margin = best_label(clause_scores)
+                if label is not None and score >= self.embedding_min_score and margin >= self.embedding_min_margin:
+                    labels[i] = label
+                else:
+                    still_pending.append(i)
+            self._record("embedding", len(pending), len(pending) - len(still_pending), time.perf_counter() - started)
+            pending = still_pending
+
+        if pending and "llm" in self.tiers and llm_available():
+            started = time.perf_counter()
+            with span("classify_llm", clauses=len(pending)):
+                scores = classify_clauses_llm([texts[i] for i in pending], tuple(CLAUSE_KEYWORDS))
+            still_pending = []
+            for i, clause_scores in zip(pending, scores):
+                label, _, _ = best_label(clause_scores)
+                if label is not None:
+                    labels[i] = label
+                else:
+                    still_pending.append(i)
+            self._record("llm", len(pending), len(pending) - len(still_pending), time.perf_counter() - started)
+            pending = still_pending
+
+        with self._lock:
+            self._unresolved += len(pending)
+        count("clauses_unresolved", len(pending))
+        return [label if label is not None else fallback[i] for i, label in enumerate(labels)]
@@ -1,31 +1,212 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import Dict, List
+import os
+import json
+import hashlib
+from typing import Dict, List, Tuple
 
-# Lazy load model
-model = None
+from resources.model_registry import get_resource
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBEDDING_CACHE_DIR = os.path.join(os.getenv("CARA_CACHE_DIR", ".cara_cache"), "embeddings")
+ONNX_EXPORT_DIR = os.path.join(os.getenv("CARA_CACHE_DIR", ".cara_cache"), "onnx", MODEL_NAME.replace('/', '_'))
+DEFAULT_BATCH_SIZE = 128 # upper bound; long clauses get smaller batches (see TOKEN_BUDGET)
+
+# Inference backends: reference float32 PyTorch, PyTorch with int8 dynamic
+# quantization of the Linear layers, ONNX Runtime, ONNX Runtime int8
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.getenv("CARA_EMBEDDING_BACKEND", "torch")
+EMBEDDING_THREADS = int(os.getenv("CARA_EMBEDDING_THREADS", "0")) # 0 = library default
+ONNX_QUANTIZATION = os.getenv("CARA_ONNX_QUANTIZATION", "avx2") # arm64, avx2, avx512 or avx512_vnni
+
+# Dynamic batching: clauses are sorted by length and batched so that
+# batch size x longest clause stays within this many (estimated) tokens
+TOKEN_BUDGET = int(os.getenv("CARA_EMBEDDING_TOKEN_BUDGET", "8192"))
+MAX_SEQ_TOKENS = 256 # all-MiniLM-L6-v2 truncates longer inputs
+CHARS_PER_TOKEN = 4
+PARITY_MIN_COSINE = 0.99
+
+# One representative sentence per clause label, matching CLAUSE_KEYWORDS in rule_based.py
+CLAUSE_TEMPLATES = {
+    "Termination": "Either party may terminate this agreement by written notice or upon material breach.",
+    "Indemnity": "The party shall indemnify, defend and hold harmless the other party against all claims.",
+    "Confidentiality": "The receiving party shall keep confidential information and trade secrets strictly confidential.",
+    "Payment": "Fees shall be invoiced monthly and payment is due within thirty days including applicable taxes.",
+    "Liability": "Total liability is limited and neither party is liable for indirect or consequential damages.",
+    "Jurisdiction": "This agreement is governed by the laws of and subject to the courts or arbitration of a jurisdiction.",
+    "Non-Compete": "The employee shall not compete with or solicit customers of the company during the restricted period.",
+    "Intellectual Property": "All intellectual property, copyright and patents in the work product are assigned to the company."
+}
+
+# (model name, template hash) -> (labels, normalized template matrix)
+_template_matrices: Dict[Tuple[str, str], Tuple[List[str], np.ndarray]] = {}
 
 def get_embedding_model():
-    global model
-    if model is None:
-        try:
-            model = SentenceTransformer('all-MiniLM-L6-v2')
-        except Exception as e:
-            print(f"Warning: Failed to load embedding model: {e}")
-            return None
-    return model
+    """Sentence embedding model, loaded lazily via the model registry (None if unavailable)."""
+    return get_resource("embedding")
+
+def load_embedding_model(backend: str = EMBEDDING_BACKEND, threads: int = EMBEDDING_THREADS):
+    """
+    Loads MODEL_NAME for CPU inference with one of EMBEDDING_BACKENDS.
+    The ONNX backends export the model once into ONNX_EXPORT_DIR (needs
+    sentence-transformers[onnx]); "onnx-int8" also quantizes it for
+    ONNX_QUANTIZATION. `threads` caps the intra-op threads.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}' (expected one of {', '.join(EMBEDDING_BACKENDS)})")
+    from sentence_transformers import SentenceTransformer
+
+    if backend.startswith("torch"):
+        import torch
+        if threads:
+            torch.set_num_threads(threads)
+        model = SentenceTransformer(MODEL_NAME, device="cpu")
+        if backend == "torch-int8":
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    import onnxruntime
+    model_kwargs = {"provider": "CPUExecutionProvider"}
+    if threads:
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        model_kwargs["session_options"] = options
+
+    if not os.path.exists(os.path.join(ONNX_EXPORT_DIR, "onnx", "model.onnx")):
+        SentenceTransformer(MODEL_NAME, backend="onnx").save(ONNX_EXPORT_DIR)
+    if backend == "onnx":
+        return SentenceTransformer(ONNX_EXPORT_DIR, backend="onnx", model_kwargs=model_kwargs)
+
+    file_name = f"model_int8_{ONNX_QUANTIZATION}.onnx"
+    if not os.path.exists(os.path.join(ONNX_EXPORT_DIR, "onnx", file_name)):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        export_dynamic_quantized_onnx_model(
+            SentenceTransformer(ONNX_EXPORT_DIR, backend="onnx"), ONNX_QUANTIZATION, ONNX_EXPORT_DIR,
+            file_suffix=f"int8_{ONNX_QUANTIZATION}"
+        )
+    return SentenceTransformer(
+        ONNX_EXPORT_DIR, backend="onnx", model_kwargs={**model_kwargs, "file_name": f"onnx/{file_name}"}
+    )
+
+def length_batches(texts: List[str], token_budget: int = TOKEN_BUDGET, max_batch: int = DEFAULT_BATCH_SIZE) -> List[List[int]]:
+    """
+    Groups text indices into batches of similar length, longest first, so
+    little compute is spent on padding: short clauses go into large batches,
+    long ones into small batches of at most token_budget (estimated) tokens.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    batches, batch, batch_tokens = [], [], 0
+    for i in order:
+        tokens = min(len(texts[i]) // CHARS_PER_TOKEN + 2, MAX_SEQ_TOKENS)
+        # Batches are sorted longest first, so the first text sets the padded length
+        batch_tokens = batch_tokens or tokens
+        if batch and ((len(batch) + 1) * batch_tokens > token_budget or len(batch) >= max_batch):
+            batches.append(batch)
+            batch, batch_tokens = [], tokens
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _templates_hash(templates: Dict[str, str]) -> str:
+    payload = json.dumps(templates, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+def encode_texts(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE, embedder=None) -> np.ndarray:
+    """
+    Encodes texts in length-sorted batches (see length_batches); `batch_size`
+    caps the batch size. Uses the shared model unless `embedder` is given.
+    Returns a float32 matrix of L2-normalized embeddings (one row per text).
+    """
+    embedder = embedder or get_embedding_model()
+    if not embedder or not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    vectors = None
+    for batch in length_batches(texts, max_batch=batch_size):
+        encoded = embedder.encode(
+            [texts[i] for i in batch],
+            batch_size=len(batch),
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        if vectors is None:
+            vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        vectors[batch] = encoded
+    return vectors
+
+def check_parity(texts: List[str], backend: str, threads: int = EMBEDDING_THREADS) -> Dict[str, float]:
+    """
+    Compares the embeddings of `backend` with the float32 PyTorch reference.
+    Returns {"min_cosine", "mean_cosine", "passed"}; a backend passes when
+    every text keeps a cosine similarity of at least PARITY_MIN_COSINE.
+    """
+    reference = encode_texts(texts, embedder=load_embedding_model("torch", threads))
+    candidate = encode_texts(texts, embedder=load_embedding_model(backend, threads))
+    cosines = np.sum(reference * candidate, axis=1)
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "passed": bool(cosines.min() >= PARITY_MIN_COSINE)
+    }
+
+def get_template_matrix(templates: Dict[str, str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Returns (labels, matrix) with one pre-normalized template embedding per row.
+    Cached in memory and on disk, keyed by model name, backend and template hash.
+    """
+    key = (f"{MODEL_NAME}-{EMBEDDING_BACKEND}", _templates_hash(templates))
+    if key in _template_matrices:
+        return _template_matrices[key]
+
+    labels = list(templates)
+    cache_path = os.path.join(EMBEDDING_CACHE_DIR, f"{key[0].replace('/', '_')}-{key[1]}.npy")
+
+    if os.path.exists(cache_path):
+        matrix = np.load(cache_path)
+    else:
+        matrix = encode_texts([templates[label] for label in labels])
+        if matrix.size:
+            os.makedirs(EMBEDDING_CACHE_DIR, exist_ok=True)
+            tmp_path = cache_path + ".tmp.npy"
+            np.save(tmp_path, matrix)
+            os.replace(tmp_path, cache_path)
+
+    if matrix.size:
+        _template_matrices[key] = (labels, matrix)
+    return labels, matrix
+
+def classify_clauses_embedding(
+    texts: List[str],
+    templates: Dict[str, str] = CLAUSE_TEMPLATES,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> List[Dict[str, float]]:
+    """
+    Classifies a batch of clauses using cosine similarity against template vectors.
+    All clauses are encoded in one call and scored with a single matrix multiply.
+    Returns one Label -> Score dict per clause (empty dicts if the model is unavailable).
+    """
+    if not texts or not templates:
+        return [{} for _ in texts]
+
+    labels, template_matrix = get_template_matrix(templates)
+    if not template_matrix.size:
+        return [{} for _ in texts]
+
+    clause_matrix = encode_texts(texts, batch_size=batch_size)
+    # Template vectors can come from the disk cache while the model itself failed to load
+    if not clause_matrix.size:
+        return [{} for _ in texts]
+    # Both sides are normalized, so the dot product is the cosine similarity
+    similarities = clause_matrix @ template_matrix.T
+
+    return [
+        {label: float(score) for label, score in zip(labels, row)}
+        for row in similarities
+    ]
 
-def classify_clause_embedding(text: str, templates: Dict[str, str]) -> Dict[str, float]:
+def classify_clause_embedding(text: str, templates: Dict[str, str] = CLAUSE_TEMPLATES) -> Dict[str, float]:
     """
     Classifies clause using cosine similarity against template vectors.
     Returns Label -> Score.
     """
-    embedder = get_embedding_model()
-    if not embedder or not templates:
-        return {}
-        
-    scores = {}
-    # Placeholder: Real logic would cache template embeddings and compute dot product
-    # query_vec = embedder.encode(text)
-    
-    return scores
+    return classify_clauses_embedding([text], templates)[0]
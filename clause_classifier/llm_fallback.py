@@ -1,8 +1,82 @@
-from typing import Dict
+import json
+from typing import Dict, List, Sequence
+
+from clause_classifier.rule_based import CLAUSE_KEYWORDS
+from resources.tracing import span, count
+
+LLM_BATCH_SIZE = 20 # clauses per request
+LLM_CLAUSE_CHARS = 800 # the start of a clause is enough to name its type
+OTHER_LABEL = "General"
+
+def build_classification_prompt(texts: Sequence[str], labels: Sequence[str]) -> str:
+    clauses = "\n\n".join(
+        f"[{i}]\n{text[:LLM_CLAUSE_CHARS]}" for i, text in enumerate(texts)
+    )
+    return f"""
+Classify each numbered contract clause into exactly one of these types:
+{", ".join(labels)}, {OTHER_LABEL}
+
+Use {OTHER_LABEL} when no type fits. RETURN ONLY VALID JSON of the form
+{{"labels": ["<type of clause 0>", "<type of clause 1>", ...]}}
+with one entry per clause, in order.
+
+{clauses}
+"""
+
+def parse_classification(content: str, count_expected: int, labels: Sequence[str]) -> List[Dict[str, float]]:
+    """Scores per clause from the model output; clauses with a missing or unknown type get {}."""
+    try:
+        values = json.loads(content).get("labels", [])
+    except (json.JSONDecodeError, AttributeError):
+        return [{} for _ in range(count_expected)]
+    allowed = set(labels) | {OTHER_LABEL}
+    results = []
+    for i in range(count_expected):
+        value = values[i] if i < len(values) and isinstance(values[i], str) else None
+        results.append({value: 1.0} if value in allowed else {})
+    return results
+
+def llm_available() -> bool:
+    """Whether an API key is configured and the Groq client can be created."""
+    from llm_explainer.explain_clause import get_api_key, get_client
+    return bool(get_api_key()) and get_client() is not None
+
+def classify_clauses_llm(texts: List[str], labels: Sequence[str] = tuple(CLAUSE_KEYWORDS)) -> List[Dict[str, float]]:
+    """
+    Classifies clauses with the Groq LLM, LLM_BATCH_SIZE clauses per request.
+    Returns one Label -> Score dict per clause; {} where the model gave no
+    usable answer or is unavailable (no API key, request failed).
+    """
+    from llm_explainer.explain_clause import MODEL_NAME, SYSTEM_PROMPT, get_api_key, get_client
+
+    if not texts or not get_api_key():
+        return [{} for _ in texts]
+    client = get_client()
+    if client is None:
+        return [{} for _ in texts]
+
+    results = []
+    for start in range(0, len(texts), LLM_BATCH_SIZE):
+        batch = texts[start:start + LLM_BATCH_SIZE]
+        try:
+            with span("llm_request", model=MODEL_NAME, purpose="classify", clauses=len(batch)):
+                response = client.chat.completions.create(
+                    model=MODEL_NAME,
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": build_classification_prompt(batch, labels)}
+                    ],
+                    temperature=0,
+                    max_tokens=16 * len(batch) + 32
+                )
+            count("llm_classify_requests")
+            results.extend(parse_classification(response.choices[0].message.content.strip(), len(batch), labels))
+        except Exception:
+            results.extend({} for _ in batch)
+    return results
 
 def classify_clause_llm(text: str) -> Dict[str, float]:
     """
     Fallback classification using LLM for difficult clauses.
     """
-    # Placeholder
-    return {"Other": 0.5}
+    return classify_clauses_llm([text])[0]
@@ -1,4 +1,6 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from preprocessing.keyword_matcher import KeywordHits, get_shared_matcher
 
 CLAUSE_KEYWORDS = {
     "Termination": ["terminate", "termination", "cancel", "cancellation", "end of agreement", "material breach"],
@@ -11,16 +13,17 @@ CLAUSE_KEYWORDS = {
     "Intellectual Property": ["intellectual property", "ownership of work", "copyright", "patent", "assignment of rights"]
 }
 
-def classify_clause_rule_based(text: str) -> Dict[str, float]:
+def classify_clause_rule_based(text: str, hits: Optional[KeywordHits] = None) -> Dict[str, float]:
     """
     Classifies a clause based on keyword presence.
+    `hits` can be passed in when the clause was already scanned by the shared matcher.
     Returns a dictionary of Label -> Confidence Score.
     """
-    text_lower = text.lower()
+    if hits is None:
+        hits = get_shared_matcher().scan(text)
     scores = {}
     
-    for label, keywords in CLAUSE_KEYWORDS.items():
-        matches = sum(1 for kw in keywords if kw in text_lower)
+    for label, matches in hits.group_counts("clause").items():
         if matches > 0:
             # Simple scoring: 0.5 for 1 match, 0.8 for 2+, capped at 1.0
             score = 0.5 if matches == 1 else 0.8
@@ -0,0 +1,127 @@
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from clause_extraction.extract_clauses import extract_clause_spans
+
+
+class Clause:
+    """Lightweight view of one clause of a Document; text is sliced on demand."""
+
+    __slots__ = ("document", "index")
+
+    def __init__(self, document: "Document", index: int):
+        self.document = document
+        self.index = index
+
+    @property
+    def id(self) -> str:
+        return self.document.clause_ids[self.index]
+
+    @property
+    def title(self) -> str:
+        return self.document.titles[self.index]
+
+    @property
+    def start(self) -> int:
+        return self.document.starts[self.index]
+
+    @property
+    def end(self) -> int:
+        return self.document.ends[self.index]
+
+    @property
+    def text(self) -> str:
+        return self.document.text[self.start:self.end]
+
+    @property
+    def label(self) -> str:
+        return self.document.labels[self.index]
+
+    @property
+    def intents(self) -> Tuple[str, ...]:
+        return self.document.intents[self.index]
+
+    @property
+    def page(self) -> Optional[int]:
+        return self.document.page_for_offset(self.start)
+
+
+class Document:
+    """
+    Compact, offset-based contract model shared by the pipeline stages.
+    The cleaned text is held once; clauses are (start, end) offsets into it,
+    stored in arrays, with per-clause labels and intents filled in by the
+    classifiers. Clause text is only copied when explicitly asked for.
+    """
+
+    __slots__ = ("text", "page_offsets", "clause_ids", "titles", "starts", "ends", "labels", "intents")
+
+    def __init__(self, text: str, page_offsets: Optional[List[int]] = None):
+        self.text = text
+        self.page_offsets = array("l", page_offsets or [])
+        self.clause_ids: List[str] = []
+        self.titles: List[str] = []
+        self.starts = array("l")
+        self.ends = array("l")
+        self.labels: List[str] = []
+        self.intents: List[Tuple[str, ...]] = []
+
+    @classmethod
+    def from_text(cls, text: str, page_offsets: Optional[List[int]] = None) -> "Document":
+        """Segments cleaned text into clauses (see extract_clause_spans)."""
+        document = cls(text, page_offsets)
+        for span in extract_clause_spans(text):
+            document.add_clause(
+                span.clause_id,
+                span.body_start,
+                span.body_end,
+                span.title(text) if span.kind != "paragraph" else ""
+            )
+        return document
+
+    def add_clause(self, clause_id: str, start: int, end: int, title: str = "", label: str = "General", intents: Tuple[str, ...] = ()):
+        self.clause_ids.append(clause_id)
+        self.titles.append(title)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.labels.append(label)
+        self.intents.append(intents)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> Clause:
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return Clause(self, index % len(self))
+
+    def __iter__(self) -> Iterator[Clause]:
+        return (Clause(self, i) for i in range(len(self)))
+
+    def clause_text(self, index: int) -> str:
+        return self.text[self.starts[index]:self.ends[index]]
+
+    def snippet(self, index: int, length: int = 100) -> str:
+        """Start of a clause, as shown next to risks."""
+        start = self.starts[index]
+        return self.text[start:min(start + length, self.ends[index])] + "..."
+
+    def page_for_offset(self, offset: int) -> Optional[int]:
+        """1-based page number of a character offset, or None for unpaged documents."""
+        if not self.page_offsets:
+            return None
+        return max(bisect_right(self.page_offsets, offset), 1)
+
+    def clauses_to_dicts(self) -> List[Dict]:
+        """Clause list in the extract_clauses_from_text format."""
+        return [
+            {
+                "clause_id": self.clause_ids[i],
+                "text": self.clause_text(i),
+                "title": self.titles[i],
+                "start": self.starts[i],
+                "end": self.ends[i]
+            }
+            for i in range(len(self))
+        ]
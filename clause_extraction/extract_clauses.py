@@ -1,56 +1,126 @@
-import re
-from typing import List, Dict
+from itertools import chain
+from typing import List, Dict, Iterable, Iterator, Optional
+
+from clause_extraction.segmenter import ClauseSegmenter, ClauseSpan, segment_clauses, segment_paragraphs, trim_span
+
+NUMBERED_THRESHOLD = 3 # More headings than this means the document is structured
+STREAM_DECISION_CHARS = 100_000
+
+def extract_clause_spans(text: str) -> List[ClauseSpan]:
+    """
+    Clause spans (offsets into `text`) as used by extract_clauses_from_text:
+    the heading-based clauses when the document is structured, otherwise one
+    span per paragraph. Enumerated items like "(a)" stay inside their clause
+    (they are children in the clause tree, see segment_clauses).
+    """
+    spans = segment_clauses(text)
+    clauses = [span for span in spans if span.kind != "item"]
+
+    if len(clauses) > NUMBERED_THRESHOLD: # Arbitrary threshold to decide if structure exists
+        return clauses
+
+    # Fallback: Paragraph splitting
+    return [_paragraph_span(number, start, end) for number, start, end in segment_paragraphs(text)]
+
+def _paragraph_span(number: int, start: int, end: int) -> ClauseSpan:
+    span = ClauseSpan(str(number), "paragraph", 1, start, start)
+    span.body_end = span.section_end = end
+    return span
+
+def _clause_dict(span: ClauseSpan, source: str, base: int = 0) -> Dict[str, str]:
+    # `base` is the document offset of source[0] (see ClauseSpan.text)
+    return {
+        "clause_id": span.clause_id,
+        "text": span.text(source, base),
+        "title": span.title(source, base) if span.kind != "paragraph" else "",
+        "start": span.body_start,
+        "end": span.body_end
+    }
 
 def extract_clauses_from_text(text: str) -> List[Dict[str, str]]:
     """
     Splits the contract text into clauses.
     Strategy:
-    1. Try to detect numbered clauses (e.g. "1. Term", "1.1. Commencement").
+    1. Try to detect clause headings (e.g. "1. Term", "1.1. Commencement", "ARTICLE I", "Schedule A").
     2. If found, split based on these.
     3. If not found, fall back to splitting by double newlines (paragraphs).
     
-    Returns a list of dicts: {"clause_id": str, "text": str, "title": str}
+    Returns a list of dicts: {"clause_id": str, "text": str, "title": str, "start": int, "end": int}
+    where start/end are the offsets of the clause text in `text`.
     """
-    clauses = []
-    
-    # Regex for standard numbering: Start of line, number, dot, space.
-    # Captures: (Number) (Optional Title)
-    # Examples: "1. Term", "2.1 Termination", "ARTICLE 1: DEFINITIONS"
-    
-    # Simple pattern: Number followed by dot
-    clause_pattern = re.compile(r'(?:^|\n)(\d+(?:\.\d+)*)\.?\s*(.*?)(?=\n\d+(?:\.\d+)*\.?|\Z)', re.DOTALL)
-    
-    matches = list(clause_pattern.finditer(text))
-    
-    if len(matches) > 3: # Arbitrary threshold to decide if structure exists
-        for match in matches:
-            clause_id = match.group(1)
-            content = match.group(2).strip()
-            
-            # extract title if it looks like the first line is caps or short
-            lines = content.split('\n')
-            first_line = lines[0].strip()
-            title = ""
-            
-            if len(first_line) < 50 and (first_line.isupper() or first_line.istitle()):
-                title = first_line
-                # Remove title from content if desired, or keep it. Keeping it is safer for context.
-            
-            clauses.append({
-                "clause_id": clause_id,
-                "text": content,
-                "title": title
-            })
+    return [_clause_dict(span, text) for span in extract_clause_spans(text)]
+
+
+def _iter_paragraphs(lines: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """
+    Streaming segment_paragraphs over `lines` joined with newlines: an empty
+    line ends the paragraph (a "\\n\\n" split), holding one paragraph at a time.
+    """
+    number = 1
+    paragraph: List[str] = []
+    paragraph_offset = offset = 0
+    for line in chain(lines, [None]):
+        if line is None or (line == "" and paragraph):
+            chunk = "\n".join(paragraph)
+            start, end = trim_span(chunk, 0, len(chunk))
+            if start < end:
+                yield _clause_dict(_paragraph_span(number, paragraph_offset + start, paragraph_offset + end), chunk, paragraph_offset)
+            if line is None:
+                return
+            number += 1
+            paragraph = []
+            paragraph_offset = offset + 1
+        else:
+            paragraph.append(line)
+        offset += len(line) + 1
+
+
+def iter_clauses(lines: Iterable[str], decision_chars: Optional[int] = STREAM_DECISION_CHARS) -> Iterator[Dict[str, str]]:
+    """
+    Streaming counterpart of extract_clauses_from_text, fed with cleaned lines
+    (see preprocessing.text_cleaner.iter_clean_lines). Offsets refer to the
+    lines joined with newlines.
+    Headings are found by the same ClauseSegmenter as segment_clauses, and a
+    clause is emitted as soon as the next heading closes it, so memory stays
+    proportional to the current clause.
+
+    Until more than NUMBERED_THRESHOLD clauses have been closed the document
+    could still turn out to be unstructured, so every line is kept. If
+    `decision_chars` characters pass without reaching the threshold, the
+    stream commits to paragraph splitting (None = buffer until the end, which
+    matches extract_clauses_from_text exactly).
+    """
+    lines = iter(lines)
+    segmenter = ClauseSegmenter()
+    kept: List[str] = [] # lines from kept_offset on: the open clause, or everything while undecided
+    kept_offset = offset = 0
+    spans: List[ClauseSpan] = [] # closed clauses not emitted yet
+    numbered_mode = None # None until decided
+
+    for line in lines:
+        kept.append(line)
+        spans.extend(span for span in segmenter.feed(line, 0, len(line), offset) if span.kind != "item")
+        line_offset, offset = offset, offset + len(line) + 1
+
+        if numbered_mode is None:
+            if len(spans) > NUMBERED_THRESHOLD:
+                numbered_mode = True
+            elif decision_chars is not None and offset > decision_chars:
+                # Unstructured so far: replay the kept lines as paragraphs and stream the rest
+                yield from _iter_paragraphs(chain(kept, lines))
+                return
+
+        if numbered_mode and spans:
+            source = "\n".join(kept)
+            for span in spans:
+                yield _clause_dict(span, source, kept_offset)
+            # The heading on this line closed them; the open clause starts here
+            spans, kept, kept_offset = [], [line], line_offset
+
+    spans.extend(span for span in segmenter.finish() if span.kind != "item")
+    if numbered_mode or len(spans) > NUMBERED_THRESHOLD:
+        source = "\n".join(kept)
+        for span in spans:
+            yield _clause_dict(span, source, kept_offset)
     else:
-        # Fallback: Paragraph splitting
-        paragraphs = text.split('\n\n')
-        for i, para in enumerate(paragraphs):
-            if para.strip():
-                # Try to guess a minimal title or just use ID
-                clauses.append({
-                    "clause_id": str(i + 1),
-                    "text": para.strip(),
-                    "title": ""
-                })
-                
-    return clauses
+        yield from _iter_paragraphs(kept)
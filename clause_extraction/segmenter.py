@@ -0,0 +1,236 @@
+import re
+from typing import List, Optional, Tuple
+
+# Heading kinds, checked in this order at the start of every line.
+# Levels: articles/schedules sit above numbered clauses ("1" = 1, "1.1" = 2, ...),
+# enumerated items "(a)" sit below everything.
+ARTICLE_HEADING = re.compile(r'(?:ARTICLE|Article)\s+([IVXLCDM]+|\d+)\b[.:\-]?[ \t]*')
+SCHEDULE_HEADING = re.compile(r'(?:SCHEDULE|Schedule|EXHIBIT|Exhibit|ANNEX|Annex|APPENDIX|Appendix)\s+([A-Z]|\d+)\b[.:\-]?[ \t]*')
+NUMBERED_HEADING = re.compile(r'(\d+(?:\.\d+)*)\.?[ \t]*')
+ITEM_HEADING = re.compile(r'\(([a-z]{1,2}|[ivx]+)\)[ \t]*')
+
+TOP_LEVEL = 0
+ITEM_LEVEL = 100
+
+# (kind, label, level, body_pos): body_pos is where the heading's own text starts
+Heading = Tuple[str, str, int, int]
+
+
+def match_heading(source: str, pos: int = 0, endpos: Optional[int] = None) -> Optional[Heading]:
+    """
+    Detects a clause heading at source[pos:endpos] (one line) without copying it.
+    Recognizes "1.", "1.1", "ARTICLE I", "Schedule A" / "Exhibit 2" and "(a)" / "(iv)".
+    """
+    if endpos is None:
+        endpos = len(source)
+    if pos >= endpos:
+        return None
+
+    first = source[pos]
+    if first.isdigit():
+        match = NUMBERED_HEADING.match(source, pos, endpos)
+        number = match.group(1)
+        return ("numbered", number, number.count(".") + 1, match.end())
+    if first == "(":
+        match = ITEM_HEADING.match(source, pos, endpos)
+        if match:
+            return ("item", f"({match.group(1)})", ITEM_LEVEL, match.end())
+        return None
+    if first in "AaSsEe":
+        match = ARTICLE_HEADING.match(source, pos, endpos)
+        if match:
+            return ("article", f"Article {match.group(1)}", TOP_LEVEL, match.end())
+        match = SCHEDULE_HEADING.match(source, pos, endpos)
+        if match:
+            kind = source[pos:match.start(1)].strip().title()
+            return ("schedule", f"{kind} {match.group(1)}", TOP_LEVEL, match.end())
+    return None
+
+
+class ClauseSpan:
+    """
+    A clause as offsets into the source text (nothing is copied).
+    - start: beginning of the heading line
+    - body_start/body_end: the clause's own text, whitespace-trimmed, up to the next
+      heading of its kind ("item" headings don't end numbered clauses)
+    - section_end: end of the clause including all of its sub-clauses
+    - parent/children: indices into the span list, forming the clause tree
+    """
+
+    __slots__ = ("clause_id", "kind", "level", "start", "body_start", "body_end", "section_end", "parent", "children")
+
+    def __init__(self, clause_id: str, kind: str, level: int, start: int, body_start: int):
+        self.clause_id = clause_id
+        self.kind = kind
+        self.level = level
+        self.start = start
+        self.body_start = body_start
+        self.body_end = body_start
+        self.section_end = body_start
+        self.parent: Optional[int] = None
+        self.children: List[int] = []
+
+    # `base` is the document offset of source[0], for sources holding only part of the document
+
+    def text(self, source: str, base: int = 0) -> str:
+        return source[self.body_start - base:self.body_end - base]
+
+    def title(self, source: str, base: int = 0) -> str:
+        """First line of the clause if it looks like a title (short, upper or title case)."""
+        body_start, body_end = self.body_start - base, self.body_end - base
+        line_end = source.find("\n", body_start, body_end)
+        first_line = source[body_start:body_end if line_end == -1 else line_end].strip()
+        if len(first_line) < 50 and (first_line.isupper() or first_line.istitle()):
+            return first_line
+        return ""
+
+    def __repr__(self):
+        return f"ClauseSpan({self.clause_id!r}, {self.kind}, {self.body_start}:{self.body_end})"
+
+
+def trim_span(source: str, start: int, end: int) -> Tuple[int, int]:
+    """Offsets of source[start:end].strip() without building the substring."""
+    while start < end and source[start].isspace():
+        start += 1
+    while end > start and source[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+class ClauseSegmenter:
+    """
+    Finds clause headings line by line; shared by segment_clauses and the
+    streaming iter_clauses (see clause_extraction.extract_clauses).
+    feed() returns the spans whose body became final with that line, in
+    document order; finish() returns the rest. The section_end and children of
+    a returned span can still grow until finish(). Only the open clauses are
+    kept, so memory does not grow with the document.
+    """
+
+    def __init__(self):
+        self.count = 0 # spans created so far (the next span's index)
+        self.stack: List[Tuple[int, ClauseSpan]] = [] # open ancestors, outermost first
+        self.pending: List[ClauseSpan] = [] # spans not returned yet, in document order
+        # [span, content_start, content_end] of the last non-item span and of the open item,
+        # still collecting body; content_start is None while the body is blank
+        self.open_clause: Optional[list] = None
+        self.open_item: Optional[list] = None
+        self.awaiting_content = False # a bare "4." heading takes the next non-blank line as its content
+        self.length = 0 # end of the last line fed
+
+    def _close(self, entry: Optional[list], line_start: int):
+        if entry is not None:
+            span, content_start, content_end = entry
+            if content_start is None:
+                span.body_start = span.body_end = max(line_start - 1, span.body_start)
+            else:
+                span.body_start, span.body_end = content_start, content_end
+
+    def feed(self, source: str, start: int, end: int, offset: int) -> List[ClauseSpan]:
+        """Takes the line source[start:end], which begins at `offset` in the document."""
+        heading = None if self.awaiting_content else match_heading(source, start, end)
+        content_start, content_end = trim_span(source, start, end)
+        new_entry = None
+        ready: List[ClauseSpan] = []
+
+        if heading is None:
+            if self.awaiting_content and content_start < content_end:
+                self.awaiting_content = False
+        else:
+            kind, label, level, body_pos = heading
+            self._close(self.open_item, offset)
+            self.open_item = None
+            if kind != "item":
+                self._close(self.open_clause, offset)
+            # Items wait for the clause they sit in, which comes first in document order
+            if kind != "item" or self.open_clause is None:
+                ready, self.pending = self.pending, []
+
+            # Close every section at the same or a deeper level
+            while self.stack and self.stack[-1][1].level >= level:
+                self.stack.pop()[1].section_end = max(offset - 1, 0)
+
+            parent = self.stack[-1] if self.stack else None
+            clause_id = label
+            if kind == "item" and parent is not None:
+                clause_id = parent[1].clause_id + label
+
+            span = ClauseSpan(clause_id, kind, level, offset, offset + body_pos - start)
+            index = self.count
+            self.count += 1
+            if parent is not None:
+                span.parent = parent[0]
+                parent[1].children.append(index)
+            self.stack.append((index, span))
+            self.pending.append(span)
+
+            body_start, body_end = trim_span(source, body_pos, end)
+            new_entry = [span, None, None]
+            if body_start < body_end:
+                new_entry[1:] = offset + body_start - start, offset + body_end - start
+            if kind == "item":
+                self.open_item = new_entry
+            else:
+                self.open_clause = new_entry
+                self.awaiting_content = kind == "numbered" and body_pos == end
+
+        if content_start < content_end:
+            for entry in (self.open_clause, self.open_item):
+                if entry is not None and entry is not new_entry:
+                    if entry[1] is None:
+                        entry[1] = offset + content_start - start
+                    entry[2] = offset + content_end - start
+        self.length = offset + end - start
+        return ready
+
+    def finish(self) -> List[ClauseSpan]:
+        """Closes the document; returns the spans not returned by feed()."""
+        self._close(self.open_item, self.length + 1)
+        self._close(self.open_clause, self.length + 1)
+        self.open_clause = self.open_item = None
+        for _, span in self.stack:
+            span.section_end = self.length
+        self.stack = []
+        ready, self.pending = self.pending, []
+        return ready
+
+
+def segment_clauses(text: str) -> List[ClauseSpan]:
+    """
+    Single pass over the lines of `text` that finds every clause heading and
+    returns the clauses as ClauseSpans in document order, linked into a tree.
+    Text before the first heading is not part of any clause.
+    """
+    segmenter = ClauseSegmenter()
+    spans: List[ClauseSpan] = []
+    pos = 0
+    length = len(text)
+    while pos <= length:
+        line_end = text.find("\n", pos)
+        if line_end == -1:
+            line_end = length
+        spans.extend(segmenter.feed(text, pos, line_end, pos))
+        pos = line_end + 1
+    spans.extend(segmenter.finish())
+    return spans
+
+
+def segment_paragraphs(text: str) -> List[Tuple[int, int, int]]:
+    """
+    Splits on blank lines ("\\n\\n") without copying.
+    Returns (paragraph_number, start, end) for non-empty paragraphs, with whitespace trimmed;
+    numbering counts empty paragraphs too, like enumerate(text.split('\\n\\n')).
+    """
+    paragraphs = []
+    pos = 0
+    number = 0
+    while True:
+        number += 1
+        split = text.find("\n\n", pos)
+        end = len(text) if split == -1 else split
+        start, stop = trim_span(text, pos, end)
+        if start < stop:
+            paragraphs.append((number, start, stop))
+        if split == -1:
+            return paragraphs
+        pos = split + 2
@@ -1,6 +1,8 @@
 import re
 from typing import Dict
 
+from preprocessing.keyword_matcher import get_shared_matcher
+
 CONTRACT_KEYWORDS = {
     "Non-Disclosure Agreement": ["non-disclosure", "confidentiality", "nda", "proprietary information"],
     "Service Agreement": ["service agreement", "scope of services", "deliverables", "master service agreement", "msa"],
@@ -15,14 +17,10 @@ def classify_contract_type(text: str) -> Dict[str, any]:
     Returns: {"contract_type": str, "confidence": float}
     """
     # Focus on the beginning of the document
-    header_text = text[:2000].lower()
+    hits = get_shared_matcher().scan(text[:2000])
     
     scores = {ctype: 0 for ctype in CONTRACT_KEYWORDS}
-    
-    for ctype, keywords in CONTRACT_KEYWORDS.items():
-        for kw in keywords:
-            if kw in header_text:
-                scores[ctype] += 1
+    scores.update(hits.group_counts("contract"))
                 
     # Find max score
     if not scores:
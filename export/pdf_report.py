@@ -1,3 +1,11 @@
+import io
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+from xml.sax.saxutils import escape
+
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 )
@@ -7,71 +15,121 @@ from reportlab.lib.enums import TA_CENTER
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 
+from resources.tracing import span
 
-def generate_pdf_report(analysis_data, output_path):
-    """
-    Generates a professional, readable PDF report for contract risk analysis.
-    """
+# Long clause contexts are split into paragraphs of at most this many
+# characters, so reportlab can break them across pages cheaply
+CONTEXT_CHUNK_CHARS = 1500
+# Rendered reports kept in memory, keyed by a hash of the report data
+REPORT_CACHE_SIZE = 32
 
-    doc = SimpleDocTemplate(
-        output_path,
-        pagesize=LETTER,
-        rightMargin=50,
-        leftMargin=50,
-        topMargin=60,
-        bottomMargin=50
-    )
+# -------------------------------------------------
+# STYLES (built once, shared by all reports)
+# -------------------------------------------------
+_styles = getSampleStyleSheet()
 
-    styles = getSampleStyleSheet()
-    story = []
+title_style = ParagraphStyle(
+    "TitleStyle",
+    parent=_styles["Title"],
+    alignment=TA_CENTER,
+    fontSize=20,
+    spaceAfter=20
+)
 
-    # -------------------------------------------------
-    # CUSTOM STYLES
-    # -------------------------------------------------
-    title_style = ParagraphStyle(
-        "TitleStyle",
-        parent=styles["Title"],
-        alignment=TA_CENTER,
-        fontSize=20,
-        spaceAfter=20
-    )
+subtitle_style = ParagraphStyle(
+    "SubtitleStyle",
+    parent=_styles["Normal"],
+    alignment=TA_CENTER,
+    fontSize=11,
+    textColor=colors.grey,
+    spaceAfter=30
+)
 
-    subtitle_style = ParagraphStyle(
-        "SubtitleStyle",
-        parent=styles["Normal"],
-        alignment=TA_CENTER,
-        fontSize=11,
-        textColor=colors.grey,
-        spaceAfter=30
-    )
+section_style = ParagraphStyle(
+    "SectionStyle",
+    parent=_styles["Heading2"],
+    fontSize=14,
+    spaceBefore=20,
+    spaceAfter=10
+)
 
-    section_style = ParagraphStyle(
-        "SectionStyle",
-        parent=styles["Heading2"],
-        fontSize=14,
-        spaceBefore=20,
-        spaceAfter=10
-    )
+normal_style = ParagraphStyle(
+    "NormalStyle",
+    parent=_styles["Normal"],
+    fontSize=10,
+    leading=14,
+    spaceAfter=8
+)
 
-    normal_style = ParagraphStyle(
-        "NormalStyle",
-        parent=styles["Normal"],
-        fontSize=10,
-        leading=14,
-        spaceAfter=8
-    )
+context_style = ParagraphStyle(
+    "ContextStyle",
+    parent=normal_style,
+    spaceAfter=0
+)
 
-    risk_high = ParagraphStyle(
-        "RiskHigh",
-        parent=normal_style,
-        textColor=colors.red
-    )
+risk_high = ParagraphStyle(
+    "RiskHigh",
+    parent=normal_style,
+    textColor=colors.red
+)
+
+risk_medium = ParagraphStyle(
+    "RiskMedium",
+    parent=normal_style,
+    textColor=colors.orange
+)
+
+overview_table_style = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ("FONT", (0, 0), (-1, -1), "Helvetica", 10),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
+    ("TOPPADDING", (0, 0), (-1, -1), 8)
+])
+
+
+def context_chunks(text: str, limit: int = CONTEXT_CHUNK_CHARS) -> List[str]:
+    """
+    Splits clause text into pieces of at most `limit` characters, at line
+    breaks where possible, so no single Paragraph gets huge.
+    """
+    chunks = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            cut = line.rfind(" ", 0, limit)
+            cut = cut if cut > 0 else limit
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:cut])
+            line = line[cut:].lstrip()
+        if current and len(current) + len(line) + 1 > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
 
-    risk_medium = ParagraphStyle(
-        "RiskMedium",
-        parent=normal_style,
-        textColor=colors.orange
-    )
+
+def _context_paragraphs(text: str) -> List:
+    chunks = context_chunks(text) or [""]
+    paragraphs = [Paragraph(f"<b>Clause Context:</b><br/>{_markup(chunks[0])}", context_style)]
+    paragraphs += [Paragraph(_markup(chunk), context_style) for chunk in chunks[1:]]
+    paragraphs.append(Spacer(1, normal_style.spaceAfter))
+    return paragraphs
+
+
+def _markup(text) -> str:
+    # Clause and LLM text may contain "<" or "&", which reportlab would parse as markup
+    return escape(str(text)).replace("\n", "<br/>")
+
+
+def build_report_story(analysis_data: Dict) -> List:
+    """Flowables of the risk report (see generate_pdf_report)."""
+    story = []
 
     # -------------------------------------------------
     # TITLE
@@ -93,13 +151,7 @@ def generate_pdf_report(analysis_data, output_path):
         ["Total Risks Found", str(len(analysis_data.get("risks", [])))]
     ], colWidths=[2.5 * inch, 3.5 * inch])
 
-    overview_table.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("FONT", (0, 0), (-1, -1), "Helvetica", 10),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 8),
-        ("TOPPADDING", (0, 0), (-1, -1), 8)
-    ]))
+    overview_table.setStyle(overview_table_style)
 
     story.append(overview_table)
 
@@ -123,20 +175,17 @@ def generate_pdf_report(analysis_data, output_path):
             style = risk_high if severity in ["High", "Critical"] else risk_medium
 
             story.append(Paragraph(
-                f"<b>{idx}. {risk.get('risk_id', 'Risk')}</b> "
-                f"({severity} Risk)",
+                f"<b>{idx}. {_markup(risk.get('risk_id', 'Risk'))}</b> "
+                f"({_markup(severity)} Risk)",
                 style
             ))
 
             story.append(Paragraph(
-                f"<b>Reason:</b> {risk.get('reason', 'N/A')}",
+                f"<b>Reason:</b> {_markup(risk.get('reason', 'N/A'))}",
                 normal_style
             ))
 
-            story.append(Paragraph(
-                f"<b>Clause Context:</b><br/>{risk.get('clause_text', '')}",
-                normal_style
-            ))
+            story.extend(_context_paragraphs(risk.get("clause_text", "")))
 
             # Add LLM Explanation if available
             explanation = risk.get('explanation')
@@ -144,12 +193,12 @@ def generate_pdf_report(analysis_data, output_path):
                 story.append(Spacer(1, 6))
                 story.append(Paragraph("<b>AI Explanation:</b>", normal_style))
                 story.append(Paragraph(
-                    f"<i>{explanation.get('plain_explanation', '')}</i>", 
+                    f"<i>{_markup(explanation.get('plain_explanation', ''))}</i>",
                     normal_style
                 ))
                 story.append(Spacer(1, 4))
                 story.append(Paragraph(
-                    f"<b>Suggestion:</b> {explanation.get('suggested_alternative', '')}", 
+                    f"<b>Suggestion:</b> {_markup(explanation.get('suggested_alternative', ''))}",
                     normal_style
                 ))
 
@@ -167,5 +216,56 @@ def generate_pdf_report(analysis_data, output_path):
         "professional before making contractual decisions.",
         normal_style
     ))
+    return story
+
+
+def generate_pdf_report(analysis_data, output_path):
+    """
+    Generates a professional, readable PDF report for contract risk analysis.
+    `output_path` can be a file path or a binary file object.
+    """
+
+    doc = SimpleDocTemplate(
+        output_path,
+        pagesize=LETTER,
+        rightMargin=50,
+        leftMargin=50,
+        topMargin=60,
+        bottomMargin=50
+    )
+
+    with span("pdf_report", risks=len(analysis_data.get("risks", []))):
+        doc.build(build_report_story(analysis_data))
+
+
+def report_key(analysis_data: Dict) -> str:
+    """Hash of the report data; equal data gives an identical report."""
+    payload = json.dumps(analysis_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_report_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_report_lock = threading.Lock()
+
+
+def render_pdf_report(analysis_data: Dict) -> bytes:
+    """
+    Renders the report in memory and returns the PDF bytes.
+    Reports are memoized on report_key(), so re-requesting an unchanged
+    report costs one hash.
+    """
+    key = report_key(analysis_data)
+    with _report_lock:
+        if key in _report_cache:
+            _report_cache.move_to_end(key)
+            return _report_cache[key]
+
+    buffer = io.BytesIO()
+    generate_pdf_report(analysis_data, buffer)
+    pdf = buffer.getvalue()
 
-    doc.build(story)
+    with _report_lock:
+        _report_cache[key] = pdf
+        while len(_report_cache) > REPORT_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+    return pdf
@@ -1,5 +1,6 @@
 from docx import Document
 import os
+from typing import Iterator
 
 def read_docx(file_path: str) -> str:
     """
@@ -17,3 +18,20 @@ def read_docx(file_path: str) -> str:
         return "\n".join(full_text)
     except Exception as e:
         raise RuntimeError(f"Failed to read DOCX file: {e}")
+
+def iter_docx_paragraphs(file_path: str) -> Iterator[str]:
+    """
+    Yields the non-empty paragraphs of a DOCX file one at a time.
+    python-docx parses the XML up front, but no joined copy of the text is built.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    try:
+        doc = Document(file_path)
+    except Exception as e:
+        raise RuntimeError(f"Failed to read DOCX file: {e}")
+
+    for para in doc.paragraphs:
+        if para.text.strip():
+            yield para.text
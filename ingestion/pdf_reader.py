@@ -1,25 +1,127 @@
 import pdfplumber
 import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple, Iterator
 
-def read_pdf(file_path: str) -> str:
+# Below this many pages the process startup costs more than it saves
+PARALLEL_MIN_PAGES = 16
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """Extracts pages [start, end) with pdfplumber. Runs in a worker process with its own file handle."""
+    with pdfplumber.open(file_path) as pdf:
+        return [pdf.pages[i].extract_text() or "" for i in range(start, end)]
+
+def _read_pages_pypdf(file_path: str) -> List[str]:
+    """Fast path: pypdf text extraction, without pdfplumber's layout analysis."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+    return [page.extract_text() or "" for page in reader.pages]
+
+def _read_pages_pdfplumber(file_path: str, parallel: bool, workers: Optional[int]) -> List[str]:
+    """pdfplumber extraction, split across worker processes with `parallel` (long documents only)."""
+    with pdfplumber.open(file_path) as pdf:
+        page_count = len(pdf.pages)
+        if not parallel or page_count < PARALLEL_MIN_PAGES:
+            return [page.extract_text() or "" for page in pdf.pages]
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = -(-page_count // workers)  # ceil division
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+    pages = []
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(_extract_page_range, file_path, start, end) for start, end in ranges]
+        # Results are collected in submission order, which is page order
+        for future in futures:
+            pages.extend(future.result())
+    return pages
+
+def iter_pdf_pages(file_path: str, fast: bool = False) -> Iterator[str]:
     """
-    Extracts text from a PDF file using pdfplumber.
-    Raises ValueError if the PDF appears to be scanned (no text extracted).
+    Yields the text of each non-empty page, one page at a time, so large
+    documents never have to be held in memory as a whole.
+    Raises ValueError at the end if no text was extracted at all.
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    text_content = []
-    
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
+    found_text = False
+
+    if fast:
+        from pypdf import PdfReader
+
+        for page in PdfReader(file_path).pages:
             text = page.extract_text()
             if text:
-                text_content.append(text)
-    
-    full_text = "\n".join(text_content)
-    
-    if not full_text.strip():
+                found_text = found_text or bool(text.strip())
+                yield text
+    else:
+        with pdfplumber.open(file_path) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+                # Drop the parsed page objects once the text is out
+                if hasattr(page, "close"):
+                    page.close()
+                if text:
+                    found_text = found_text or bool(text.strip())
+                    yield text
+
+    if not found_text:
+        raise ValueError("No text extracted. The PDF might be scanned or empty.")
+
+def read_pdf_pages(
+    file_path: str,
+    parallel: bool = False,
+    workers: Optional[int] = None,
+    fast: bool = False,
+    require_text: bool = False
+) -> List[str]:
+    """
+    Extracts the text of every page, in page order.
+    - parallel: split the page range across worker processes (pdfplumber)
+    - fast: use pypdf when layout fidelity isn't required
+    - require_text: raise ValueError if no page has any text (scanned or empty PDF)
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    if fast:
+        pages = _read_pages_pypdf(file_path)
+    else:
+        pages = _read_pages_pdfplumber(file_path, parallel, workers)
+
+    if require_text and not any(page.strip() for page in pages):
         raise ValueError("No text extracted. The PDF might be scanned or empty.")
-        
-    return full_text
+    return pages
+
+def join_pages(pages: List[str]) -> Tuple[str, List[int]]:
+    """
+    Joins page texts like read_pdf does.
+    Returns (full_text, page_offsets) where page_offsets[i] is the character
+    offset at which page i starts in full_text (empty pages start where the next one does).
+    """
+    text_content = []
+    page_offsets = []
+    offset = 0
+    for text in pages:
+        page_offsets.append(offset)
+        if text:
+            text_content.append(text)
+            offset += len(text) + 1  # "\n" separator
+    return "\n".join(text_content), page_offsets
+
+def read_pdf_with_pages(file_path: str, parallel: bool = False, workers: Optional[int] = None, fast: bool = False) -> Tuple[str, List[int]]:
+    """
+    Like read_pdf, but also returns the start offset of every page in the
+    raw text. (The analysis pipeline works on cleaned text and takes its
+    page offsets from clean_pages instead; see Document.page_for_offset.)
+    """
+    return join_pages(read_pdf_pages(file_path, parallel=parallel, workers=workers, fast=fast, require_text=True))
+
+def read_pdf(file_path: str, parallel: bool = False, workers: Optional[int] = None, fast: bool = False) -> str:
+    """
+    Extracts text from a PDF file using pdfplumber (or pypdf with fast=True).
+    Raises ValueError if the PDF appears to be scanned (no text extracted).
+    """
+    return read_pdf_with_pages(file_path, parallel=parallel, workers=workers, fast=fast)[0]
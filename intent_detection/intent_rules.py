@@ -1,4 +1,6 @@
-from typing import List
+from typing import List, Optional
+
+from preprocessing.keyword_matcher import KeywordHits, get_shared_matcher
 
 INTENT_MAPPING = {
     "Obligation": ["shall", "must", "will", "agrees to", "is required to"],
@@ -7,20 +9,21 @@ INTENT_MAPPING = {
     "Definition": ["means", "refers to", "defined as"] # Extra helper
 }
 
-def detect_clause_intent(text: str) -> List[str]:
+def detect_clause_intent(text: str, hits: Optional[KeywordHits] = None) -> List[str]:
     """
     Detects legal intent (Obligation, Right, Prohibition) based on modal verbs.
+    `hits` can be passed in when the clause was already scanned by the shared matcher.
     Returns a list of detected intents.
     """
-    text_lower = text.lower()
-    detected_intents = []
+    if hits is None:
+        hits = get_shared_matcher().scan(text)
+    text_lower = hits.text_lower
+    found = set()
     
-    for intent, keywords in INTENT_MAPPING.items():
-        for kw in keywords:
-            # Check for keyword with word boundaries to avoid partial matches naturally
-            # For simplicity using ' in ' checks which is robust enough for "shall not" etc.
-            if f" {kw} " in f" {text_lower} ":
-                detected_intents.append(intent)
-                break
+    for start, end, _, intent in hits.occurrences("intent"):
+        # Keyword must be bounded by spaces (or the text edges) to avoid partial matches
+        if (start == 0 or text_lower[start - 1] == " ") and (end == len(text_lower) or text_lower[end] == " "):
+            found.add(intent)
                 
+    detected_intents = [intent for intent in INTENT_MAPPING if intent in found]
     return detected_intents if detected_intents else ["Information"]
@@ -0,0 +1,278 @@
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional, Sequence
+
+from llm_explainer.explanation_cache import get_explanation_cache
+from resources.tracing import span, count
+from llm_explainer.explain_clause import (
+    MODEL_NAME,
+    PROMPT_VERSION,
+    get_api_key,
+    build_messages,
+    build_batch_messages,
+    parse_batch_explanations,
+    parse_explanation,
+    missing_key_explanation,
+    invalid_json_explanation,
+    api_error_explanation
+)
+
+
+# Batched explanations: several risks of a contract share one request
+BATCH_TOKEN_BUDGET = 6000 # estimated prompt tokens per request
+BATCH_MAX_ITEMS = 8
+OUTPUT_TOKENS_PER_ITEM = 320
+BATCH_RETRIES = 2 # rounds in which risks missing from a response are re-sent
+CHARS_PER_TOKEN = 4
+RISK_LINE_TOKENS = 40
+
+
+def pack_batches(
+    risks: Sequence[Dict],
+    indices: Sequence[int],
+    token_budget: int = BATCH_TOKEN_BUDGET,
+    max_items: int = BATCH_MAX_ITEMS
+) -> List[List[int]]:
+    """
+    Greedily packs risks (by index, in order) into batches whose estimated
+    prompt size stays within token_budget. A clause shared by several risks
+    of a batch is only counted once, as build_batch_prompt includes it once.
+    """
+    batches, batch, clauses, tokens = [], [], set(), 0
+    for i in indices:
+        text = risks[i]["clause_text"]
+        cost = RISK_LINE_TOKENS + (0 if text in clauses else len(text) // CHARS_PER_TOKEN)
+        if batch and (tokens + cost > token_budget or len(batch) >= max_items):
+            batches.append(batch)
+            batch, clauses, tokens = [], set(), 0
+            cost = RISK_LINE_TOKENS + len(text) // CHARS_PER_TOKEN
+        batch.append(i)
+        clauses.add(text)
+        tokens += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def retryable_errors() -> tuple:
+    """429, 5xx and connection errors are worth retrying (groq is imported lazily)."""
+    import groq
+    return (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError, groq.APITimeoutError)
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter: allows `rate` requests per second with
+    bursts of up to `capacity` requests.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header on a 429/503 response, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncExplainer:
+    """
+    Concurrent clause explainer.
+    One AsyncGroq client (and its connection pool) is reused for every
+    request; concurrency is bounded by a semaphore, request rate by a token
+    bucket, and 429/5xx/connection errors are retried with exponential backoff.
+    Set GROQ_BASE_URL (or pass base_url) to target a local stand-in server,
+    see llm_explainer/stub_server.py.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 8,
+        requests_per_second: float = 5.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5
+    ):
+        self.api_key = api_key or get_api_key()
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.rate_limiter = TokenBucket(requests_per_second)
+        self._client = None
+        self._semaphore = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from groq import AsyncGroq
+
+            # Retries are handled here, with the shared rate limiter in the loop
+            self._client = AsyncGroq(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        return self._client
+
+    async def _complete(self, messages: List[Dict], max_tokens: int = 512) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        retryable = retryable_errors()
+        attempt = 0
+        async with self._semaphore:
+            while True:
+                await self.rate_limiter.acquire()
+                try:
+                    with span("llm_request", model=MODEL_NAME, attempt=attempt):
+                        response = await self.client.chat.completions.create(
+                            model=MODEL_NAME,
+                            messages=messages,
+                            temperature=0.3,
+                            max_tokens=max_tokens
+                        )
+                    return response.choices[0].message.content.strip()
+                except retryable as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    count("llm_retries")
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = self.backoff_base * (2 ** attempt) * (1 + random.random() / 2)
+                    attempt += 1
+                    await asyncio.sleep(delay)
+
+    async def explain(self, clause_text: str, risk_info: Dict) -> Dict[str, str]:
+        """Async counterpart of generate_clause_explanation."""
+        if not self.api_key:
+            return missing_key_explanation()
+
+        # SQLite lookups are quick; the cache is shared with the sync explainer
+        cache = get_explanation_cache()
+        if cache is not None:
+            cached = cache.get(clause_text, risk_info, MODEL_NAME, PROMPT_VERSION)
+            if cached is not None:
+                count("explanation_cache_hits")
+                return cached
+            count("explanation_cache_misses")
+
+        try:
+            content = await self._complete(build_messages(clause_text, risk_info))
+            explanation = parse_explanation(content)
+            if cache is not None:
+                cache.put(clause_text, risk_info, MODEL_NAME, PROMPT_VERSION, explanation)
+            return explanation
+        except json.JSONDecodeError:
+            return invalid_json_explanation()
+        except Exception as e:
+            return api_error_explanation(e)
+
+    async def explain_all(self, risks: List[Dict]) -> List[Dict[str, str]]:
+        """
+        Explains every risk concurrently. Each risk's "clause_text" must be
+        the whole clause (Risk.to_dict(document, full_text=True)): it is both
+        the prompt and the cache key. Results are in input order.
+        """
+        return await asyncio.gather(*(self.explain(risk["clause_text"], risk) for risk in risks))
+
+    async def _explain_packed(self, risks: List[Dict], batch: List[int]) -> Dict[int, Dict[str, str]]:
+        """Explanations of one packed batch, by risk index (failed items left out)."""
+        items = [risks[i] for i in batch]
+        with span("llm_batch", items=len(items)):
+            content = await self._complete(build_batch_messages(items), max_tokens=OUTPUT_TOKENS_PER_ITEM * len(items) + 64)
+        parsed = parse_batch_explanations(content, len(items))
+        count("llm_batch_requests")
+        count("llm_batch_items_failed", len(items) - len(parsed))
+        return {batch[position]: explanation for position, explanation in parsed.items()}
+
+    async def explain_all_batched(self, risks: List[Dict]) -> List[Dict[str, str]]:
+        """
+        Explains every risk with as few requests as possible: uncached risks
+        are packed into batches (see pack_batches), each answered with one
+        JSON array, and only the risks whose entry was missing or invalid
+        are sent again (up to BATCH_RETRIES rounds). Risks are given as for
+        explain_all. Results are in input order.
+        """
+        if not self.api_key:
+            return [missing_key_explanation() for _ in risks]
+
+        results: List[Optional[Dict[str, str]]] = [None] * len(risks)
+        cache = get_explanation_cache()
+        pending = []
+        for i, risk in enumerate(risks):
+            cached = cache.get(risk["clause_text"], risk, MODEL_NAME, PROMPT_VERSION) if cache is not None else None
+            if cached is not None:
+                count("explanation_cache_hits")
+                results[i] = cached
+            else:
+                if cache is not None:
+                    count("explanation_cache_misses")
+                pending.append(i)
+
+        errors: Dict[int, Exception] = {}
+        for _ in range(BATCH_RETRIES + 1):
+            if not pending:
+                break
+            batches = pack_batches(risks, pending)
+            outcomes = await asyncio.gather(
+                *(self._explain_packed(risks, batch) for batch in batches), return_exceptions=True
+            )
+            for batch, outcome in zip(batches, outcomes):
+                if isinstance(outcome, Exception):
+                    # Retryable errors were already retried in _complete
+                    errors.update((i, outcome) for i in batch)
+                    continue
+                for i, explanation in outcome.items():
+                    results[i] = explanation
+                    if cache is not None:
+                        cache.put(risks[i]["clause_text"], risks[i], MODEL_NAME, PROMPT_VERSION, explanation)
+            pending = [i for i in pending if results[i] is None and i not in errors]
+
+        for i in range(len(risks)):
+            if results[i] is None:
+                results[i] = api_error_explanation(errors[i]) if i in errors else invalid_json_explanation()
+        return results
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+def explain_all_risks(risks: List[Dict], batched: bool = True, **explainer_options) -> List[Dict[str, str]]:
+    """
+    Synchronous "Explain all risks" bulk operation for scripts and the UI.
+    With `batched`, several risks share a request (see explain_all_batched);
+    otherwise every risk gets its own. Returns one explanation per risk, in input order.
+    """
+    async def run():
+        explainer = AsyncExplainer(**explainer_options)
+        try:
+            if batched:
+                return await explainer.explain_all_batched(risks)
+            return await explainer.explain_all(risks)
+        finally:
+            await explainer.aclose()
+
+    return asyncio.run(run())
@@ -1,33 +1,60 @@
-from typing import Dict
+from typing import Dict, Iterator, List, Sequence
 import os
+import re
 import json
-from groq import Groq
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from llm_explainer.explanation_cache import get_explanation_cache
+from llm_explainer.json_stream import IncrementalJsonObject
+from resources.tracing import span, count
+from resources.model_registry import get_resource, load_env
 
-def generate_clause_explanation(clause_text: str, risk_info: Dict) -> Dict[str, str]:
+MODEL_NAME = "openai/gpt-oss-120b"
+# Bump when the prompt changes, so cached explanations are not reused
+PROMPT_VERSION = "2" # 2: the prompt holds the whole clause instead of its snippet
+SYSTEM_PROMPT = "You are a legal AI assistant. Output JSON only."
+EXPLANATION_KEYS = ("plain_explanation", "why_risky", "business_impact", "suggested_alternative")
+
+def get_api_key():
+    # Environment variables (.env) are loaded on first use, not at import time
+    load_env()
+    return os.getenv("GROQ_API")
+
+def get_client():
     """
-    Generates an explanation for a contract clause using Groq LLM.
+    Shared Groq client from the model registry, reused across calls so the
+    HTTP connection pool is kept alive. GROQ_BASE_URL can point it at another endpoint.
     """
+    return get_resource("groq")
 
-    api_key = os.getenv("GROQ_API")
+def missing_key_explanation() -> Dict[str, str]:
+    return {
+        "plain_explanation": "API key missing.",
+        "why_risky": "GROQ_API_KEY not found in environment.",
+        "business_impact": "Unknown",
+        "suggested_alternative": "Check system configuration."
+    }
 
-    if not api_key:
-        return {
-            "plain_explanation": "API key missing.",
-            "why_risky": "GROQ_API_KEY not found in environment.",
-            "business_impact": "Unknown",
-            "suggested_alternative": "Check system configuration."
-        }
+def invalid_json_explanation() -> Dict[str, str]:
+    return {
+        "plain_explanation": "Model output was not valid JSON.",
+        "why_risky": "LLM formatting error.",
+        "business_impact": "Unknown",
+        "suggested_alternative": "Retry with stricter prompt."
+    }
 
-    client = Groq(api_key=api_key)
+def api_error_explanation(error: Exception) -> Dict[str, str]:
+    return {
+        "plain_explanation": "Error calling Groq API.",
+        "why_risky": str(error),
+        "business_impact": "None",
+        "suggested_alternative": "Retry later."
+    }
 
+def build_explanation_prompt(clause_text: str, risk_info: Dict) -> str:
     risk_reason = risk_info.get("reason", "No specific risk detected")
     risk_severity = risk_info.get("severity", "Neutral")
 
-    prompt = f"""
+    return f"""
 You are a legal assistant for Indian small businesses.
 
 Analyze the following contract clause and RETURN ONLY VALID JSON.
@@ -46,41 +73,191 @@ Return JSON with EXACTLY these keys:
 - suggested_alternative
 """
 
-    try:
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a legal AI assistant. Output JSON only."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.3,
-            max_tokens=512
+def build_messages(clause_text: str, risk_info: Dict):
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": build_explanation_prompt(clause_text, risk_info)
+        }
+    ]
+
+BATCH_INSTRUCTIONS = """
+You are a legal assistant for Indian small businesses.
+
+Below are contract clauses and the risks detected in them. For EVERY numbered
+risk, explain the referenced clause with respect to that risk.
+
+RETURN ONLY VALID JSON, no markdown, of the form:
+{"explanations": [{"index": <risk number>, "plain_explanation": "...", "why_risky": "...",
+"business_impact": "...", "suggested_alternative": "..."}, ...]}
+with exactly one entry per risk.
+"""
+
+def strip_json_fence(content: str) -> str:
+    """Removes a markdown code fence some models put around JSON output."""
+    return re.sub(r"^```(?:json)?\s*|\s*```$", "", content.strip())
+
+def build_batch_prompt(risks: Sequence[Dict]) -> str:
+    """
+    One prompt for several risks: the instructions appear once and a clause
+    shared by several risks is included once. Risks are numbered by position.
+    """
+    clause_ids: Dict[str, str] = {}
+    clauses, lines = [], []
+    for index, risk in enumerate(risks):
+        text = risk["clause_text"]
+        if text not in clause_ids:
+            clause_ids[text] = f"C{len(clause_ids) + 1}"
+            clauses.append(f'Clause {clause_ids[text]}:\n"""{text}"""')
+        lines.append(
+            f"Risk {index}: clause {clause_ids[text]}, "
+            f"level {risk.get('severity', 'Neutral')}, reason: {risk.get('reason', 'No specific risk detected')}"
         )
+    return BATCH_INSTRUCTIONS + "\n" + "\n\n".join(clauses) + "\n\n" + "\n".join(lines) + "\n"
+
+def build_batch_messages(risks: Sequence[Dict]) -> List[Dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_batch_prompt(risks)}
+    ]
 
-        content = response.choices[0].message.content.strip()
+def is_complete_explanation(entry) -> bool:
+    return isinstance(entry, dict) and all(
+        isinstance(entry.get(key), str) and entry[key].strip() for key in EXPLANATION_KEYS
+    )
 
-        # Safety: ensure valid JSON
-        return json.loads(content)
+def parse_explanation(content: str) -> Dict[str, str]:
+    """
+    Explanation from a single-risk response (markdown fence tolerated).
+    Raises json.JSONDecodeError unless it is a JSON object with every one
+    of EXPLANATION_KEYS, so incomplete answers are never cached.
+    """
+    data = json.loads(strip_json_fence(content))
+    if not is_complete_explanation(data):
+        raise json.JSONDecodeError("Missing explanation keys", content, 0)
+    return {key: data[key] for key in EXPLANATION_KEYS}
 
+def parse_batch_explanations(content: str, expected: int) -> Dict[int, Dict[str, str]]:
+    """
+    Valid explanations of a batch response by risk number. Entries that are
+    missing, duplicated or lack one of EXPLANATION_KEYS are left out, so the
+    caller can retry just those risks.
+    """
+    try:
+        data = json.loads(strip_json_fence(content))
     except json.JSONDecodeError:
-        return {
-            "plain_explanation": "Model output was not valid JSON.",
-            "why_risky": "LLM formatting error.",
-            "business_impact": "Unknown",
-            "suggested_alternative": "Retry with stricter prompt."
-        }
+        return {}
+    entries = data.get("explanations") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        return {}
+
+    explanations = {}
+    for entry in entries:
+        index = entry.get("index") if isinstance(entry, dict) else None
+        if not isinstance(index, int) or not 0 <= index < expected or index in explanations:
+            continue
+        if is_complete_explanation(entry):
+            explanations[index] = {key: entry[key] for key in EXPLANATION_KEYS}
+    return explanations
+
+def generate_clause_explanation(clause_text: str, risk_info: Dict) -> Dict[str, str]:
+    """
+    Generates an explanation for a contract clause using Groq LLM.
+    """
+
+    if not get_api_key():
+        return missing_key_explanation()
+
+    cache = get_explanation_cache()
+    if cache is not None:
+        cached = cache.get(clause_text, risk_info, MODEL_NAME, PROMPT_VERSION)
+        if cached is not None:
+            count("explanation_cache_hits")
+            return cached
+        count("explanation_cache_misses")
+
+    try:
+        client = get_client()
+        if client is None:
+            raise RuntimeError("Groq client could not be created.")
+        with span("llm_request", model=MODEL_NAME, risk_id=risk_info.get("risk_id")):
+            response = client.chat.completions.create(
+                model=MODEL_NAME,
+                messages=build_messages(clause_text, risk_info),
+                temperature=0.3,
+                max_tokens=512
+            )
+
+        explanation = parse_explanation(response.choices[0].message.content)
+        if cache is not None:
+            cache.put(clause_text, risk_info, MODEL_NAME, PROMPT_VERSION, explanation)
+        return explanation
+
+    except json.JSONDecodeError:
+        return invalid_json_explanation()
 
     except Exception as e:
-        return {
-            "plain_explanation": "Error calling Groq API.",
-            "why_risky": str(e),
-            "business_impact": "None",
-            "suggested_alternative": "Retry later."
-        }
+        return api_error_explanation(e)
+
+def stream_clause_explanation(clause_text: str, risk_info: Dict) -> Iterator[Dict[str, str]]:
+    """
+    Streaming variant of generate_clause_explanation: yields the explanation
+    as it is being generated, each time with the fields received so far (the
+    field being written holds its partial text), so plain_explanation can be
+    shown while the rest is still on its way. The last item yielded is the
+    complete explanation (or an error explanation, as generate_clause_explanation returns).
+    """
+    if not get_api_key():
+        yield missing_key_explanation()
+        return
+
+    cache = get_explanation_cache()
+    if cache is not None:
+        cached = cache.get(clause_text, risk_info, MODEL_NAME, PROMPT_VERSION)
+        if cached is not None:
+            count("explanation_cache_hits")
+            yield cached
+            return
+        count("explanation_cache_misses")
 
+    try:
+        client = get_client()
+        if client is None:
+            raise RuntimeError("Groq client could not be created.")
+        parser = IncrementalJsonObject()
+        content = []
+        # The span covers the request until the response starts streaming;
+        # yielding inside it would leave it open while the caller renders
+        with span("llm_request", model=MODEL_NAME, risk_id=risk_info.get("risk_id"), stream=True):
+            stream = client.chat.completions.create(
+                model=MODEL_NAME,
+                messages=build_messages(clause_text, risk_info),
+                temperature=0.3,
+                max_tokens=512,
+                stream=True
+            )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            content.append(delta)
+            parser.feed(delta)
+            yield parser.snapshot()
+
+        # The complete response must still be valid JSON with every key
+        explanation = parse_explanation("".join(content))
+        if cache is not None:
+            cache.put(clause_text, risk_info, MODEL_NAME, PROMPT_VERSION, explanation)
+        yield explanation
+
+    except json.JSONDecodeError:
+        yield invalid_json_explanation()
+
+    except Exception as e:
+        yield api_error_explanation(e)
@@ -0,0 +1,192 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.getenv("CARA_CACHE_DIR", ".cara_cache"), "explanations.sqlite3")
+DEFAULT_TTL_SECONDS = float(os.getenv("CARA_EXPLANATION_TTL_DAYS", "30")) * 24 * 3600
+DEFAULT_MAX_ENTRIES = int(os.getenv("CARA_EXPLANATION_CACHE_ENTRIES", "50000"))
+# Cosine similarity above which a reworded clause reuses a cached explanation,
+# e.g. 0.97. Off (0) by default: it loads the embedding model and scans the
+# cached embeddings of the risk on every miss
+DEFAULT_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("CARA_EXPLANATION_NEAR_DUP", "0"))
+PURGE_INTERVAL_SECONDS = 3600 # expired entries are deleted at most this often
+
+
+def normalize_clause(text: str) -> str:
+    """Lower-cases and collapses whitespace so formatting changes don't miss the cache."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class ExplanationCache:
+    """
+    Persistent cache of LLM explanations (SQLite).
+    Exact lookups are keyed by normalized clause hash + risk_id + severity +
+    model + prompt version. Entries expire after `ttl_seconds`, and the least
+    recently used are evicted beyond `max_entries`. With a near-duplicate
+    threshold (opt-in), a miss falls back to the most similar cached clause
+    for the same risk/model/prompt, using the sentence embedding model.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        near_duplicate_threshold: float = DEFAULT_NEAR_DUPLICATE_THRESHOLD
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._last_purge = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS explanations (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    explanation TEXT NOT NULL,
+                    embedding BLOB,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_explanations_scope ON explanations (scope)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_explanations_access ON explanations (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _scope(risk_info: Dict, model: str, prompt_version: str) -> str:
+        # Everything except the clause text that determines the explanation
+        return "|".join([
+            str(risk_info.get("risk_id", "")),
+            str(risk_info.get("severity", "")),
+            model,
+            prompt_version
+        ])
+
+    @staticmethod
+    def _key(normalized_text: str, scope: str) -> str:
+        return hashlib.sha256(f"{scope}\n{normalized_text}".encode("utf-8")).hexdigest()
+
+    def _embed(self, normalized_text: str):
+        if self.near_duplicate_threshold <= 0:
+            return None
+        try:
+            from clause_classifier.embedding_based import encode_texts
+            matrix = encode_texts([normalized_text])
+        except Exception:
+            return None
+        return matrix[0] if matrix.size else None
+
+    def get(self, clause_text: str, risk_info: Dict, model: str, prompt_version: str) -> Optional[Dict[str, str]]:
+        """Cached explanation for the clause/risk, or None on a miss."""
+        normalized = normalize_clause(clause_text)
+        scope = self._scope(risk_info, model, prompt_version)
+        key = self._key(normalized, scope)
+        now = time.time()
+        oldest = now - self.ttl_seconds
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT explanation FROM explanations WHERE key = ? AND created >= ?", (key, oldest)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE explanations SET last_access = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return json.loads(row[0])
+
+        near = self._near_duplicate(normalized, scope, oldest) if self.near_duplicate_threshold > 0 else None
+        if near is not None:
+            near_key, explanation = near
+            with self._connect() as conn:
+                conn.execute("UPDATE explanations SET last_access = ? WHERE key = ?", (now, near_key))
+            self.near_hits += 1
+            return json.loads(explanation)
+
+        self.misses += 1
+        return None
+
+    def _near_duplicate(self, normalized: str, scope: str, oldest: float):
+        # Embeds outside any transaction, so the model never runs under the write lock
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, explanation, embedding FROM explanations "
+                "WHERE scope = ? AND embedding IS NOT NULL AND created >= ?",
+                (scope, oldest)
+            ).fetchall()
+        if not rows:
+            return None
+        query = self._embed(normalized)
+        if query is None:
+            return None
+
+        import numpy as np
+        matrix = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+        similarities = matrix @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.near_duplicate_threshold:
+            return None
+        return rows[best][0], rows[best][1]
+
+    def put(self, clause_text: str, risk_info: Dict, model: str, prompt_version: str, explanation: Dict[str, str]):
+        """
+        Stores an explanation and evicts the least recently used entries
+        beyond max_entries. Expired entries are purged at most once per
+        PURGE_INTERVAL_SECONDS (get() ignores them until then).
+        """
+        normalized = normalize_clause(clause_text)
+        scope = self._scope(risk_info, model, prompt_version)
+        embedding = self._embed(normalized)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO explanations VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(normalized, scope),
+                    scope,
+                    json.dumps(explanation, ensure_ascii=False),
+                    embedding.astype("float32").tobytes() if embedding is not None else None,
+                    now,
+                    now
+                )
+            )
+            if now - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                conn.execute("DELETE FROM explanations WHERE created < ?", (now - self.ttl_seconds,))
+                self._last_purge = now
+            count = conn.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM explanations WHERE key IN "
+                    "(SELECT key FROM explanations ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "near_hits": self.near_hits, "misses": self.misses}
+
+
+_default_cache = None
+
+
+def get_explanation_cache() -> Optional[ExplanationCache]:
+    """Process-wide explanation cache; CARA_EXPLANATION_CACHE=0 disables it."""
+    global _default_cache
+    if os.getenv("CARA_EXPLANATION_CACHE", "1") == "0":
+        return None
+    if _default_cache is None:
+        _default_cache = ExplanationCache()
+    return _default_cache
@@ -0,0 +1,155 @@
+import json
+from typing import Dict, Optional
+
+ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class IncrementalJsonObject:
+    """
+    Parses a flat JSON object ({"key": "string", ...}) while it is being
+    streamed, so string fields can be shown before the object is complete.
+
+        parser = IncrementalJsonObject()
+        for chunk in chunks:
+            parser.feed(chunk)
+            parser.fields   # completed fields
+            parser.partial  # (key, text so far) of the string being read, or None
+
+    Anything before the opening brace (e.g. a markdown fence) is skipped.
+    Non-string values are kept as their raw JSON and decoded once complete.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, object] = {}
+        self.done = False
+        self._state = "start"
+        self._key: Optional[str] = None
+        self._buffer = []
+        self._escape = None # None, "" after a backslash, or the hex digits of a \u escape
+        self._depth = 0 # nesting of a non-string value
+        self._raw_string = None # inside a string of a non-string value: None, False, or True after a backslash
+
+    @property
+    def partial(self):
+        if self._state == "value_string" and self._key is not None:
+            return self._key, "".join(self._buffer)
+        return None
+
+    def snapshot(self) -> Dict[str, object]:
+        """Completed fields plus the string field being read (as far as received)."""
+        partial = self.partial
+        if partial is None:
+            return dict(self.fields)
+        return {**self.fields, partial[0]: partial[1]}
+
+    def feed(self, chunk: str):
+        for char in chunk:
+            if self.done:
+                return
+            self._step(char)
+
+    def _read_string_char(self, char: str) -> bool:
+        """Adds one character of a string to the buffer; returns True at the closing quote."""
+        if self._escape is not None:
+            if self._escape == "":
+                if char == "u":
+                    self._escape = "u"
+                    return False
+                self._buffer.append(ESCAPES.get(char, char))
+                self._escape = None
+                return False
+            self._escape += char
+            if len(self._escape) == 5: # "u" + 4 hex digits
+                try:
+                    self._append_code_unit(int(self._escape[1:], 16))
+                except ValueError:
+                    pass
+                self._escape = None
+            return False
+        if char == "\\":
+            self._escape = ""
+            return False
+        if char == '"':
+            return True
+        self._buffer.append(char)
+        return False
+
+    def _append_code_unit(self, code: int):
+        # Characters outside the BMP arrive as a \uD8xx\uDCxx surrogate pair
+        if 0xDC00 <= code <= 0xDFFF and self._buffer and "\ud800" <= self._buffer[-1] <= "\udbff":
+            high = ord(self._buffer[-1])
+            self._buffer[-1] = chr(0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00))
+        else:
+            self._buffer.append(chr(code))
+
+    def _step(self, char: str):
+        state = self._state
+        if state == "start":
+            if char == "{":
+                self._state = "before_key"
+        elif state == "before_key":
+            if char == '"':
+                self._state = "key"
+                self._buffer = []
+            elif char == "}":
+                self.done = True
+        elif state == "key":
+            if self._read_string_char(char):
+                self._key = "".join(self._buffer)
+                self._state = "colon"
+        elif state == "colon":
+            if char == ":":
+                self._state = "before_value"
+        elif state == "before_value":
+            if char == '"':
+                self._state = "value_string"
+                self._buffer = []
+            elif not char.isspace():
+                self._state = "value_raw"
+                self._buffer = [char]
+                self._depth = 1 if char in "[{" else 0
+        elif state == "value_string":
+            if self._read_string_char(char):
+                self.fields[self._key] = "".join(self._buffer)
+                self._state = "after_value"
+        elif state == "value_raw":
+            if self._raw_string is not None:
+                # Brackets inside nested strings don't count
+                self._buffer.append(char)
+                if self._raw_string:
+                    self._raw_string = False
+                elif char == "\\":
+                    self._raw_string = True
+                elif char == '"':
+                    self._raw_string = None
+                return
+            if char == '"':
+                self._raw_string = False
+            elif char in "[{":
+                self._depth += 1
+            elif char in "]}" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._buffer.append(char)
+                    self._finish_raw()
+                    self._state = "after_value"
+                    return
+            if self._depth == 0 and char in ",}":
+                self._finish_raw()
+                self._state = "before_key"
+                if char == "}":
+                    self.done = True
+                return
+            self._buffer.append(char)
+        elif state == "after_value":
+            if char == ",":
+                self._state = "before_key"
+            elif char == "}":
+                self.done = True
+
+    def _finish_raw(self):
+        raw = "".join(self._buffer).strip()
+        try:
+            self.fields[self._key] = json.loads(raw)
+        except json.JSONDecodeError:
+            self.fields[self._key] = raw
@@ -0,0 +1,151 @@
+# Local stand-in for the Groq chat-completions endpoint, for exercising the
+# explainers without network access or API credits:
+#
+#   python -m llm_explainer.stub_server --port 8765 --fail-rate 0.2
+#   GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API=test python main.py
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_EXPLANATION = {
+    "plain_explanation": "This clause shifts a significant risk onto your business.",
+    "why_risky": "It creates open-ended obligations.",
+    "business_impact": "Unexpected costs or liability.",
+    "suggested_alternative": "Negotiate a cap and mutual obligations."
+}
+STREAM_CHUNK_CHARS = 6 # roughly a token or two per streamed chunk
+
+
+class StubChatHandler(BaseHTTPRequestHandler):
+    # Set by make_server
+    fail_rate = 0.0
+    drop_rate = 0.0
+    latency = 0.0
+    request_count = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, model: str, content: str):
+        """Answers like a stream=True request: server-sent chunks of a few characters each."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def chunk(delta: dict, finish_reason=None) -> bytes:
+            payload = {
+                "id": f"stub-{self.request_count}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+        self.wfile.write(chunk({"role": "assistant", "content": ""}))
+        for start in range(0, len(content), STREAM_CHUNK_CHARS):
+            if self.latency:
+                time.sleep(self.latency / 20)
+            self.wfile.write(chunk({"content": content[start:start + STREAM_CHUNK_CHARS]}))
+            self.wfile.flush()
+        self.wfile.write(chunk({}, "stop"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        with self._count_lock:
+            type(self).request_count += 1
+
+        # Streamed answers spread the latency over their chunks
+        if self.latency and not request.get("stream"):
+            time.sleep(self.latency)
+
+        if random.random() < self.fail_rate:
+            self._send_json(429, {"error": {"message": "Rate limit reached"}}, {"retry-after": "0.1"})
+            return
+
+        # Batched prompts number their risks ("Risk 0: ..."); answer each, dropping some at drop_rate
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        risk_numbers = [int(number) for number in re.findall(r"^Risk (\d+):", prompt, re.MULTILINE)]
+        if risk_numbers:
+            content = json.dumps({"explanations": [
+                {"index": number, **CANNED_EXPLANATION}
+                for number in risk_numbers if random.random() >= self.drop_rate
+            ]})
+        else:
+            content = json.dumps(CANNED_EXPLANATION)
+
+        if request.get("stream"):
+            self._send_stream(request.get("model", "stub"), content)
+            return
+
+        self._send_json(200, {
+            "id": f"stub-{self.request_count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+
+def make_server(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    fail_rate: float = 0.0,
+    latency: float = 0.0,
+    drop_rate: float = 0.0
+) -> ThreadingHTTPServer:
+    """Creates (but doesn't start) a stub server; use port=0 for a free port."""
+    handler = type("ConfiguredStubChatHandler", (StubChatHandler,), {
+        "fail_rate": fail_rate, "latency": latency, "drop_rate": drop_rate
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of risks left out of batched answers")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.fail_rate, args.latency, args.drop_rate)
+    print(f"Stub chat-completions server on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 import os
 import sys
+import argparse
 import subprocess
 
-def main():
+def run_ui():
     """
-    Main entry point for CARA-Bot.
     Launches the Streamlit UI.
     """
     print("Starting CARA-Bot Legal AI...")
@@ -22,5 +22,192 @@ def main():
     except KeyboardInterrupt:
         print("\nStopping CARA-Bot...")
 
+def run_batch(args):
+    """
+    Analyzes a directory of contracts headlessly, one JSON result per file.
+    """
+    from pipeline.analyzer import analyze_directory
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Error: input directory not found: {args.input_dir}")
+        sys.exit(1)
+
+    print(f"Analyzing contracts in {args.input_dir} -> {args.output_dir}")
+    outcomes = analyze_directory(
+        args.input_dir, args.output_dir, workers=args.workers, use_cache=not args.no_cache,
+        fast_pdf=args.fast_pdf, use_index=args.index
+    )
+
+    failures = 0
+    for path, outcome in sorted(outcomes.items()):
+        if outcome.startswith("ERROR"):
+            failures += 1
+            print(f"  FAILED {path}: {outcome}")
+
+    print(f"Done: {len(outcomes) - failures} analyzed, {failures} failed.")
+    if failures:
+        sys.exit(1)
+
+def run_stream(args):
+    """
+    Streams the analysis of one (possibly very large) contract as JSON lines.
+    """
+    import json
+    from pipeline.analyzer import ContractAnalyzer
+
+    analyzer = ContractAnalyzer(fast_pdf=args.fast_pdf)
+    for event in analyzer.iter_analyze_file(args.file):
+        print(json.dumps(event, ensure_ascii=False), flush=True)
+
+def run_entities(args):
+    """
+    Extracts named entities from every contract in a directory as JSON lines,
+    batching clauses of all files through one spaCy stream.
+    """
+    import json
+    from pipeline.analyzer import find_contracts, load_document
+    from ner.entity_extractor import extract_portfolio_entities
+
+    if not os.path.isdir(args.input_dir):
+        print(f"Error: input directory not found: {args.input_dir}")
+        sys.exit(1)
+
+    paths, documents = [], []
+    for path in find_contracts(args.input_dir):
+        try:
+            documents.append(load_document(path, fast_pdf=args.fast_pdf))
+            paths.append(path)
+        except Exception as e:
+            print(f"  FAILED {path}: {e}", file=sys.stderr)
+
+    results = extract_portfolio_entities(documents, batch_size=args.batch_size, n_process=args.workers)
+    for path, document, result in zip(paths, documents, results):
+        clauses = [
+            {"clause_id": clause_id, "entities": entities}
+            for clause_id, entities in zip(document.clause_ids, result["clauses"])
+        ]
+        print(json.dumps({"file": path, "entities": result["entities"], "clauses": clauses}, ensure_ascii=False))
+
+def run_search(args):
+    """
+    Searches the clauses of all indexed contracts, one JSON line per hit.
+    """
+    import json
+    from search.clause_index import ClauseIndex
+
+    index = ClauseIndex()
+    if args.status_of:
+        index.set_status(args.status_of[0], args.status_of[1])
+        return
+    try:
+        hits = index.query(args.query, limit=args.limit)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for hit in hits:
+        print(json.dumps(hit, ensure_ascii=False))
+
+def run_similar(args):
+    """
+    Finds the indexed clauses most similar to a clause text, one JSON line per hit.
+    """
+    import json
+    from search.clause_index import ClauseIndex
+    from search.vector_store import ClauseVectorStore
+
+    store = ClauseVectorStore()
+    if not args.no_sync:
+        added = store.sync(ClauseIndex())
+        print(f"Embedded {added} new contracts", file=sys.stderr)
+    text = args.text
+    if os.path.isfile(text):
+        with open(text, "r", encoding="utf-8") as f:
+            text = f.read()
+    hits = store.search_text(
+        text, k=args.k, labels=args.label or (), risk_ids=args.risk or (), contract_types=args.type or ()
+    )
+    for hit in hits:
+        print(json.dumps(hit, ensure_ascii=False))
+
+def run_serve(args):
+    """
+    Runs the HTTP API (see api/server.py).
+    """
+    from api.server import serve
+    serve(args)
+
+def main():
+    """
+    Main entry point for CARA-Bot.
+    Without arguments launches the Streamlit UI.
+    """
+    parser = argparse.ArgumentParser(description="CARA-Bot Contract Analysis & Risk Assessment")
+    subparsers = parser.add_subparsers(dest="command")
+
+    subparsers.add_parser("ui", help="Launch the Streamlit UI (default)")
+
+    batch_parser = subparsers.add_parser("batch", help="Analyze a directory of contracts")
+    batch_parser.add_argument("input_dir", help="Directory containing PDF/DOCX/TXT contracts")
+    batch_parser.add_argument("output_dir", help="Directory to write JSON results into")
+    batch_parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    batch_parser.add_argument("--no-cache", action="store_true", help="Ignore the analysis result cache")
+    batch_parser.add_argument("--fast-pdf", action="store_true", help="Use pypdf text extraction instead of pdfplumber")
+    batch_parser.add_argument("--index", action="store_true", help="Add the analyzed contracts to the clause search index")
+
+    stream_parser = subparsers.add_parser("stream", help="Stream the analysis of one contract as JSON lines")
+    stream_parser.add_argument("file", help="PDF/DOCX/TXT contract")
+    stream_parser.add_argument("--fast-pdf", action="store_true", help="Use pypdf text extraction instead of pdfplumber")
+
+    entities_parser = subparsers.add_parser("entities", help="Extract named entities from a directory of contracts as JSON lines")
+    entities_parser.add_argument("input_dir", help="Directory containing PDF/DOCX/TXT contracts")
+    entities_parser.add_argument("--workers", type=int, default=1, help="Number of spaCy worker processes")
+    entities_parser.add_argument("--batch-size", type=int, default=64, help="Clauses per spaCy batch")
+    entities_parser.add_argument("--fast-pdf", action="store_true", help="Use pypdf text extraction instead of pdfplumber")
+
+    search_parser = subparsers.add_parser("search", help="Search clauses across all indexed contracts")
+    search_parser.add_argument(
+        "query", nargs="?", default="",
+        help='Words and field:value filters, e.g. \'risk:INDEM_UNLIMITED type:"Service Agreement" arbitration\''
+    )
+    search_parser.add_argument("--limit", type=int, default=50)
+    search_parser.add_argument(
+        "--set-status", dest="status_of", nargs=2, metavar=("FILE_HASH", "STATUS"),
+        help="Mark an indexed contract e.g. active or expired instead of searching"
+    )
+
+    similar_parser = subparsers.add_parser("similar", help="Find indexed clauses similar to a clause text")
+    similar_parser.add_argument("text", help="Clause text, or a file containing it")
+    similar_parser.add_argument("-k", type=int, default=10, help="Number of clauses to return")
+    similar_parser.add_argument("--label", action="append", help="Only clauses with this label (repeatable)")
+    similar_parser.add_argument("--risk", action="append", help="Only clauses flagged with this risk id (repeatable)")
+    similar_parser.add_argument("--type", action="append", help="Only clauses of this contract type (repeatable)")
+    similar_parser.add_argument("--no-sync", action="store_true", help="Don't embed newly indexed contracts first")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the HTTP API server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument("--workers", type=int, default=4, help="Analyses running at once")
+    serve_parser.add_argument("--max-pending", type=int, default=32, help="Queued + running jobs before uploads are refused")
+    serve_parser.add_argument("--max-requests", type=int, default=64, help="Requests served concurrently")
+    serve_parser.add_argument("--no-cache", action="store_true", help="Ignore the analysis result cache")
+    serve_parser.add_argument("--no-index", action="store_true", help="Don't add analyzed contracts to the clause search index")
+
+    args = parser.parse_args()
+
+    if args.command == "batch":
+        run_batch(args)
+    elif args.command == "stream":
+        run_stream(args)
+    elif args.command == "entities":
+        run_entities(args)
+    elif args.command == "search":
+        run_search(args)
+    elif args.command == "similar":
+        run_similar(args)
+    elif args.command == "serve":
+        run_serve(args)
+    else:
+        run_ui()
+
 if __name__ == "__main__":
     main()
@@ -1,43 +1,111 @@
-import spacy
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Tuple
 
-# Load the model globally to avoid reloading (lazy loading pattern in app is better, but this is simple)
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    # Fallback or placeholder, handled by main setup usually
-    nlp = None
+from resources.model_registry import get_resource
+from resources.tracing import span
+from clause_extraction.document import Document
+
+# spaCy entity labels -> entity groups
+ENTITY_GROUPS = {
+    "ORG": "PARTIES",
+    "PERSON": "PARTIES",
+    "DATE": "DATES",
+    "MONEY": "MONEY",
+    "GPE": "JURISDICTION", # Geopolitical Entity often implies Jurisdiction
+}
+GROUP_NAMES = ("PARTIES", "DATES", "MONEY", "JURISDICTION")
+
+# Components en_core_web_sm runs that NER does not need
+NER_DISABLED = ("tagger", "parser", "attribute_ruler", "lemmatizer")
+DEFAULT_BATCH_SIZE = 64
+
+def get_nlp():
+    """spaCy pipeline, loaded on first use and shared via the model registry (None if unavailable)."""
+    return get_resource("spacy")
+
+def _split_long(text: str, start: int, end: int, max_length: int) -> Iterator[Tuple[int, int]]:
+    # Clauses longer than spaCy's max_length are cut at line breaks
+    while end - start > max_length:
+        cut = text.rfind("\n", start, start + max_length)
+        if cut <= start:
+            cut = start + max_length
+        yield start, cut
+        start = cut
+    yield start, end
+
+def extract_clause_entities(
+    document: Document,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    n_process: int = 1
+) -> List[List[Dict]]:
+    """
+    Extracts entities clause by clause. Returns one list per clause of
+    {"group", "text", "start", "end"} dicts, offsets into document.text.
+    """
+    return extract_portfolio_entities([document], batch_size, n_process)[0]["clauses"]
+
+def group_entities(entities: Iterable[Dict]) -> Dict[str, List[str]]:
+    """
+    Groups entities by type, dropping duplicates (same text up to whitespace)
+    while keeping the order in which they first appear.
+    """
+    seen = {name: {} for name in GROUP_NAMES}
+    for entity in entities:
+        key = " ".join(entity["text"].split())
+        seen[entity["group"]].setdefault(key, None)
+    return {name: list(values) for name, values in seen.items()}
 
 def extract_entities(text: str) -> Dict[str, List[str]]:
     """
     Extracts standard legal entities using spaCy.
     Groups by type: Parties (ORG/PERSON), Dates, Money, Locations.
+    The text is processed clause by clause, so long contracts stay within
+    spaCy's max_length.
     """
-    if not nlp:
+    if not get_nlp():
         return {"Error": ["Model en_core_web_sm not loaded"]}
 
-    doc = nlp(text)
-    
-    entities = {
-        "PARTIES": [],
-        "DATES": [],
-        "MONEY": [],
-        "JURISDICTION": []
-    }
-    
-    for ent in doc.ents:
-        if ent.label_ in ["ORG", "PERSON"]:
-            if ent.text not in entities["PARTIES"]: # precise dedupe needed later
-                entities["PARTIES"].append(ent.text)
-        elif ent.label_ == "DATE":
-            entities["DATES"].append(ent.text)
-        elif ent.label_ == "MONEY":
-            entities["MONEY"].append(ent.text)
-        elif ent.label_ == "GPE": # Geopolitical Entity often implies Jurisdiction
-            entities["JURISDICTION"].append(ent.text)
-            
-    # Simple list deduplication
-    for k in entities:
-        entities[k] = list(set(entities[k]))
-        
-    return entities
+    document = Document.from_text(text)
+    if not len(document):
+        document.add_clause("1", 0, len(text))
+    clauses = extract_clause_entities(document)
+    return group_entities(entity for clause in clauses for entity in clause)
+
+def extract_portfolio_entities(
+    documents: List[Document],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    n_process: int = 1
+) -> List[Dict]:
+    """
+    Extracts entities from many documents in one nlp.pipe stream, so batches
+    fill up across document boundaries and n_process workers stay busy.
+    Returns per document {"entities": grouped entities, "clauses": per-clause entities}.
+    """
+    nlp = get_nlp()
+    if not nlp:
+        raise RuntimeError("Model en_core_web_sm not loaded")
+
+    disabled = [name for name in NER_DISABLED if name in nlp.pipe_names]
+    results = [{"clauses": [[] for _ in range(len(document))]} for document in documents]
+    pieces = (
+        (document.text[piece_start:piece_end], (doc_index, clause_index, piece_start))
+        for doc_index, document in enumerate(documents)
+        for clause_index, (start, end) in enumerate(zip(document.starts, document.ends))
+        for piece_start, piece_end in _split_long(document.text, start, end, nlp.max_length)
+    )
+    with span("ner", documents=len(documents), n_process=n_process):
+        docs = nlp.pipe(pieces, as_tuples=True, batch_size=batch_size, n_process=n_process, disable=disabled)
+        for doc, (doc_index, clause_index, offset) in docs:
+            clause = results[doc_index]["clauses"][clause_index]
+            for ent in doc.ents:
+                group = ENTITY_GROUPS.get(ent.label_)
+                if group:
+                    clause.append({
+                        "group": group,
+                        "text": ent.text,
+                        "start": offset + ent.start_char,
+                        "end": offset + ent.end_char
+                    })
+
+    for result in results:
+        result["entities"] = group_entities(entity for clause in result["clauses"] for entity in clause)
+    return results
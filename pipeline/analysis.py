@@ -0,0 +1,148 @@
+from typing import Dict, List, Optional
+
+from clause_extraction.document import Document
+
+
+class Risk:
+    """A risk found in a clause; refers to the clause by index instead of copying its text."""
+
+    __slots__ = ("risk_id", "severity", "reason", "clause_index", "explanation")
+
+    def __init__(self, risk_id: str, severity: str, reason: str, clause_index: int, explanation: Optional[Dict] = None):
+        self.risk_id = risk_id
+        self.severity = severity
+        self.reason = reason
+        self.clause_index = clause_index
+        self.explanation = explanation
+
+    def to_dict(self, document: Document, full_text: bool = False) -> Dict:
+        """
+        Risk in the evaluate_risk format (with the clause snippet, or with
+        the whole clause text if `full_text`, as the LLM explainers expect).
+        """
+        data = {
+            "risk_id": self.risk_id,
+            "severity": self.severity,
+            "reason": self.reason,
+            "clause_text": document.clause_text(self.clause_index) if full_text else document.snippet(self.clause_index),
+            "clause_index": self.clause_index
+        }
+        if self.explanation:
+            data["explanation"] = self.explanation
+        return data
+
+
+class ContractAnalysis:
+    """
+    Result of analyzing one contract: the Document (text + clause offsets,
+    labels, intents) plus contract type, language and risks.
+    to_dict() gives the full JSON form; compact=True leaves out the per-clause
+    text copies (used for caching).
+    """
+
+    __slots__ = ("document", "contract_type", "language", "risks", "file", "version")
+
+    def __init__(
+        self,
+        document: Document,
+        contract_type: Dict,
+        language: str,
+        risks: List[Risk],
+        file: str = "",
+        version: str = ""
+    ):
+        self.document = document
+        self.contract_type = contract_type
+        self.language = language
+        self.risks = risks
+        self.file = file
+        self.version = version # ContractAnalyzer.version that produced the analysis
+
+    @property
+    def text(self) -> str:
+        return self.document.text
+
+    def clause_risks(self, index: int) -> List[Risk]:
+        return [risk for risk in self.risks if risk.clause_index == index]
+
+    def risk_dicts(self) -> List[Dict]:
+        return [risk.to_dict(self.document) for risk in self.risks]
+
+    def to_dict(self, compact: bool = False) -> Dict:
+        document = self.document
+        if compact:
+            return {
+                "file": self.file,
+                "version": self.version,
+                "type": self.contract_type,
+                "language": self.language,
+                "text": document.text,
+                "page_offsets": list(document.page_offsets),
+                "clauses": [
+                    {
+                        "id": document.clause_ids[i],
+                        "title": document.titles[i],
+                        "start": document.starts[i],
+                        "end": document.ends[i],
+                        "label": document.labels[i],
+                        "intents": list(document.intents[i])
+                    }
+                    for i in range(len(document))
+                ],
+                "risks": [
+                    {
+                        "risk_id": risk.risk_id,
+                        "severity": risk.severity,
+                        "reason": risk.reason,
+                        "clause_index": risk.clause_index
+                    }
+                    for risk in self.risks
+                ]
+            }
+
+        risk_dicts = self.risk_dicts()
+        risks_by_clause: Dict[int, List[Dict]] = {}
+        for data in risk_dicts:
+            risks_by_clause.setdefault(data["clause_index"], []).append(data)
+
+        analyzed = []
+        for clause in document:
+            analyzed.append({
+                "id": clause.id,
+                "text": clause.text,
+                "label": clause.label,
+                "intents": list(clause.intents),
+                "page": clause.page,
+                "risks": risks_by_clause.get(clause.index, [])
+            })
+        return {
+            "file": self.file,
+            "type": self.contract_type,
+            "language": self.language,
+            "clauses": document.clauses_to_dicts(),
+            "analyzed": analyzed,
+            "risks": risk_dicts,
+            "text": document.text
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ContractAnalysis":
+        """Rebuilds an analysis from its compact dict form."""
+        document = Document(data["text"], data.get("page_offsets"))
+        # Identical label/intent values share one object
+        shared = {}
+        for clause in data["clauses"]:
+            intents = tuple(clause["intents"])
+            document.add_clause(
+                clause["id"],
+                clause["start"],
+                clause["end"],
+                clause["title"],
+                shared.setdefault(clause["label"], clause["label"]),
+                shared.setdefault(intents, intents)
+            )
+        risks = [
+            Risk(risk["risk_id"], risk["severity"], risk["reason"], risk["clause_index"])
+            for risk in data["risks"]
+        ]
+        return cls(document, data["type"], data["language"], risks, data.get("file", ""), data.get("version", ""))
@@ -0,0 +1,527 @@
+import os
+import json
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Optional, Callable, Iterator, Sequence, Tuple
+
+from ingestion.pdf_reader import read_pdf, read_pdf_pages, iter_pdf_pages
+from ingestion.docx_reader import read_docx, iter_docx_paragraphs
+from preprocessing.text_cleaner import clean_pages, iter_clean_lines
+from language.detect_language import detect_language_code
+from clause_extraction.extract_clauses import iter_clauses
+from clause_extraction.document import Document
+from contract_classifier.classify_contract_type import classify_contract_type
+from clause_classifier.cascade import ClauseCascade
+from intent_detection.intent_rules import detect_clause_intent
+from risk_engine.rule_set import RuleSet, load_rule_set
+from pipeline.result_cache import ResultCache, hash_bytes
+from pipeline.analysis import ContractAnalysis, Risk
+from pipeline.revisions import RevisionDelta, align_documents, compare_analyses
+from search.clause_index import ClauseIndex, contract_parties
+from resources.tracing import span, count, start_trace
+
+# Bump whenever a pipeline change alters analysis output, to invalidate cached results
+PIPELINE_VERSION = "4"
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "risk_engine", "risk_rules.yaml")
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+HEADER_CHARS = 2000 # classify_contract_type only looks at the start of the document
+PAGE_SEPARATOR = "\f" # separates pages when raw text is stored in the result cache
+PROGRESS_EVERY = 25 # clauses classified between two progress reports
+
+# progress(stage, fraction_done, new_risks): new_risks are the risks found since
+# the previous call, as dicts. An exception raised by the callback aborts the
+# analysis, which is how background jobs are cancelled.
+ProgressCallback = Callable[[str, float, List[Dict]], None]
+
+
+def read_contract(file_path: str, parallel_pdf: bool = False, fast_pdf: bool = False) -> str:
+    """
+    Reads a contract file (PDF, DOCX or TXT) and returns its raw text.
+    PDFs can be read with page-parallel pdfplumber workers or the faster pypdf path.
+    """
+    lower_path = file_path.lower()
+    if lower_path.endswith(".pdf"):
+        return read_pdf(file_path, parallel=parallel_pdf, fast=fast_pdf)
+    if lower_path.endswith(".docx"):
+        return read_docx(file_path)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def read_contract_pages(file_path: str, parallel_pdf: bool = False, fast_pdf: bool = False) -> List[str]:
+    """
+    Reads a contract file as a list of pages (DOCX and TXT files are one page).
+    """
+    lower_path = file_path.lower()
+    with span("ingest", format=os.path.splitext(lower_path)[1].lstrip(".")):
+        if lower_path.endswith(".pdf"):
+            return read_pdf_pages(file_path, parallel=parallel_pdf, fast=fast_pdf, require_text=True)
+        return [read_contract(file_path)]
+
+
+def build_document(pages: List[str]) -> Document:
+    """Cleans raw pages and segments them into a Document (labels not filled in)."""
+    with span("clean_text"):
+        # One cleaner for every input, so a contract cleans the same whether it
+        # arrives as one page or several; single-page input has no page numbers
+        clean_txt, page_offsets = clean_pages(pages)
+    with span("extract_clauses"):
+        document = Document.from_text(clean_txt, page_offsets if len(pages) > 1 else None)
+    count("clauses", len(document))
+    return document
+
+
+def load_document(file_path: str, parallel_pdf: bool = False, fast_pdf: bool = False) -> Document:
+    """Reads, cleans and segments a contract file, without classifying it."""
+    return build_document(read_contract_pages(file_path, parallel_pdf=parallel_pdf, fast_pdf=fast_pdf))
+
+
+def iter_contract_chunks(file_path: str, fast_pdf: bool = False) -> Iterator[str]:
+    """
+    Yields a contract's raw text piece by piece (PDF pages, DOCX paragraphs,
+    TXT lines). Pieces are meant to be joined with newlines.
+    """
+    lower_path = file_path.lower()
+    if lower_path.endswith(".pdf"):
+        yield from iter_pdf_pages(file_path, fast=fast_pdf)
+    elif lower_path.endswith(".docx"):
+        yield from iter_docx_paragraphs(file_path)
+    else:
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+
+class ContractAnalyzer:
+    """
+    Headless contract analysis engine.
+    Runs the full pipeline (clean -> extract clauses -> classify -> intents -> risks)
+    without any UI dependency. Risk rules are compiled once and only
+    reloaded when the rules file changes. With a ResultCache, repeated
+    files are served from the cache instead of being re-analyzed. With a
+    ClauseIndex, every analyzed file is added to the portfolio search index.
+    `parallel_pdf` / `fast_pdf` select the PDF extraction mode (see read_pdf).
+    """
+
+    def __init__(
+        self,
+        rules_path: str = DEFAULT_RULES_PATH,
+        cache: Optional[ResultCache] = None,
+        parallel_pdf: bool = False,
+        fast_pdf: bool = False,
+        index: Optional[ClauseIndex] = None,
+        cascade: Optional[ClauseCascade] = None
+    ):
+        self.rules_path = rules_path
+        self.cache = cache
+        self.index = index
+        self.cascade = cascade or ClauseCascade()
+        self.parallel_pdf = parallel_pdf
+        self.fast_pdf = fast_pdf
+
+    def read_contract_pages(self, file_path: str) -> List[str]:
+        return read_contract_pages(file_path, parallel_pdf=self.parallel_pdf, fast_pdf=self.fast_pdf)
+
+    @property
+    def rule_set(self) -> RuleSet:
+        return load_rule_set(self.rules_path)
+
+    @property
+    def version(self) -> str:
+        """Version hash of the pipeline and the current rule set, part of the cache key."""
+        payload = f"{PIPELINE_VERSION}:{self.rule_set.fingerprint}:{self.cascade.fingerprint}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def analyze_document(
+        self,
+        document: Document,
+        indices: Optional[Sequence[int]] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> List[Risk]:
+        """
+        Classifies the clauses of a segmented Document in place (labels,
+        intents) and returns the risks found, referring to clauses by index.
+        `indices` limits the work to some clauses (default: all).
+        """
+        rule_set = self.rule_set
+        # Identical intent tuples share one object across clauses
+        shared_intents = {}
+        risks = []
+
+        indices = range(len(document)) if indices is None else indices
+        rules_evaluated = 0
+        reported = 0
+        with span("classify_clauses"):
+            # One keyword pass per clause, shared by classification, intents and risk rules
+            texts = [document.clause_text(i) for i in indices]
+            all_hits = [rule_set.matcher.scan(clause_text) for clause_text in texts]
+            # Labels first, all at once: the cascade batches its embedding/LLM tiers
+            labels = self.cascade.classify(texts, all_hits)
+
+            for done, (i, clause_text, hits, label) in enumerate(zip(indices, texts, all_hits, labels), 1):
+                intents = tuple(detect_clause_intent(clause_text, hits))
+
+                document.labels[i] = label
+                document.intents[i] = shared_intents.setdefault(intents, intents)
+
+                rules_evaluated += len(rule_set.by_category.get(label, ()))
+                for rule in rule_set.matching_rules(clause_text, label, hits):
+                    risks.append(Risk(rule.id, rule.severity, rule.reason, i))
+
+                if progress and (done % PROGRESS_EVERY == 0 or done == len(indices)):
+                    progress("classifying", 0.2 + 0.75 * done / len(indices), [risk.to_dict(document) for risk in risks[reported:]])
+                    reported = len(risks)
+
+        count("clauses_classified", len(indices))
+        count("rules_evaluated", rules_evaluated)
+        return risks
+
+    def analyze_pages(self, pages: List[str], progress: Optional[ProgressCallback] = None) -> ContractAnalysis:
+        """
+        Analyzes already extracted contract text, given page by page.
+        Clauses keep a page number via the page offsets.
+        """
+        if progress:
+            progress("segmenting", 0.1, [])
+        document = build_document(pages)
+        risks = self.analyze_document(document, progress=progress)
+        if progress:
+            progress("summarizing", 0.95, [])
+        return self._make_analysis(document, risks)
+
+    def _make_analysis(self, document: Document, risks: List[Risk]) -> ContractAnalysis:
+        with span("classify_contract_type"):
+            contract_type = classify_contract_type(document.text)
+        with span("detect_language"):
+            language = detect_language_code(document.text)
+        count("risks", len(risks))
+        return ContractAnalysis(document, contract_type, language, risks, version=self.version)
+
+    def analyze_revision(
+        self,
+        previous: ContractAnalysis,
+        pages: List[str],
+        progress: Optional[ProgressCallback] = None
+    ) -> Tuple[ContractAnalysis, RevisionDelta]:
+        """
+        Analyzes a new version of a previously analyzed contract.
+        Clauses whose text is unchanged reuse the previous labels, intents,
+        risks and explanations; only modified and added clauses are
+        classified. Returns the analysis (identical to a full analysis) and
+        the RevisionDelta against the previous version.
+        """
+        if progress:
+            progress("segmenting", 0.1, [])
+        document = build_document(pages)
+        if previous.version != self.version:
+            # Rules or pipeline changed since: nothing can be reused
+            analysis = self._make_analysis(document, self.analyze_document(document, progress=progress))
+            return analysis, compare_analyses(previous, analysis)
+
+        alignment = align_documents(previous.document, document)
+        matches, unchanged = alignment
+        old = previous.document
+        old_risks: Dict[int, List[Risk]] = {}
+        for risk in previous.risks:
+            old_risks.setdefault(risk.clause_index, []).append(risk)
+
+        risks = []
+        changed = []
+        for i, j in enumerate(matches):
+            if unchanged[i]:
+                document.labels[i] = old.labels[j]
+                document.intents[i] = old.intents[j]
+                risks.extend(
+                    Risk(risk.risk_id, risk.severity, risk.reason, i, risk.explanation)
+                    for risk in old_risks.get(j, [])
+                )
+            else:
+                changed.append(i)
+        count("clauses_reused", len(document) - len(changed))
+        if progress:
+            progress("classifying", 0.2, [risk.to_dict(document) for risk in risks])
+
+        risks.extend(self.analyze_document(document, changed, progress))
+        # Same order as a full analysis: by clause, then rule order
+        risks.sort(key=lambda risk: risk.clause_index)
+        analysis = self._make_analysis(document, risks)
+        return analysis, compare_analyses(previous, analysis, alignment)
+
+    def analyze_text(self, raw_text: str) -> ContractAnalysis:
+        """Analyzes already extracted contract text."""
+        return self.analyze_pages([raw_text])
+
+    def analyze_clause(self, clause: Dict[str, str], rule_set: Optional[RuleSet] = None) -> Dict:
+        """Classifies one extracted clause (dict form) and evaluates its risks."""
+        rule_set = rule_set or self.rule_set
+        hits = rule_set.matcher.scan(clause["text"])
+        label = self.cascade.classify([clause["text"]], [hits])[0]
+        return {
+            "id": clause["clause_id"],
+            "text": clause["text"],
+            "label": label,
+            "intents": detect_clause_intent(clause["text"], hits),
+            "risks": rule_set.evaluate(clause["text"], label, hits)
+        }
+
+    def _analyze_cached(
+        self,
+        data: bytes,
+        file_name: str,
+        read_pages: Callable[[], List[str]],
+        progress: Optional[ProgressCallback] = None
+    ) -> ContractAnalysis:
+        if self.cache is None:
+            if progress:
+                progress("reading", 0.0, [])
+            analysis = self.analyze_pages(read_pages(), progress)
+        else:
+            file_hash = hash_bytes(data)
+            version = self.version
+            with span("result_cache_lookup"):
+                cached = self.cache.get(file_hash, version)
+            if cached is not None:
+                count("result_cache_hits")
+                analysis = ContractAnalysis.from_dict(cached)
+            else:
+                count("result_cache_misses")
+                if progress:
+                    progress("reading", 0.0, [])
+                raw_text = self.cache.get_text(file_hash)
+                pages = raw_text.split(PAGE_SEPARATOR) if raw_text is not None else read_pages()
+                analysis = self.analyze_pages(pages, progress)
+                self.cache.put(file_hash, version, PAGE_SEPARATOR.join(pages), analysis.to_dict(compact=True))
+
+        analysis.file = file_name
+        self._add_to_index(data, analysis)
+        return analysis
+
+    def _add_to_index(self, data: bytes, analysis: ContractAnalysis):
+        # Files already indexed with this pipeline version are skipped
+        if self.index is None:
+            return
+        file_hash = hash_bytes(data)
+        if self.index.is_indexed(file_hash, analysis.version):
+            return
+        with span("index_clauses", clauses=len(analysis.document)):
+            self.index.add(analysis, file_hash, contract_parties(analysis))
+        count("clauses_indexed", len(analysis.document))
+
+    def extract_pages(self, data: bytes, file_name: str) -> List[str]:
+        """
+        Extracts the raw text of an uploaded file page by page, reusing the
+        cached text for files that were seen before.
+        """
+        if self.cache is not None:
+            raw_text = self.cache.get_text(hash_bytes(data))
+            if raw_text is not None:
+                return raw_text.split(PAGE_SEPARATOR)
+        return self._read_bytes(data, file_name)
+
+    def analyze_bytes(
+        self,
+        data: bytes,
+        file_name: str,
+        pages: Optional[List[str]] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> ContractAnalysis:
+        """
+        Analyzes an uploaded contract given its bytes.
+        `pages` can be passed if the text was already extracted.
+        `progress` is called between stages (see ProgressCallback).
+        """
+        read_pages = (lambda: pages) if pages is not None else (lambda: self._read_bytes(data, file_name))
+        return self._analyze_cached(data, file_name, read_pages, progress)
+
+    def analyze_revision_bytes(
+        self,
+        data: bytes,
+        file_name: str,
+        previous: ContractAnalysis,
+        pages: Optional[List[str]] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> Tuple[ContractAnalysis, RevisionDelta]:
+        """
+        Analyzes an uploaded new version of a contract against `previous`
+        (see analyze_revision). Already cached versions are served from the cache.
+        """
+        if self.cache is not None:
+            file_hash = hash_bytes(data)
+            version = self.version
+            cached = self.cache.get(file_hash, version)
+            if cached is not None:
+                analysis = ContractAnalysis.from_dict(cached)
+                analysis.file = file_name
+                self._add_to_index(data, analysis)
+                return analysis, compare_analyses(previous, analysis)
+
+        if progress:
+            progress("reading", 0.0, [])
+        if pages is None:
+            pages = self.extract_pages(data, file_name)
+        analysis, delta = self.analyze_revision(previous, pages, progress)
+        analysis.file = file_name
+        if self.cache is not None:
+            self.cache.put(file_hash, version, PAGE_SEPARATOR.join(pages), analysis.to_dict(compact=True))
+        self._add_to_index(data, analysis)
+        return analysis, delta
+
+    def analyze_file(self, file_path: str) -> ContractAnalysis:
+        """Reads and analyzes a single contract file."""
+        data = b""
+        if self.cache is not None or self.index is not None:
+            with open(file_path, "rb") as f:
+                data = f.read()
+        return self._analyze_cached(data, os.path.basename(file_path), lambda: self.read_contract_pages(file_path))
+
+    def iter_analyze_file(self, file_path: str) -> Iterator[Dict]:
+        """
+        Streaming analysis with bounded memory: pages/paragraphs are read,
+        cleaned and split into clauses incrementally, and each clause is
+        analyzed as soon as its boundary is known.
+        Yields events:
+            {"event": "overview", "type": {...}, "language": str}
+            {"event": "clause", "clause": {...analyzed clause...}}
+            {"event": "done", "clauses": int, "risks": int}
+        """
+        rule_set = self.rule_set
+        header_lines: List[str] = []
+        header_size = 0
+
+        def cleaned_lines() -> Iterator[str]:
+            nonlocal header_size
+            for line in iter_clean_lines(iter_contract_chunks(file_path, self.fast_pdf)):
+                if header_size < HEADER_CHARS:
+                    header_lines.append(line)
+                    header_size += len(line) + 1
+                yield line
+
+        def overview() -> Dict:
+            header = "\n".join(header_lines)
+            return {
+                "event": "overview",
+                "type": classify_contract_type(header),
+                "language": detect_language_code(header)
+            }
+
+        overview_sent = False
+        clause_count, risk_count = 0, 0
+
+        for clause in iter_clauses(cleaned_lines()):
+            if not overview_sent and header_size >= HEADER_CHARS:
+                overview_sent = True
+                yield overview()
+
+            analyzed = self.analyze_clause(clause, rule_set)
+            clause_count += 1
+            risk_count += len(analyzed["risks"])
+            yield {"event": "clause", "clause": analyzed}
+
+        if not overview_sent:
+            yield overview()
+        yield {"event": "done", "clauses": clause_count, "risks": risk_count}
+
+    def _read_bytes(self, data: bytes, file_name: str) -> List[str]:
+        # The readers work on paths, so spill uploaded bytes to a temporary file
+        suffix = os.path.splitext(file_name)[1].lower()
+        if suffix not in (".pdf", ".docx"):
+            return [data.decode("utf-8")]
+        fd, temp_path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            return self.read_contract_pages(temp_path)
+        finally:
+            os.remove(temp_path)
+
+
+# Per-process analyzers, so pool workers load the rules only once
+_worker_analyzers: Dict[tuple, ContractAnalyzer] = {}
+
+
+def _get_worker_analyzer(rules_path: str, use_cache: bool, fast_pdf: bool, use_index: bool = False) -> ContractAnalyzer:
+    key = (rules_path, use_cache, fast_pdf, use_index)
+    if key not in _worker_analyzers:
+        _worker_analyzers[key] = ContractAnalyzer(
+            rules_path,
+            cache=ResultCache() if use_cache else None,
+            fast_pdf=fast_pdf,
+            index=ClauseIndex() if use_index else None
+        )
+    return _worker_analyzers[key]
+
+
+def analyze_contract(
+    file_path: str,
+    rules_path: str = DEFAULT_RULES_PATH,
+    use_cache: bool = True,
+    fast_pdf: bool = False,
+    use_index: bool = False
+) -> ContractAnalysis:
+    """
+    Analyzes a single contract file and returns the analysis result.
+    With use_index, the file is also added to the clause search index.
+    """
+    return _get_worker_analyzer(rules_path, use_cache, fast_pdf, use_index).analyze_file(file_path)
+
+
+def _analyze_to_json(
+    file_path: str, output_dir: str, rules_path: str, use_cache: bool, fast_pdf: bool, use_index: bool
+) -> str:
+    # Traces go to CARA_TRACE_FILE when it is set (see resources.tracing)
+    with start_trace("analyze_contract", file=file_path):
+        result = analyze_contract(file_path, rules_path, use_cache, fast_pdf, use_index)
+    output_path = os.path.join(output_dir, os.path.basename(file_path) + ".json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(result.to_dict(), f, ensure_ascii=False, indent=2)
+    return output_path
+
+
+def find_contracts(input_dir: str) -> List[str]:
+    """Lists supported contract files in a directory (non-recursive), sorted by name."""
+    return sorted(
+        os.path.join(input_dir, name)
+        for name in os.listdir(input_dir)
+        if name.lower().endswith(SUPPORTED_EXTENSIONS)
+    )
+
+
+def analyze_directory(
+    input_dir: str,
+    output_dir: str,
+    workers: Optional[int] = None,
+    rules_path: str = DEFAULT_RULES_PATH,
+    use_cache: bool = True,
+    fast_pdf: bool = False,
+    use_index: bool = False
+) -> Dict[str, str]:
+    """
+    Analyzes every contract in input_dir with a process pool and writes one
+    JSON result per file into output_dir. Files are already spread across
+    processes, so PDFs are read page-serially inside each worker.
+    With use_index, every file is also added to the clause search index.
+    Returns a dict of input file -> output path, or "ERROR: ..." on failure.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    files = find_contracts(input_dir)
+    outcomes = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_analyze_to_json, path, output_dir, rules_path, use_cache, fast_pdf, use_index): path
+            for path in files
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                outcomes[path] = future.result()
+            except Exception as e:
+                outcomes[path] = f"ERROR: {e}"
+
+    return outcomes
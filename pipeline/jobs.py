@@ -0,0 +1,175 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from pipeline.analyzer import ContractAnalyzer
+from pipeline.analysis import ContractAnalysis
+from resources.tracing import start_trace
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+DEFAULT_WORKERS = int(os.getenv("CARA_JOB_WORKERS", "4"))
+MAX_FINISHED_JOBS = 200 # finished jobs kept for lookup before the oldest are dropped
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation was requested."""
+
+
+class Job:
+    """
+    One background analysis. Status, stage, progress and the risks found so
+    far are updated by the worker thread and can be read at any time.
+    """
+
+    def __init__(self, file_name: str):
+        self.job_id = uuid.uuid4().hex
+        self.file_name = file_name
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = 0.0
+        self.partial_risks: List[Dict] = []
+        self.result: Optional[ContractAnalysis] = None
+        self.delta: Optional[Dict] = None # RevisionDelta.to_dict() for revision jobs
+        self.error: Optional[str] = None
+        self.trace = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.future: Optional[Future] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def cancel(self) -> bool:
+        """Requests cancellation. Returns False if the job already finished."""
+        if self.done:
+            return False
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            # Never started
+            self._finish(CANCELLED)
+        return True
+
+    def update(self, stage: str, fraction: float, new_risks: List[Dict]):
+        """Progress callback for ContractAnalyzer (see ProgressCallback)."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        with self._lock:
+            self.stage = stage
+            self.progress = fraction
+            self.partial_risks.extend(new_risks)
+
+    def _finish(self, status: str, error: Optional[str] = None):
+        with self._lock:
+            self.status = status
+            self.stage = status
+            self.error = error
+            if status == DONE:
+                self.progress = 1.0
+            self.finished = time.time()
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "file": self.file_name,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": round(self.progress, 3),
+                "risks_found": len(self.partial_risks),
+                "error": self.error,
+                "created": self.created,
+                "finished": self.finished
+            }
+
+
+class JobRunner:
+    """
+    Runs analyses on a shared thread pool, off the caller's thread.
+    Jobs are looked up by ID, so callers (Streamlit reruns, HTTP requests)
+    only need to keep the job ID.
+    """
+
+    def __init__(self, analyzer: ContractAnalyzer, max_workers: int = DEFAULT_WORKERS):
+        self.analyzer = analyzer
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cara-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        data: bytes,
+        file_name: str,
+        pages: Optional[List[str]] = None,
+        previous: Optional[ContractAnalysis] = None
+    ) -> Job:
+        """
+        Queues the analysis of an uploaded contract. With `previous`, the
+        file is analyzed as a revision of it (see ContractAnalyzer.analyze_revision).
+        """
+        job = Job(file_name)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        job.future = self.executor.submit(self._run, job, data, pages, previous)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        return job.cancel() if job is not None else False
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def pending(self) -> int:
+        """Number of queued or running jobs."""
+        return sum(1 for job in self.jobs() if not job.done)
+
+    def _run(self, job: Job, data: bytes, pages: Optional[List[str]], previous: Optional[ContractAnalysis]):
+        if job._cancel.is_set():
+            job._finish(CANCELLED)
+            return
+        with job._lock:
+            job.status = RUNNING
+            job.stage = "starting"
+        try:
+            with start_trace("analyze", file=job.file_name, job_id=job.job_id) as trace:
+                job.trace = trace
+                if previous is not None:
+                    result, delta = self.analyzer.analyze_revision_bytes(data, job.file_name, previous, pages, job.update)
+                    job.delta = delta.to_dict(previous, result)
+                else:
+                    result = self.analyzer.analyze_bytes(data, job.file_name, pages, job.update)
+            job.result = result
+            job._finish(DONE)
+        except JobCancelled:
+            job._finish(CANCELLED)
+        except Exception as e:
+            job._finish(FAILED, f"{type(e).__name__}: {e}")
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.done]
+        for job in sorted(finished, key=lambda job: job.finished)[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job.job_id]
+
+    def shutdown(self, cancel_pending: bool = True):
+        if cancel_pending:
+            for job in self.jobs():
+                job.cancel()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.getenv("CARA_CACHE_DIR", ".cara_cache"), "results.sqlite3")
+DEFAULT_MAX_BYTES = int(os.getenv("CARA_RESULT_CACHE_MB", "512")) * 1024 * 1024
+
+
+def hash_bytes(data: bytes) -> str:
+    """SHA-256 of a file's content, used as its cache identity."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent, content-addressed cache of analysis results (SQLite).
+    Entries are keyed by (file hash, pipeline version) and hold the extracted
+    text plus the full analysis result. The total stored size is bounded;
+    least recently used entries are evicted first.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    file_hash TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (file_hash, version)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_access ON results (last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps the cache safe across threads and processes
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_text(self, file_hash: str) -> Optional[str]:
+        """Extracted text for a file, from any pipeline version."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text FROM results WHERE file_hash = ? LIMIT 1", (file_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, file_hash: str, version: str) -> Optional[Dict]:
+        """Cached analysis result, or None on a miss."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM results WHERE file_hash = ? AND version = ?",
+                (file_hash, version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE results SET last_access = ? WHERE file_hash = ? AND version = ?",
+                (time.time(), file_hash, version)
+            )
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, file_hash: str, version: str, text: str, result: Dict):
+        """Stores an analysis result and evicts old entries beyond the size limit."""
+        payload = json.dumps(result, ensure_ascii=False)
+        size = len(payload.encode("utf-8")) + len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (file_hash, version, text, payload, size, time.time())
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT file_hash, version, size FROM results ORDER BY last_access").fetchall()
+        for file_hash, version, size in rows:
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM results WHERE file_hash = ? AND version = ?", (file_hash, version))
+            total -= size
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"entries": entries, "bytes": total, "hits": self.hits, "misses": self.misses}
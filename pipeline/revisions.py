@@ -0,0 +1,155 @@
+import hashlib
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from clause_extraction.document import Document
+from pipeline.analysis import ContractAnalysis, Risk
+
+# Minimum similarity for a changed clause to count as a revision of an old one
+SAME_HEADING_SIMILARITY = 0.5 # same clause_id or title
+ANY_CLAUSE_SIMILARITY = 0.8
+
+
+def clause_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _heading_key(document: Document, index: int) -> str:
+    return " ".join(document.titles[index].split()).lower()
+
+
+def _similarity(a: str, b: str, threshold: float) -> float:
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    # The cheap upper bounds rule out most pairs before the full ratio
+    if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+        return 0.0
+    return matcher.ratio()
+
+
+def align_documents(old: Document, new: Document) -> Tuple[List[Optional[int]], List[bool]]:
+    """
+    Aligns the clauses of a new version against the previous one.
+    Returns (matches, unchanged): matches[i] is the index of the old clause
+    new clause i corresponds to (None for an added clause), unchanged[i]
+    tells whether its text is identical.
+
+    Identical clauses are matched by text hash first. The rest are matched
+    fuzzily, preferring old clauses with the same clause_id or title.
+    """
+    matches: List[Optional[int]] = [None] * len(new)
+    unchanged = [False] * len(new)
+
+    old_by_hash: Dict[str, List[int]] = {}
+    for j in range(len(old)):
+        old_by_hash.setdefault(clause_hash(old.clause_text(j)), []).append(j)
+
+    used = set()
+    for i in range(len(new)):
+        candidates = old_by_hash.get(clause_hash(new.clause_text(i)))
+        if candidates:
+            # Prefer the candidate with the same clause_id when a text repeats
+            j = next((j for j in candidates if old.clause_ids[j] == new.clause_ids[i]), candidates[0])
+            candidates.remove(j)
+            matches[i] = j
+            unchanged[i] = True
+            used.add(j)
+
+    remaining = [j for j in range(len(old)) if j not in used]
+    for i in range(len(new)):
+        if matches[i] is not None or not remaining:
+            continue
+        new_text = new.clause_text(i)
+        title = _heading_key(new, i)
+
+        best, best_score = None, 0.0
+        for j in remaining:
+            same_heading = old.clause_ids[j] == new.clause_ids[i] or (title and _heading_key(old, j) == title)
+            threshold = SAME_HEADING_SIMILARITY if same_heading else ANY_CLAUSE_SIMILARITY
+            score = _similarity(old.clause_text(j), new_text, max(threshold, best_score))
+            if score >= threshold and score > best_score:
+                best, best_score = j, score
+        if best is not None:
+            matches[i] = best
+            remaining.remove(best)
+
+    return matches, unchanged
+
+
+class RevisionDelta:
+    """
+    Differences between two analyzed versions of a contract: which clauses
+    were kept, modified, added or removed, and which risks appeared or were
+    resolved.
+    """
+
+    __slots__ = ("unchanged", "modified", "added", "removed", "new_risks", "resolved_risks")
+
+    def __init__(self):
+        self.unchanged: List[Tuple[int, int]] = [] # (old index, new index)
+        self.modified: List[Tuple[int, int]] = []
+        self.added: List[int] = []
+        self.removed: List[int] = []
+        self.new_risks: List[Risk] = [] # risks of the new version
+        self.resolved_risks: List[Risk] = [] # risks of the previous version
+
+    def to_dict(self, previous: ContractAnalysis, current: ContractAnalysis) -> Dict:
+        old, new = previous.document, current.document
+        return {
+            "clauses": {
+                "unchanged": len(self.unchanged),
+                "modified": [
+                    {"previous_id": old.clause_ids[j], "id": new.clause_ids[i]}
+                    for j, i in self.modified
+                ],
+                "added": [new.clause_ids[i] for i in self.added],
+                "removed": [old.clause_ids[j] for j in self.removed]
+            },
+            "risks": {
+                "previous": len(previous.risks),
+                "current": len(current.risks),
+                "new": [risk.to_dict(new) for risk in self.new_risks],
+                "resolved": [risk.to_dict(old) for risk in self.resolved_risks]
+            }
+        }
+
+
+def compare_analyses(
+    previous: ContractAnalysis,
+    current: ContractAnalysis,
+    alignment: Optional[Tuple[List[Optional[int]], List[bool]]] = None
+) -> RevisionDelta:
+    """
+    Builds the RevisionDelta between two analyses. A risk counts as new when
+    its clause was added or did not carry the same risk_id before, and as
+    resolved when its clause was removed or no longer carries it.
+    """
+    matches, unchanged = alignment or align_documents(previous.document, current.document)
+    delta = RevisionDelta()
+
+    old_risks: Dict[int, List[Risk]] = {}
+    for risk in previous.risks:
+        old_risks.setdefault(risk.clause_index, []).append(risk)
+    new_risks: Dict[int, List[Risk]] = {}
+    for risk in current.risks:
+        new_risks.setdefault(risk.clause_index, []).append(risk)
+
+    matched_old = set()
+    for i, j in enumerate(matches):
+        if j is None:
+            delta.added.append(i)
+            delta.new_risks.extend(new_risks.get(i, []))
+            continue
+
+        matched_old.add(j)
+        (delta.unchanged if unchanged[i] else delta.modified).append((j, i))
+        before = {risk.risk_id for risk in old_risks.get(j, [])}
+        after = {risk.risk_id for risk in new_risks.get(i, [])}
+        delta.new_risks.extend(risk for risk in new_risks.get(i, []) if risk.risk_id not in before)
+        delta.resolved_risks.extend(risk for risk in old_risks.get(j, []) if risk.risk_id not in after)
+
+    for j in range(len(previous.document)):
+        if j not in matched_old:
+            delta.removed.append(j)
+            delta.resolved_risks.extend(old_risks.get(j, []))
+
+    return delta
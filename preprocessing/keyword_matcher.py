@@ -0,0 +1,131 @@
+import re
+from functools import lru_cache
+from typing import List, Dict, Tuple, Set, Optional
+
+# namespace -> group -> keywords, e.g. {"clause": {"Termination": ["terminate", ...]}}
+KeywordGroups = Dict[str, Dict[str, List[str]]]
+
+
+class KeywordHits:
+    """
+    Result of scanning one text: every keyword occurrence with its offsets
+    into the lower-cased text.
+    """
+
+    def __init__(self, text_lower: str, hits: List[Tuple[int, int, str]], owners: Dict[str, List[Tuple[str, str]]],
+                 group_index: Dict[Tuple[str, str], int]):
+        self.text_lower = text_lower
+        self.hits = hits  # (start, end, keyword), ordered by start
+        self._owners = owners
+        self._group_index = group_index
+        self.found: Set[str] = {kw for _, _, kw in hits}
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self.found
+
+    def group_counts(self, namespace: str) -> Dict[str, int]:
+        """
+        Number of distinct keywords found per group of a namespace, in the
+        order the groups were declared (callers break ties by that order).
+        """
+        counts = {}
+        for kw in self.found:
+            for ns, group in self._owners.get(kw, ()):
+                if ns == namespace:
+                    counts[group] = counts.get(group, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: self._group_index[namespace, item[0]]))
+
+    def occurrences(self, namespace: str) -> List[Tuple[int, int, str, str]]:
+        """All hits of a namespace as (start, end, keyword, group)."""
+        result = []
+        for start, end, kw in self.hits:
+            for ns, group in self._owners.get(kw, ()):
+                if ns == namespace:
+                    result.append((start, end, kw, group))
+        return result
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern keyword matcher.
+    All keywords are compiled into a single alternation regex wrapped in a
+    lookahead, so one linear pass reports every (possibly overlapping) hit.
+    """
+
+    def __init__(self, groups: KeywordGroups):
+        self._owners: Dict[str, List[Tuple[str, str]]] = {}
+        self._group_index: Dict[Tuple[str, str], int] = {}
+        for namespace, mapping in groups.items():
+            for group, keywords in mapping.items():
+                self._group_index.setdefault((namespace, group), len(self._group_index))
+                for kw in keywords:
+                    owners = self._owners.setdefault(kw.lower(), [])
+                    if (namespace, group) not in owners:
+                        owners.append((namespace, group))
+
+        # Longest first, so the regex reports the longest keyword at each position;
+        # shorter keywords that are prefixes of it are added from _prefixes.
+        patterns = sorted(self._owners, key=len, reverse=True)
+        self._prefixes = {
+            kw: [p for p in patterns if p != kw and kw.startswith(p)]
+            for kw in patterns
+        }
+        self._regex = None
+        if patterns:
+            self._regex = re.compile("(?=(" + "|".join(re.escape(p) for p in patterns) + "))")
+
+    @property
+    def keywords(self) -> List[str]:
+        return list(self._owners)
+
+    def find_all(self, text_lower: str) -> List[Tuple[int, int, str]]:
+        """Returns (start, end, keyword) for every keyword occurrence in already lower-cased text."""
+        if self._regex is None:
+            return []
+        hits = []
+        for match in self._regex.finditer(text_lower):
+            start = match.start()
+            kw = match.group(1)
+            hits.append((start, start + len(kw), kw))
+            for prefix in self._prefixes[kw]:
+                hits.append((start, start + len(prefix), prefix))
+        return hits
+
+    def scan(self, text: str) -> KeywordHits:
+        """Lower-cases the text once and returns all keyword hits."""
+        text_lower = text.lower()
+        return KeywordHits(text_lower, self.find_all(text_lower), self._owners, self._group_index)
+
+
+def _freeze_groups(groups: KeywordGroups) -> Tuple:
+    return tuple(
+        (namespace, group, tuple(keywords))
+        for namespace, mapping in sorted(groups.items())
+        for group, keywords in mapping.items()
+    )
+
+
+@lru_cache(maxsize=8)
+def _build_shared_matcher(frozen_extra: Tuple) -> KeywordMatcher:
+    # Imported here to avoid circular imports: the classifiers use this module
+    from clause_classifier.rule_based import CLAUSE_KEYWORDS
+    from contract_classifier.classify_contract_type import CONTRACT_KEYWORDS
+    from intent_detection.intent_rules import INTENT_MAPPING
+
+    groups: KeywordGroups = {
+        "clause": dict(CLAUSE_KEYWORDS),
+        "contract": dict(CONTRACT_KEYWORDS),
+        "intent": dict(INTENT_MAPPING),
+    }
+    for namespace, group, keywords in frozen_extra:
+        groups.setdefault(namespace, {})[group] = list(keywords)
+    return KeywordMatcher(groups)
+
+
+def get_shared_matcher(extra_groups: Optional[KeywordGroups] = None) -> KeywordMatcher:
+    """
+    Returns the matcher shared by all rule-based classifiers, built once from
+    CLAUSE_KEYWORDS, CONTRACT_KEYWORDS, INTENT_MAPPING and any extra groups
+    (e.g. the risk rules).
+    """
+    return _build_shared_matcher(_freeze_groups(extra_groups or {}))
@@ -1,4 +1,5 @@
 import re
+from typing import Iterable, Iterator, List, Tuple
 
 def clean_text(text: str) -> str:
     """
@@ -21,3 +22,87 @@ def clean_text(text: str) -> str:
     text = re.sub(r'[ \t]+', ' ', text)
     
     return text.strip()
+
+PAGE_NUMBER_LINE = re.compile(r'\s*Page \d+ of \d+\s*', re.IGNORECASE)
+QUOTES_TABLE = str.maketrans({'“': '"', '”': '"', '‘': "'", '’': "'"})
+
+def _iter_raw_lines(chunks: Iterable[str]) -> Iterator[tuple]:
+    """Yields (line, is_first, is_last, chunk_index) over the lines of newline-joined chunks."""
+    held = None
+    held_chunk = 0
+    is_first = True
+    for chunk_index, chunk in enumerate(chunks):
+        for line in chunk.split('\n'):
+            if held is not None:
+                yield held, is_first, False, held_chunk
+                is_first = False
+            held, held_chunk = line, chunk_index
+    if held is not None:
+        yield held, is_first, True, held_chunk
+
+def _clean_lines(chunks: Iterable[str]) -> Iterator[Tuple[str, int]]:
+    """Yields (cleaned line, index of the chunk it came from); see iter_clean_lines."""
+    pending_blank = False
+    after_page_number = False
+    previous = None  # last content line, held back so it can be right-stripped at the end
+    previous_chunk = 0
+
+    for line, is_first, is_last, chunk_index in _iter_raw_lines(chunks):
+        if not line.strip():
+            pending_blank = previous is not None and not after_page_number
+            continue
+        if not is_first and not is_last and PAGE_NUMBER_LINE.fullmatch(line):
+            pending_blank = False
+            after_page_number = True
+            continue
+        after_page_number = False
+
+        line = re.sub(r'[ \t]+', ' ', line.translate(QUOTES_TABLE))
+
+        if previous is None:
+            line = line.lstrip()
+        else:
+            yield previous, previous_chunk
+            if pending_blank:
+                yield '', chunk_index
+        previous, previous_chunk = line, chunk_index
+        pending_blank = False
+
+    if previous is not None:
+        yield previous.rstrip(), previous_chunk
+
+def iter_clean_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Incremental version of clean_text for streamed documents.
+    `chunks` are pages or paragraphs (joined with newlines, as the readers do);
+    yields cleaned lines one by one, holding at most one chunk in memory:
+    - quotes are normalized, runs of spaces/tabs compressed
+    - "Page X of Y" lines between other lines are dropped with the blank lines around them
+    - runs of blank lines collapse into a single empty line
+    - leading/trailing blank lines and outer whitespace are stripped
+    """
+    for line, _ in _clean_lines(chunks):
+        yield line
+
+def clean_pages(pages: List[str]) -> Tuple[str, List[int]]:
+    """
+    Cleans a paged document (see iter_clean_lines).
+    Returns (clean_text, page_offsets) where page_offsets[i] is the offset in
+    clean_text at which page i starts.
+    """
+    lines = []
+    page_offsets = [-1] * len(pages)
+    offset = 0
+    for line, chunk_index in _clean_lines(pages):
+        if page_offsets[chunk_index] == -1:
+            page_offsets[chunk_index] = offset
+        lines.append(line)
+        offset += len(line) + 1
+
+    # Pages without any text start where the next page does
+    next_offset = max(offset - 1, 0)
+    for i in range(len(pages) - 1, -1, -1):
+        if page_offsets[i] == -1:
+            page_offsets[i] = next_offset
+        next_offset = page_offsets[i]
+    return "\n".join(lines), page_offsets
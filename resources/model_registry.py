@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class ResourceRegistry:
+    """
+    Central registry of heavy resources (NLP models, SDK clients).
+    Nothing is imported or loaded until a resource is first requested; each
+    resource is loaded once per process, and its load time is recorded.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._resources: Dict[str, Any] = {}
+        self._load_times: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        self._loaders[name] = loader
+
+    @property
+    def names(self):
+        return list(self._loaders)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._resources
+
+    def get(self, name: str) -> Optional[Any]:
+        """
+        Returns the resource, loading it on first use.
+        Returns None (and remembers the error) if loading failed.
+        """
+        if name in self._resources:
+            return self._resources[name]
+
+        with self._lock:
+            if name not in self._resources:
+                start = time.perf_counter()
+                try:
+                    self._resources[name] = self._loaders[name]()
+                except Exception as e:
+                    print(f"Warning: Failed to load {name}: {e}")
+                    self._errors[name] = str(e)
+                    self._resources[name] = None
+                self._load_times[name] = time.perf_counter() - start
+        return self._resources[name]
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Loads the given resources (default: all) up front. Returns their load times."""
+        for name in names or self.names:
+            self.get(name)
+        return self.load_times()
+
+    def load_times(self) -> Dict[str, float]:
+        """Seconds spent loading each resource that has been requested so far."""
+        return dict(self._load_times)
+
+    def errors(self) -> Dict[str, str]:
+        return dict(self._errors)
+
+
+_env_loaded = False
+
+
+def load_env():
+    """Loads .env once (python-dotenv is only imported when needed)."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def _load_spacy():
+    import spacy
+    return spacy.load("en_core_web_sm")
+
+
+def _load_embedding_model():
+    # CARA_EMBEDDING_BACKEND / CARA_EMBEDDING_THREADS select the CPU inference path
+    from clause_classifier.embedding_based import load_embedding_model
+    return load_embedding_model()
+
+
+def _load_groq_client():
+    load_env()
+    from groq import Groq
+    # GROQ_BASE_URL can point the client at another endpoint
+    return Groq(api_key=os.getenv("GROQ_API"))
+
+
+registry = ResourceRegistry()
+registry.register("spacy", _load_spacy)
+registry.register("embedding", _load_embedding_model)
+registry.register("groq", _load_groq_client)
+
+
+def get_resource(name: str) -> Optional[Any]:
+    return registry.get(name)
+
+
+def warm_up_from_env() -> Dict[str, float]:
+    """
+    Warms up the resources listed in CARA_WARMUP ("all" or a comma separated
+    list such as "spacy,embedding"). Nothing is loaded if it is unset.
+    """
+    setting = os.getenv("CARA_WARMUP", "").strip()
+    if not setting:
+        return {}
+    names = None if setting == "all" else [name.strip() for name in setting.split(",") if name.strip()]
+    return registry.warm_up(names)
@@ -0,0 +1,303 @@
+import os
+import io
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+class Span:
+    """One timed pipeline stage or request."""
+
+    __slots__ = ("span_id", "name", "parent", "start", "duration", "attrs")
+
+    def __init__(self, span_id: int, name: str, parent: Optional[int], start: float, attrs: Dict):
+        self.span_id = span_id
+        self.name = name
+        self.parent = parent
+        self.start = start
+        self.duration = 0.0
+        self.attrs = attrs
+
+    def to_dict(self) -> Dict:
+        return {
+            "span_id": self.span_id,
+            "name": self.name,
+            "parent": self.parent,
+            "start": self.start,
+            "duration": self.duration,
+            "attrs": self.attrs
+        }
+
+
+class Trace:
+    """
+    Spans and counters collected while processing one unit of work (a
+    contract, an explanation batch). Start one with start_trace(); the
+    module-level span()/count() helpers record into the active trace.
+    """
+
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started = time.time()
+        self.origin = time.perf_counter()
+        self.duration = 0.0
+        self.spans: List[Span] = []
+        self.counters: Dict[str, float] = {}
+        self.profile: Optional[str] = None
+        self.memory: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def _new_span(self, name: str, parent: Optional[int], attrs: Dict) -> Span:
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        return Span(span_id, name, parent, time.perf_counter() - self.origin, attrs)
+
+    def _finish_span(self, span: Span):
+        span.duration = time.perf_counter() - self.origin - span.start
+        with self._lock:
+            self.spans.append(span)
+
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per stage: number of spans, total and max seconds."""
+        stages: Dict[str, Dict] = {}
+        for span in self.spans:
+            stats = stages.setdefault(span.name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            stats["count"] += 1
+            stats["total_s"] += span.duration
+            stats["max_s"] = max(stats["max_s"], span.duration)
+        return stages
+
+    def to_dict(self) -> Dict:
+        data = {
+            "trace": self.name,
+            "attrs": self.attrs,
+            "started": self.started,
+            "duration": self.duration,
+            "stages": self.summary(),
+            "counters": dict(self.counters)
+        }
+        if self.profile:
+            data["profile"] = self.profile
+        if self.memory:
+            data["memory"] = self.memory
+        return data
+
+    def iter_json_lines(self) -> Iterator[str]:
+        """One JSON line per span, followed by one line with the counters and totals."""
+        for span in sorted(self.spans, key=lambda span: span.start):
+            yield json.dumps({"trace": self.name, "type": "span", **span.to_dict()}, ensure_ascii=False, default=str)
+        yield json.dumps({"type": "summary", **self.to_dict()}, ensure_ascii=False, default=str)
+
+    def to_prometheus(self) -> str:
+        return prometheus_text(self.summary(), self.counters)
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("cara_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("cara_span", default=None)
+
+
+class _SpanContext:
+    __slots__ = ("trace", "span", "token")
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict):
+        self.trace = trace
+        self.span = trace._new_span(name, _current_span.get(), attrs)
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span.span_id)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self.token)
+        if exc_type is not None:
+            self.span.attrs["error"] = exc_type.__name__
+        self.trace._finish_span(self.span)
+        return False
+
+
+class _NullSpan:
+    """Returned by span() when no trace is active, so disabled tracing costs one lookup."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def span(name: str, **attrs):
+    """
+    Context manager timing a stage of the active trace:
+
+        with span("clean_text", chars=len(text)):
+            ...
+
+    Does nothing when no trace is active.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _SpanContext(trace, name, attrs)
+
+
+def count(name: str, value: float = 1):
+    """Adds to a counter of the active trace (no-op without one)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.count(name, value)
+
+
+def profile_modes() -> List[str]:
+    """Profilers enabled by CARA_PROFILE ("cpu", "memory" or "cpu,memory")."""
+    return [mode.strip() for mode in os.getenv("CARA_PROFILE", "").split(",") if mode.strip()]
+
+
+# cProfile and tracemalloc are process-wide, so only one trace is profiled at a
+# time; traces started while it runs are recorded without profiles
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def start_trace(name: str, **attrs) -> Iterator[Trace]:
+    """
+    Activates a new Trace for the enclosed block (nested calls of span()
+    and count() record into it). With CARA_PROFILE set, the block also runs
+    under cProfile ("cpu") and/or tracemalloc ("memory"), unless another
+    trace is being profiled at the time.
+    Finished traces are added to the process-wide totals (see metrics()).
+    """
+    trace = Trace(name, **attrs)
+    modes = profile_modes()
+    profiling = bool(modes) and _profile_lock.acquire(blocking=False)
+
+    profiler = None
+    tracing_memory = False
+    try:
+        if profiling and "cpu" in modes:
+            import cProfile
+            profiler = cProfile.Profile()
+        if profiling and "memory" in modes:
+            import tracemalloc
+            tracing_memory = not tracemalloc.is_tracing()
+            if tracing_memory:
+                tracemalloc.start()
+
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(None)
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield trace
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                trace.profile = _format_profile(profiler)
+            if tracing_memory:
+                trace.memory = _memory_snapshot()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            trace.duration = time.perf_counter() - trace.origin
+            _totals.add(trace)
+            _write_trace_file(trace)
+    finally:
+        if profiling:
+            _profile_lock.release()
+
+
+def _format_profile(profiler, limit: int = 30) -> str:
+    import pstats
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def _memory_snapshot(limit: int = 10) -> Dict:
+    import tracemalloc
+    current, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics("lineno")[:limit]
+    tracemalloc.stop()
+    return {
+        "current_mb": current / (1024 * 1024),
+        "peak_mb": peak / (1024 * 1024),
+        "top": [str(stat) for stat in top]
+    }
+
+
+_write_lock = threading.Lock()
+
+
+def _write_trace_file(trace: Trace):
+    # CARA_TRACE_FILE appends every finished trace as JSON lines
+    path = os.getenv("CARA_TRACE_FILE")
+    if not path:
+        return
+    payload = "".join(line + "\n" for line in trace.iter_json_lines())
+    with _write_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(payload)
+
+
+class _Totals:
+    """Process-wide totals of all finished traces, for Prometheus export."""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            for name, stats in trace.summary().items():
+                totals = self.stages.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+                totals["count"] += stats["count"]
+                totals["total_s"] += stats["total_s"]
+                totals["max_s"] = max(totals["max_s"], stats["max_s"])
+            for name, value in trace.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+
+_totals = _Totals()
+
+
+def metrics() -> str:
+    """Totals of every trace finished in this process, in Prometheus text format."""
+    with _totals._lock:
+        return prometheus_text(_totals.stages, _totals.counters)
+
+
+def prometheus_text(stages: Dict[str, Dict], counters: Dict[str, float]) -> str:
+    lines = [
+        "# HELP cara_stage_seconds_total Time spent in each pipeline stage.",
+        "# TYPE cara_stage_seconds_total counter"
+    ]
+    lines += [f'cara_stage_seconds_total{{stage="{name}"}} {stats["total_s"]:.6f}' for name, stats in sorted(stages.items())]
+    lines += [
+        "# HELP cara_stage_calls_total Number of times each pipeline stage ran.",
+        "# TYPE cara_stage_calls_total counter"
+    ]
+    lines += [f'cara_stage_calls_total{{stage="{name}"}} {stats["count"]}' for name, stats in sorted(stages.items())]
+    lines += [
+        "# HELP cara_events_total Pipeline counters (clauses, rules evaluated, cache hits, ...).",
+        "# TYPE cara_events_total counter"
+    ]
+    lines += [f'cara_events_total{{name="{name}"}} {value:g}' for name, value in sorted(counters.items())]
+    return "\n".join(lines) + "\n"
@@ -1,45 +1,51 @@
-import yaml
-import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-def load_risk_rules(rules_path: str) -> Dict:
-    """Loads the YAML risk rules."""
-    if not os.path.exists(rules_path):
-        return {}
-    with open(rules_path, 'r') as f:
-        return yaml.safe_load(f)
+from preprocessing.keyword_matcher import KeywordHits
+# load_risk_rules lives in rule_set; imported here too for existing callers
+from risk_engine.rule_set import RuleSet, get_risk_matcher, load_risk_rules
 
-def evaluate_risk(clause_text: str, category: str, rules_db: Dict) -> List[Dict]:
+def evaluate_risk(clause_text: str, category: str, rules_db: Dict, hits: Optional[KeywordHits] = None) -> List[Dict]:
     """
     Evaluates a clause text against rules for a specific category.
+    `rules_db` is either the raw YAML dict or a compiled RuleSet (preferred,
+    see risk_engine/rule_set.py). `hits` must come from the matching matcher
+    when passed in.
     Returns details of any risks found.
     """
+    if isinstance(rules_db, RuleSet):
+        return rules_db.evaluate(clause_text, category, hits)
+
     risks = []
     category_rules = rules_db.get(category, [])
-    
-    text_lower = clause_text.lower()
+    if not category_rules:
+        return risks
+
+    if hits is None:
+        hits = get_risk_matcher(rules_db).scan(clause_text)
+    found = hits.found
     
     for rule in category_rules:
         risk_found = False
+        keyword = str(rule['keyword']).lower() if 'keyword' in rule else None
         
         # Keyword check
-        if 'keyword' in rule and rule['keyword'] in text_lower:
+        if keyword is not None and keyword in found:
             risk_found = True
             
         # Negative keyword check (Risk if keyword IS PRESENT but negative_keyword IS NOT)
         # Example: "laws of" (Risk) but "India" (Safe) -> Risk if "laws of" in text AND "India" NOT in text.
         if 'negative_keyword' in rule:
-            if rule['keyword'] in text_lower and rule['negative_keyword'] not in text_lower:
+            if keyword in found and str(rule['negative_keyword']).lower() not in found:
                 risk_found = True
             else:
                 risk_found = False # Reset if safety word is present
                 
         # Condition check (Mock logic for specific complex conditions)
         if 'condition' in rule:
-            if rule['condition'] == 'no_cap' and ('cap' not in text_lower and 'limit' not in text_lower):
+            if rule['condition'] == 'no_cap' and ('cap' not in found and 'limit' not in found):
                  # Weak heuristic: if Indemnity clause doesn't mention 'cap' or 'limit', flag it.
                  risk_found = True
-            elif rule['condition'] == 'unilateral' and ('without cause' in text_lower or 'at its sole discretion' in text_lower):
+            elif rule['condition'] == 'unilateral' and ('without cause' in found or 'at its sole discretion' in found):
                  risk_found = True
 
         if risk_found:
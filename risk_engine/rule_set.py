@@ -0,0 +1,177 @@
+import os
+import hashlib
+import json
+from typing import List, Dict, Tuple, Optional, Callable, Set
+
+import yaml
+
+from preprocessing.keyword_matcher import KeywordGroups, KeywordHits, KeywordMatcher, get_shared_matcher
+
+# Phrases checked by the special rule conditions
+CONDITION_KEYWORDS = {
+    "no_cap": ["cap", "limit"],
+    "unilateral": ["without cause", "at its sole discretion"],
+}
+
+# Prebuilt predicates for rule conditions. Each receives the set of keywords found in the clause.
+CONDITIONS: Dict[str, Callable[[Set[str]], bool]] = {
+    # Weak heuristic: if Indemnity clause doesn't mention 'cap' or 'limit', flag it.
+    "no_cap": lambda found: "cap" not in found and "limit" not in found,
+    "unilateral": lambda found: "without cause" in found or "at its sole discretion" in found,
+}
+
+REQUIRED_FIELDS = ("id", "severity", "reason")
+
+
+def load_risk_rules(rules_path: str) -> Dict:
+    """Loads the YAML risk rules."""
+    if not os.path.exists(rules_path):
+        return {}
+    with open(rules_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def risk_keyword_groups(rules_db: Dict) -> KeywordGroups:
+    """
+    Collects every phrase the risk rules look for, for the shared keyword matcher.
+    Returns {"risk": {category: [keywords]}, "risk_condition": CONDITION_KEYWORDS}.
+    """
+    groups = {}
+    for category, rules in (rules_db or {}).items():
+        keywords = []
+        for rule in rules or []:
+            for field in ('keyword', 'negative_keyword'):
+                if field in rule:
+                    keywords.append(str(rule[field]).lower())
+        groups[category] = keywords
+    return {"risk": groups, "risk_condition": CONDITION_KEYWORDS}
+
+
+def get_risk_matcher(rules_db: Dict) -> KeywordMatcher:
+    """Shared matcher that also knows the phrases used by the given risk rules."""
+    return get_shared_matcher(risk_keyword_groups(rules_db))
+
+
+class CompiledRule:
+    """A validated risk rule with lower-cased keywords and a prebuilt condition predicate."""
+
+    __slots__ = ("id", "severity", "reason", "keyword", "negative_keyword", "condition")
+
+    def __init__(self, rule: Dict, category: str):
+        missing = [field for field in REQUIRED_FIELDS if field not in rule]
+        if missing:
+            raise ValueError(f"Risk rule in '{category}' is missing {', '.join(missing)}: {rule}")
+
+        self.id = rule["id"]
+        self.severity = rule["severity"]
+        self.reason = rule["reason"]
+        self.keyword = str(rule["keyword"]).lower() if "keyword" in rule else None
+        self.negative_keyword = str(rule["negative_keyword"]).lower() if "negative_keyword" in rule else None
+        self.condition = None
+
+        if "condition" in rule:
+            if rule["condition"] not in CONDITIONS:
+                raise ValueError(f"Unknown condition '{rule['condition']}' in risk rule {self.id}")
+            self.condition = CONDITIONS[rule["condition"]]
+
+        if self.keyword is None and self.condition is None:
+            raise ValueError(f"Risk rule {self.id} needs a keyword or a condition")
+
+    def matches(self, found: Set[str]) -> bool:
+        """True if the rule fires for a clause with the given keyword hits."""
+        if self.negative_keyword is not None:
+            # Risk if keyword IS PRESENT but negative_keyword IS NOT
+            if self.keyword in found and self.negative_keyword not in found:
+                return True
+        elif self.keyword is not None and self.keyword in found:
+            return True
+        return self.condition is not None and self.condition(found)
+
+
+class RuleSet:
+    """
+    Risk rules compiled once: validated, lower-cased and indexed by category.
+    """
+
+    def __init__(self, rules_db: Optional[Dict]):
+        rules_db = rules_db or {}
+        self.by_category: Dict[str, List[CompiledRule]] = {
+            category: [CompiledRule(rule, category) for rule in (rules or [])]
+            for category, rules in rules_db.items()
+        }
+        self.fingerprint = hashlib.sha256(
+            json.dumps(rules_db, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        self._rules_db = rules_db
+        self._matcher = None
+
+    def __len__(self) -> int:
+        return sum(len(rules) for rules in self.by_category.values())
+
+    @property
+    def matcher(self) -> KeywordMatcher:
+        """Shared matcher covering the classifier keywords plus this rule set."""
+        if self._matcher is None:
+            self._matcher = get_risk_matcher(self._rules_db)
+        return self._matcher
+
+    def matching_rules(self, clause_text: str, category: str, hits: Optional[KeywordHits] = None) -> List[CompiledRule]:
+        """The rules of `category` that fire for the clause."""
+        rules = self.by_category.get(category)
+        if not rules:
+            return []
+        if hits is None:
+            hits = self.matcher.scan(clause_text)
+        return [rule for rule in rules if rule.matches(hits.found)]
+
+    def evaluate(self, clause_text: str, category: str, hits: Optional[KeywordHits] = None) -> List[Dict]:
+        """
+        Evaluates one clause against the rules of its category.
+        `hits` must come from self.matcher when passed in.
+        """
+        return [
+            {
+                "risk_id": rule.id,
+                "severity": rule.severity,
+                "reason": rule.reason,
+                "clause_text": clause_text[:100] + "..." # Snippet
+            }
+            for rule in self.matching_rules(clause_text, category, hits)
+        ]
+
+    def evaluate_batch(
+        self,
+        clauses: List[Tuple[str, str]],
+        hits_list: Optional[List[Optional[KeywordHits]]] = None
+    ) -> List[List[Dict]]:
+        """
+        Evaluates a batch of (clause_text, category) pairs.
+        Returns one list of risks per clause, in input order.
+        """
+        if hits_list is None:
+            hits_list = [None] * len(clauses)
+        return [
+            self.evaluate(text, category, hits)
+            for (text, category), hits in zip(clauses, hits_list)
+        ]
+
+
+# absolute path -> (mtime, RuleSet) of the last load of that file
+_rule_set_cache: Dict[str, Tuple[float, RuleSet]] = {}
+
+
+def load_rule_set(rules_path: str) -> RuleSet:
+    """
+    Loads and compiles the YAML risk rules.
+    Cached per file; the file is only re-read when its mtime changes.
+    """
+    path = os.path.abspath(rules_path)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else -1.0
+
+    cached = _rule_set_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    rule_set = RuleSet(load_risk_rules(path))
+    _rule_set_cache[path] = (mtime, rule_set)
+    return rule_set
@@ -0,0 +1,384 @@
+import os
+import re
+import time
+import shlex
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+from pipeline.analysis import ContractAnalysis
+from ner.entity_extractor import get_nlp, extract_entities
+
+DEFAULT_INDEX_PATH = os.path.join(os.getenv("CARA_CACHE_DIR", ".cara_cache"), "clause_index.sqlite3")
+DEFAULT_LIMIT = 50
+SNIPPET_CHARS = 300
+PARTY_HEADER_CHARS = 3000 # parties are named in the preamble
+
+# Query syntax fields (see parse_query) -> search() arguments
+QUERY_FIELDS = {
+    "label": "labels",
+    "risk": "risk_ids",
+    "severity": "severities",
+    "type": "contract_types",
+    "party": "parties",
+    "status": "statuses",
+    "lang": "languages",
+}
+
+TOKEN = re.compile(r"\w+")
+
+
+def normalize_party(name: str) -> str:
+    return " ".join(name.split()).lower()
+
+
+def contract_parties(analysis: ContractAnalysis) -> List[str]:
+    """Parties (ORG/PERSON entities) named at the start of the contract; empty without spaCy."""
+    if not get_nlp():
+        return []
+    return extract_entities(analysis.text[:PARTY_HEADER_CHARS]).get("PARTIES", [])
+
+
+class ClauseIndex:
+    """
+    Persistent search index over analyzed clauses (SQLite).
+    Clause text goes into an FTS5 inverted index; labels, risks, severities,
+    contract types, parties and contract status are indexed columns, so
+    queries never re-read or re-analyze documents. Contracts are keyed by
+    file hash, and re-indexing a file replaces its previous entry.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS contracts (
+                    contract_id INTEGER PRIMARY KEY,
+                    file_hash TEXT NOT NULL UNIQUE,
+                    version TEXT NOT NULL,
+                    file TEXT NOT NULL,
+                    contract_type TEXT NOT NULL,
+                    language TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'active',
+                    indexed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_contracts_type ON contracts (contract_type);
+                CREATE INDEX IF NOT EXISTS idx_contracts_status ON contracts (status);
+
+                CREATE TABLE IF NOT EXISTS clauses (
+                    clause_id INTEGER PRIMARY KEY,
+                    contract_id INTEGER NOT NULL,
+                    clause_index INTEGER NOT NULL,
+                    clause_ref TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    label TEXT NOT NULL,
+                    page INTEGER,
+                    text TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_clauses_contract ON clauses (contract_id);
+                CREATE INDEX IF NOT EXISTS idx_clauses_label ON clauses (label);
+
+                CREATE TABLE IF NOT EXISTS clause_risks (
+                    clause_id INTEGER NOT NULL,
+                    risk_id TEXT NOT NULL,
+                    severity TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_risks_id ON clause_risks (risk_id, clause_id);
+                CREATE INDEX IF NOT EXISTS idx_risks_severity ON clause_risks (severity, clause_id);
+                CREATE INDEX IF NOT EXISTS idx_risks_clause ON clause_risks (clause_id);
+
+                CREATE TABLE IF NOT EXISTS contract_parties (
+                    contract_id INTEGER NOT NULL,
+                    party TEXT NOT NULL,
+                    display TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_parties ON contract_parties (party, contract_id);
+                CREATE INDEX IF NOT EXISTS idx_parties_contract ON contract_parties (contract_id);
+
+                CREATE VIRTUAL TABLE IF NOT EXISTS clause_text USING fts5 (
+                    text, content='clauses', content_rowid='clause_id'
+                );
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps the index safe across threads and processes
+        return sqlite3.connect(self.path, timeout=30)
+
+    def is_indexed(self, file_hash: str, version: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM contracts WHERE file_hash = ? AND version = ?", (file_hash, version)
+            ).fetchone()
+        return row is not None
+
+    def add(
+        self,
+        analysis: ContractAnalysis,
+        file_hash: str,
+        parties: Iterable[str] = (),
+        status: Optional[str] = None
+    ):
+        """
+        Indexes (or re-indexes) an analyzed contract. Without `status`, a
+        re-indexed contract keeps its previous status ("active" for new ones).
+        """
+        document = analysis.document
+        risks_by_clause: Dict[int, List] = {}
+        for risk in analysis.risks:
+            risks_by_clause.setdefault(risk.clause_index, []).append(risk)
+
+        with self._connect() as conn:
+            if status is None:
+                row = conn.execute("SELECT status FROM contracts WHERE file_hash = ?", (file_hash,)).fetchone()
+                status = row[0] if row else "active"
+            self._delete(conn, file_hash)
+            contract_id = conn.execute(
+                "INSERT INTO contracts (file_hash, version, file, contract_type, language, status, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (file_hash, analysis.version, analysis.file, analysis.contract_type["contract_type"],
+                 analysis.language, status, time.time())
+            ).lastrowid
+
+            for i in range(len(document)):
+                clause_text = document.clause_text(i)
+                clause_id = conn.execute(
+                    "INSERT INTO clauses (contract_id, clause_index, clause_ref, title, label, page, text) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (contract_id, i, document.clause_ids[i], document.titles[i], document.labels[i],
+                     document.page_for_offset(document.starts[i]), clause_text)
+                ).lastrowid
+                conn.execute("INSERT INTO clause_text (rowid, text) VALUES (?, ?)", (clause_id, clause_text))
+                conn.executemany(
+                    "INSERT INTO clause_risks VALUES (?, ?, ?)",
+                    [(clause_id, risk.risk_id, risk.severity) for risk in risks_by_clause.get(i, [])]
+                )
+
+            unique_parties = {normalize_party(party): party for party in parties if party.strip()}
+            conn.executemany(
+                "INSERT INTO contract_parties VALUES (?, ?, ?)",
+                [(contract_id, party, display) for party, display in unique_parties.items()]
+            )
+
+    def _delete(self, conn: sqlite3.Connection, file_hash: str):
+        row = conn.execute("SELECT contract_id FROM contracts WHERE file_hash = ?", (file_hash,)).fetchone()
+        if row is None:
+            return
+        contract_id = row[0]
+        for clause_id, text in conn.execute(
+            "SELECT clause_id, text FROM clauses WHERE contract_id = ?", (contract_id,)
+        ).fetchall():
+            # External-content FTS tables are cleaned up with the special 'delete' command
+            conn.execute("INSERT INTO clause_text (clause_text, rowid, text) VALUES ('delete', ?, ?)", (clause_id, text))
+        conn.execute(
+            "DELETE FROM clause_risks WHERE clause_id IN (SELECT clause_id FROM clauses WHERE contract_id = ?)",
+            (contract_id,)
+        )
+        conn.execute("DELETE FROM clauses WHERE contract_id = ?", (contract_id,))
+        conn.execute("DELETE FROM contract_parties WHERE contract_id = ?", (contract_id,))
+        conn.execute("DELETE FROM contracts WHERE contract_id = ?", (contract_id,))
+
+    def remove(self, file_hash: str):
+        with self._connect() as conn:
+            self._delete(conn, file_hash)
+
+    def contracts(self) -> List[Dict]:
+        with self._connect() as conn:
+            return [
+                {"file_hash": file_hash, "version": version, "file": file, "contract_type": contract_type, "status": status}
+                for file_hash, version, file, contract_type, status in conn.execute(
+                    "SELECT file_hash, version, file, contract_type, status FROM contracts ORDER BY contract_id"
+                )
+            ]
+
+    def contract_clauses(self, file_hash: str) -> List[Dict]:
+        """Clauses of one indexed contract in document order: {"clause_id", "text", "label", "risks"}."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT cl.clause_id, cl.clause_ref, cl.text, cl.label FROM clauses cl "
+                "JOIN contracts c ON c.contract_id = cl.contract_id WHERE c.file_hash = ? ORDER BY cl.clause_index",
+                (file_hash,)
+            ).fetchall()
+            risks: Dict[int, List[Dict]] = {}
+            for clause_id, risk_id, severity in conn.execute(
+                "SELECT r.clause_id, r.risk_id, r.severity FROM clause_risks r "
+                "JOIN clauses cl ON cl.clause_id = r.clause_id "
+                "JOIN contracts c ON c.contract_id = cl.contract_id WHERE c.file_hash = ?",
+                (file_hash,)
+            ):
+                risks.setdefault(clause_id, []).append({"risk_id": risk_id, "severity": severity})
+        return [
+            {"clause_id": clause_ref, "text": text, "label": label, "risks": risks.get(clause_id, [])}
+            for clause_id, clause_ref, text, label in rows
+        ]
+
+    def set_status(self, file_hash: str, status: str):
+        """Marks a contract e.g. "active" or "expired" (filterable with status:...)."""
+        with self._connect() as conn:
+            conn.execute("UPDATE contracts SET status = ? WHERE file_hash = ?", (status, file_hash))
+
+    def search(
+        self,
+        text: str = "",
+        labels: Iterable[str] = (),
+        risk_ids: Iterable[str] = (),
+        severities: Iterable[str] = (),
+        contract_types: Iterable[str] = (),
+        parties: Iterable[str] = (),
+        statuses: Iterable[str] = (),
+        languages: Iterable[str] = (),
+        limit: int = DEFAULT_LIMIT
+    ) -> List[Dict]:
+        """
+        Finds clauses matching every given filter; values within one filter
+        are alternatives (e.g. risk_ids=["INDEM_UNLIMITED", "JURIS_FOREIGN"]
+        matches clauses with either risk). `text` words must all occur in
+        the clause (word prefixes with a trailing "*").
+        """
+        conditions, params = [], []
+
+        def any_of(column: str, values: Iterable[str]):
+            values = [value for value in values if value]
+            if values:
+                conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+
+        match = fts_query(text)
+        if match:
+            conditions.append("cl.clause_id IN (SELECT rowid FROM clause_text WHERE clause_text MATCH ?)")
+            params.append(match)
+        any_of("cl.label", labels)
+        any_of("c.contract_type", contract_types)
+        any_of("c.status", statuses)
+        any_of("c.language", languages)
+
+        risk_ids, severities = list(risk_ids), list(severities)
+        if risk_ids or severities:
+            risk_conditions = []
+            if risk_ids:
+                risk_conditions.append(f"risk_id IN ({', '.join('?' * len(risk_ids))})")
+                params.extend(risk_ids)
+            if severities:
+                risk_conditions.append(f"severity IN ({', '.join('?' * len(severities))})")
+                params.extend(severities)
+            conditions.append(f"cl.clause_id IN (SELECT clause_id FROM clause_risks WHERE {' AND '.join(risk_conditions)})")
+
+        parties = [normalize_party(party) for party in parties if party.strip()]
+        if parties:
+            conditions.append(
+                "c.contract_id IN (SELECT contract_id FROM contract_parties WHERE "
+                + " OR ".join("party LIKE ?" for _ in parties) + ")"
+            )
+            params.extend(f"%{party}%" for party in parties)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT cl.clause_id, cl.contract_id, c.file, c.file_hash, c.contract_type, c.status, cl.clause_ref, cl.title,
+                       cl.label, cl.page, substr(cl.text, 1, {SNIPPET_CHARS})
+                FROM clauses cl JOIN contracts c ON c.contract_id = cl.contract_id
+                {where}
+                ORDER BY cl.clause_id DESC
+                LIMIT ?
+                """,
+                params + [limit]
+            ).fetchall()
+            # Walking clause_id backwards stops after `limit` matches (newest contracts
+            # first, no sort of all matches); the page is then shown in document order
+            rows.sort(key=lambda row: (-row[1], row[0]))
+
+            clause_ids = [row[0] for row in rows]
+            risks: Dict[int, List[Dict]] = {}
+            if clause_ids:
+                for clause_id, risk_id, severity in conn.execute(
+                    f"SELECT clause_id, risk_id, severity FROM clause_risks "
+                    f"WHERE clause_id IN ({', '.join('?' * len(clause_ids))})",
+                    clause_ids
+                ):
+                    risks.setdefault(clause_id, []).append({"risk_id": risk_id, "severity": severity})
+
+        return [
+            {
+                "file": file,
+                "file_hash": file_hash,
+                "contract_type": contract_type,
+                "status": status,
+                "clause_id": clause_ref,
+                "title": title,
+                "label": label,
+                "page": page,
+                "snippet": snippet,
+                "risks": risks.get(clause_id, [])
+            }
+            for clause_id, _, file, file_hash, contract_type, status, clause_ref, title, label, page, snippet in rows
+        ]
+
+    def query(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Dict]:
+        """Runs a query string (see parse_query)."""
+        return self.search(limit=limit, **parse_query(query))
+
+    def facets(self) -> Dict[str, List[str]]:
+        """Values present in the index, for building filters."""
+        with self._connect() as conn:
+            return {
+                "labels": [row[0] for row in conn.execute("SELECT DISTINCT label FROM clauses ORDER BY label")],
+                "risk_ids": [row[0] for row in conn.execute("SELECT DISTINCT risk_id FROM clause_risks ORDER BY risk_id")],
+                "severities": [row[0] for row in conn.execute("SELECT DISTINCT severity FROM clause_risks ORDER BY severity")],
+                "contract_types": [row[0] for row in conn.execute("SELECT DISTINCT contract_type FROM contracts ORDER BY contract_type")],
+                "statuses": [row[0] for row in conn.execute("SELECT DISTINCT status FROM contracts ORDER BY status")],
+            }
+
+    def stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            contracts = conn.execute("SELECT COUNT(*) FROM contracts").fetchone()[0]
+            clauses = conn.execute("SELECT COUNT(*) FROM clauses").fetchone()[0]
+        return {"contracts": contracts, "clauses": clauses}
+
+
+def fts_query(text: str) -> str:
+    """
+    Turns free text into an FTS5 query: every word must match, "word*"
+    matches a prefix. Words are quoted, so FTS syntax characters are inert.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        for token in TOKEN.findall(word):
+            terms.append(f'"{token}"')
+        if prefix and terms:
+            terms[-1] += "*"
+    return " ".join(terms)
+
+
+def parse_query(query: str) -> Dict:
+    """
+    Parses a search string such as
+
+        type:"Service Agreement" risk:INDEM_UNLIMITED risk:JURIS_FOREIGN status:active arbitration
+
+    into search() arguments. Repeated fields are alternatives; remaining
+    words are matched against the clause text. Only double quotes group
+    words, so apostrophes ("Licensee's") are literal. Raises ValueError
+    for an unclosed double quote.
+    """
+    lexer = shlex.shlex(query, posix=True)
+    lexer.quotes = '"'
+    lexer.whitespace_split = True
+    lexer.commenters = ""
+    try:
+        parts = list(lexer)
+    except ValueError:
+        raise ValueError("Unclosed double quote in search query") from None
+
+    arguments: Dict = {}
+    words = []
+    for part in parts:
+        field, sep, value = part.partition(":")
+        if sep and field.lower() in QUERY_FIELDS and value:
+            arguments.setdefault(QUERY_FIELDS[field.lower()], []).append(value)
+        else:
+            words.append(part)
+    if words:
+        arguments["text"] = " ".join(words)
+    return arguments
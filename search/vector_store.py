@@ -0,0 +1,469 @@
+import os
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from clause_classifier.embedding_based import MODEL_NAME, encode_texts
+from search.clause_index import ClauseIndex
+
+DEFAULT_STORE_DIR = os.path.join(os.getenv("CARA_CACHE_DIR", ".cara_cache"), "vectors")
+SNIPPET_CHARS = 300
+
+MIN_TRAIN_ROWS = 20000 # below this, queries scan every row
+RETRAIN_GROWTH = 4 # rebuild the lists once the store grew 4x since the last training
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE_PER_LIST = 64
+DEFAULT_NPROBE = 16
+ASSIGN_CHUNK = 16384
+
+# One fixed-size record per vector, memory-mapped next to the vectors.
+# Codes index into the vocabularies in meta.json.
+ROW_DTYPE = np.dtype([
+    ("contract", np.int32), # -1 once the contract was removed
+    ("label", np.uint16),
+    ("contract_type", np.uint16),
+    ("list", np.int32)
+])
+# One (row, risk code) record per risk decision, appended along with the rows
+RISK_DTYPE = np.dtype([
+    ("row", np.int64),
+    ("risk", np.int32)
+])
+# Format 1 rows held the risks as a uint64 bit set, which capped a store at 64 risk ids
+ROW_FORMAT = 2
+ROW_DTYPE_V1 = np.dtype([
+    ("contract", np.int32),
+    ("label", np.uint16),
+    ("contract_type", np.uint16),
+    ("risks", np.uint64),
+    ("list", np.int32)
+])
+
+
+def default_list_count(rows: int) -> int:
+    return max(16, int(2 * np.sqrt(rows)))
+
+
+class ClauseVectorStore:
+    """
+    On-disk store of clause embeddings for "clauses like this one" queries.
+
+    Vectors are float16 rows appended to a memory-mapped file, with a
+    fixed-size metadata record per row (label, contract type) and a
+    (row, risk) record per risk decision, so filters are vectorized. Once the store is large enough it is
+    partitioned into k-means lists (IVF): queries only score the rows of the
+    `nprobe` lists closest to the query instead of the whole corpus.
+    Contracts, clause ids, snippets and risk decisions live in SQLite and are
+    only read for the returned hits.
+
+    One process should write to a store at a time; any number can read.
+    """
+
+    def __init__(self, directory: str = DEFAULT_STORE_DIR, dim: int = 0):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.f16")
+        self.rows_path = os.path.join(directory, "rows.bin")
+        self.risks_path = os.path.join(directory, "risks.bin")
+        self.centroids_path = os.path.join(directory, "centroids.npy")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.db_path = os.path.join(directory, "clauses.sqlite3")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {
+                "model": MODEL_NAME,
+                "dim": dim,
+                "trained_rows": 0,
+                "labels": [],
+                "contract_types": [],
+                "risks": [],
+                "row_format": ROW_FORMAT
+            }
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS contracts (
+                    contract INTEGER PRIMARY KEY,
+                    file_hash TEXT NOT NULL UNIQUE,
+                    version TEXT NOT NULL,
+                    file TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS clauses (
+                    row INTEGER PRIMARY KEY,
+                    contract INTEGER NOT NULL,
+                    clause_id TEXT NOT NULL,
+                    snippet TEXT NOT NULL,
+                    risks TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_clauses_contract ON clauses (contract);
+            """)
+        if self.meta.get("row_format", 1) < ROW_FORMAT:
+            self._upgrade_rows()
+        self._open()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _upgrade_rows(self):
+        """Moves the risk bit sets of a format 1 store into the risk records."""
+        if os.path.exists(self.rows_path):
+            old = np.fromfile(self.rows_path, dtype=ROW_DTYPE_V1)
+            records = np.zeros(len(old), dtype=ROW_DTYPE)
+            for name in ROW_DTYPE.names:
+                records[name] = old[name]
+            pairs = [
+                (row, code)
+                for code in range(len(self.meta["risks"]))
+                for row in np.flatnonzero((old["risks"] >> np.uint64(code)) & np.uint64(1))
+            ]
+            risks = np.array(sorted(pairs), dtype=RISK_DTYPE)
+            for path, data in ((self.risks_path, risks), (self.rows_path, records)):
+                with open(path + ".tmp", "wb") as f:
+                    f.write(data.tobytes())
+                os.replace(path + ".tmp", path)
+        self.meta["row_format"] = ROW_FORMAT
+        self._save_meta()
+
+    def _open(self):
+        """Maps the files and builds the in-memory inverted lists."""
+        self._map()
+        self._build_risk_rows()
+        self.centroids = None
+        self.lists: List[np.ndarray] = []
+        if self.meta["trained_rows"] and os.path.exists(self.centroids_path):
+            self.centroids = np.load(self.centroids_path)
+            self._build_lists()
+
+    def _map(self):
+        dim = self.meta["dim"]
+        rows = os.path.getsize(self.rows_path) // ROW_DTYPE.itemsize if os.path.exists(self.rows_path) else 0
+        if rows and dim:
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(rows, dim))
+            self.rows = np.memmap(self.rows_path, dtype=ROW_DTYPE, mode="r", shape=(rows,))
+        else:
+            self.vectors = np.zeros((0, dim), dtype=np.float16)
+            self.rows = np.zeros(0, dtype=ROW_DTYPE)
+        risks = os.path.getsize(self.risks_path) // RISK_DTYPE.itemsize if os.path.exists(self.risks_path) else 0
+        if risks:
+            self.risks = np.memmap(self.risks_path, dtype=RISK_DTYPE, mode="r", shape=(risks,))
+        else:
+            self.risks = np.zeros(0, dtype=RISK_DTYPE)
+
+    def _build_lists(self):
+        # Row ids grouped by list: one stable argsort instead of per-row appends
+        assignments = np.asarray(self.rows["list"])
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+
+    def _build_risk_rows(self):
+        # Row ids per risk code, ascending since the records are appended in row order
+        codes = np.asarray(self.risks["risk"])
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(self.meta["risks"]) + 1))
+        rows = np.asarray(self.risks["row"])[order]
+        self.risk_rows = [rows[bounds[i]:bounds[i + 1]] for i in range(len(self.meta["risks"]))]
+
+    def _save_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _code(self, vocabulary: str, value: str) -> int:
+        values = self.meta[vocabulary]
+        if value not in values:
+            values.append(value)
+        return values.index(value)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # -------------------------------------------------
+    # Inserts
+    # -------------------------------------------------
+    def contract_versions(self) -> Dict[str, str]:
+        """file hash -> pipeline version of every stored contract."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT file_hash, version FROM contracts"))
+
+    def add_contract(
+        self,
+        file_hash: str,
+        version: str,
+        file: str,
+        contract_type: str,
+        clauses: List[Dict],
+        vectors: Optional[np.ndarray] = None
+    ):
+        """
+        Adds (or replaces) the clauses of one contract. Each clause is a dict
+        with "clause_id", "text", "label" and "risks" ([{"risk_id", "severity"}]).
+        `vectors` are their embeddings; by default they are computed with the
+        sentence embedding model.
+        """
+        if vectors is None:
+            vectors = encode_texts([clause["text"] for clause in clauses])
+            if not vectors.size and clauses:
+                raise RuntimeError(f"Embedding model {MODEL_NAME} not loaded")
+        vectors = np.array(vectors, dtype=np.float32)
+        if len(vectors) != len(clauses):
+            raise ValueError("Expected one vector per clause")
+
+        with self._lock:
+            if not clauses:
+                self._remove(file_hash)
+                return
+            if not self.meta["dim"]:
+                self.meta["dim"] = vectors.shape[1]
+            elif vectors.shape[1] != self.meta["dim"]:
+                raise ValueError(f"Expected {self.meta['dim']}-dimensional vectors, got {vectors.shape[1]}")
+
+            self._remove(file_hash)
+            with self._connect() as conn:
+                contract = conn.execute(
+                    "INSERT INTO contracts (file_hash, version, file) VALUES (?, ?, ?)", (file_hash, version, file)
+                ).lastrowid
+
+                first_row = len(self.rows)
+                records = np.zeros(len(clauses), dtype=ROW_DTYPE)
+                records["contract"] = contract
+                records["label"] = [self._code("labels", clause["label"]) for clause in clauses]
+                records["contract_type"] = self._code("contract_types", contract_type)
+                risks = np.array(sorted({
+                    (first_row + i, self._code("risks", risk["risk_id"]))
+                    for i, clause in enumerate(clauses) for risk in clause["risks"]
+                }), dtype=RISK_DTYPE)
+                vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+                records["list"] = self._assign(vectors) if self.centroids is not None else 0
+
+                conn.executemany(
+                    "INSERT INTO clauses (row, contract, clause_id, snippet, risks) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (first_row + i, contract, clause["clause_id"], clause["text"][:SNIPPET_CHARS],
+                         json.dumps(clause["risks"], ensure_ascii=False))
+                        for i, clause in enumerate(clauses)
+                    ]
+                )
+                with open(self.vectors_path, "ab") as f:
+                    f.write(vectors.astype(np.float16).tobytes())
+                with open(self.rows_path, "ab") as f:
+                    f.write(records.tobytes())
+                with open(self.risks_path, "ab") as f:
+                    f.write(risks.tobytes())
+            self._save_meta()
+
+            total = first_row + len(clauses)
+            trained = self.meta["trained_rows"]
+            if total >= MIN_TRAIN_ROWS and (not trained or total >= RETRAIN_GROWTH * trained):
+                self._train()
+            else:
+                self._map()
+                self.risk_rows += [np.zeros(0, dtype=np.int64)] * (len(self.meta["risks"]) - len(self.risk_rows))
+                for code in np.unique(risks["risk"]):
+                    self.risk_rows[code] = np.concatenate([self.risk_rows[code], risks["row"][risks["risk"] == code]])
+                if self.centroids is not None:
+                    # Incremental insert: only the lists that received rows change
+                    new_rows = np.arange(first_row, total)
+                    for list_id in np.unique(records["list"]):
+                        self.lists[list_id] = np.concatenate([self.lists[list_id], new_rows[records["list"] == list_id]])
+
+    def remove(self, file_hash: str):
+        with self._lock:
+            self._remove(file_hash)
+            self._map()
+
+    def _remove(self, file_hash: str):
+        # Rows stay in the files; they are marked as deleted and skipped by queries
+        with self._connect() as conn:
+            row = conn.execute("SELECT contract FROM contracts WHERE file_hash = ?", (file_hash,)).fetchone()
+            if row is None:
+                return
+            rows = np.array([r[0] for r in conn.execute("SELECT row FROM clauses WHERE contract = ?", row)], dtype=np.int64)
+            conn.execute("DELETE FROM clauses WHERE contract = ?", row)
+            conn.execute("DELETE FROM contracts WHERE contract = ?", row)
+        if len(rows):
+            records = np.memmap(self.rows_path, dtype=ROW_DTYPE, mode="r+")
+            records["contract"][rows] = -1
+            records.flush()
+            del records
+
+    def sync(self, index: ClauseIndex) -> int:
+        """
+        Embeds the contracts of the clause search index that are not in the
+        store yet (or were re-analyzed since). Returns the number of contracts added.
+        """
+        stored = self.contract_versions()
+        added = 0
+        for contract in index.contracts():
+            if stored.get(contract["file_hash"]) == contract["version"]:
+                continue
+            clauses = index.contract_clauses(contract["file_hash"])
+            self.add_contract(contract["file_hash"], contract["version"], contract["file"], contract["contract_type"], clauses)
+            added += 1
+        return added
+
+    # -------------------------------------------------
+    # IVF lists
+    # -------------------------------------------------
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Nearest centroid of each (normalized) vector, in chunks to bound memory."""
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), ASSIGN_CHUNK):
+            chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK], dtype=np.float32)
+            assignments[start:start + len(chunk)] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return assignments
+
+    def _train(self, lists: Optional[int] = None, seed: int = 0):
+        # Spherical k-means on a sample, then every row is reassigned
+        self._open()
+        rows = len(self.rows)
+        # k-means seeds every list with a distinct row
+        lists = min(lists or default_list_count(rows), rows)
+        rng = np.random.default_rng(seed)
+        sample_size = min(rows, lists * KMEANS_SAMPLE_PER_LIST)
+        sample = np.asarray(self.vectors[np.sort(rng.choice(rows, sample_size, replace=False))], dtype=np.float32)
+
+        centroids = sample[rng.choice(sample_size, lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = np.bincount(assignments, minlength=lists) == 0
+            # Empty lists are re-seeded with random sample vectors
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+        self.centroids = centroids
+        records = np.memmap(self.rows_path, dtype=ROW_DTYPE, mode="r+")
+        records["list"] = self._assign(self.vectors)
+        records.flush()
+        del records
+
+        np.save(self.centroids_path, centroids)
+        self.meta["trained_rows"] = rows
+        self._save_meta()
+        self._open()
+
+    def rebuild(self, lists: Optional[int] = None):
+        """Retrains the IVF lists (e.g. after many removals or a shift in the corpus)."""
+        with self._lock:
+            if len(self.rows):
+                self._train(lists)
+
+    # -------------------------------------------------
+    # Queries
+    # -------------------------------------------------
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        labels: Iterable[str] = (),
+        contract_types: Iterable[str] = (),
+        risk_ids: Iterable[str] = (),
+        exclude_file_hash: Optional[str] = None,
+        nprobe: int = DEFAULT_NPROBE
+    ) -> List[Dict]:
+        """
+        Top-k stored clauses most similar to the query embedding. Filters keep
+        clauses with any of the given labels / contract types / risk ids;
+        `exclude_file_hash` leaves out the query's own contract.
+        Returns hits with "score", "file", "file_hash", "clause_id", "label",
+        "contract_type", "snippet" and "risks" (the risk decisions made for that clause).
+        """
+        vectors, rows, centroids, lists, risk_rows = self.vectors, self.rows, self.centroids, self.lists, self.risk_rows
+        if not len(rows):
+            return []
+        query = np.asarray(query, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        if centroids is not None:
+            probe = np.argsort(-(centroids @ query))[:nprobe]
+            # Sorted row ids make the reads from the memory-mapped matrix sequential
+            candidates = np.sort(np.concatenate([lists[i] for i in probe]))
+        else:
+            candidates = np.arange(len(rows))
+
+        keep = self._filter_mask(candidates, rows[candidates], risk_rows, labels, contract_types, risk_ids, exclude_file_hash)
+        candidates = candidates[keep]
+        if not len(candidates):
+            return []
+
+        scores = np.asarray(vectors[candidates], dtype=np.float32) @ query
+        top = np.argsort(-scores)[:k] if len(scores) > k else np.argsort(-scores)
+        return self._hits(candidates[top], scores[top])
+
+    def search_text(self, text: str, k: int = 10, **filters) -> List[Dict]:
+        """search() for a clause text, embedded with the sentence embedding model."""
+        vectors = encode_texts([text])
+        if not vectors.size:
+            return []
+        return self.search(vectors[0], k, **filters)
+
+    def _filter_mask(self, row_ids, records, risk_rows, labels, contract_types, risk_ids, exclude_file_hash) -> np.ndarray:
+        keep = records["contract"] >= 0
+        labels = [self.meta["labels"].index(v) for v in labels if v in self.meta["labels"]] if labels else None
+        if labels is not None:
+            keep &= np.isin(records["label"], labels)
+        types = [self.meta["contract_types"].index(v) for v in contract_types if v in self.meta["contract_types"]] if contract_types else None
+        if types is not None:
+            keep &= np.isin(records["contract_type"], types)
+        if risk_ids:
+            codes = [self.meta["risks"].index(v) for v in risk_ids if v in self.meta["risks"]]
+            matching = [risk_rows[code] for code in codes if code < len(risk_rows)]
+            keep &= np.isin(row_ids, np.concatenate(matching)) if matching else False
+        if exclude_file_hash:
+            with self._connect() as conn:
+                row = conn.execute("SELECT contract FROM contracts WHERE file_hash = ?", (exclude_file_hash,)).fetchone()
+            if row is not None:
+                keep &= records["contract"] != row[0]
+        return keep
+
+    def _hits(self, row_ids: np.ndarray, scores: np.ndarray) -> List[Dict]:
+        row_ids = [int(row) for row in row_ids]
+        with self._connect() as conn:
+            details = {
+                row: (clause_id, snippet, risks, file, file_hash)
+                for row, clause_id, snippet, risks, file, file_hash in conn.execute(
+                    f"""
+                    SELECT cl.row, cl.clause_id, cl.snippet, cl.risks, c.file, c.file_hash
+                    FROM clauses cl JOIN contracts c ON c.contract = cl.contract
+                    WHERE cl.row IN ({', '.join('?' * len(row_ids))})
+                    """,
+                    row_ids
+                )
+            }
+        hits = []
+        for row, score in zip(row_ids, scores):
+            if row not in details:
+                continue
+            clause_id, snippet, risks, file, file_hash = details[row]
+            hits.append({
+                "score": float(score),
+                "file": file,
+                "file_hash": file_hash,
+                "clause_id": clause_id,
+                "label": self.meta["labels"][self.rows["label"][row]],
+                "contract_type": self.meta["contract_types"][self.rows["contract_type"][row]],
+                "snippet": snippet,
+                "risks": json.loads(risks)
+            })
+        return hits
+
+    def stats(self) -> Dict:
+        rows = self.rows
+        return {
+            "rows": len(rows),
+            "live_rows": int((rows["contract"] >= 0).sum()) if len(rows) else 0,
+            "lists": len(self.lists),
+            "trained_rows": self.meta["trained_rows"],
+            "dim": self.meta["dim"]
+        }
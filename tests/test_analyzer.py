@@ -0,0 +1,76 @@
+import json
+import os
+
+import pytest
+
+from benchmarks.synthetic import generate_contract
+from pipeline.analysis import ContractAnalysis
+from pipeline.analyzer import ContractAnalyzer, analyze_directory, find_contracts
+
+CONTRACT = generate_contract(30, risky_ratio=0.5, seed=3)
+
+
+@pytest.fixture
+def analyzer():
+    return ContractAnalyzer(cache=None)
+
+
+def test_analysis_refers_to_clauses_by_index(analyzer):
+    analysis = analyzer.analyze_text(CONTRACT)
+    document = analysis.document
+    assert len(document) == 30 and analysis.risks
+    assert analysis.contract_type and analysis.language == "en"
+    # Risks come clause by clause, and each one points at a clause that exists
+    assert [risk.clause_index for risk in analysis.risks] == sorted(risk.clause_index for risk in analysis.risks)
+    assert all(0 <= risk.clause_index < len(document) for risk in analysis.risks)
+
+    result = analysis.to_dict()
+    assert [clause["id"] for clause in result["analyzed"]] == document.clause_ids
+    assert sum(len(clause["risks"]) for clause in result["analyzed"]) == len(result["risks"])
+
+
+def test_compact_form_round_trips(analyzer):
+    analysis = analyzer.analyze_text(CONTRACT)
+    analysis.file = "msa.txt"
+    restored = ContractAnalysis.from_dict(json.loads(json.dumps(analysis.to_dict(compact=True))))
+    assert restored.to_dict() == analysis.to_dict()
+    assert restored.version == analyzer.version
+
+
+def test_streaming_analysis_matches_full_analysis(analyzer, tmp_path):
+    path = tmp_path / "msa.txt"
+    path.write_text(CONTRACT, encoding="utf-8")
+    analysis = analyzer.analyze_file(str(path)).to_dict()
+
+    events = list(analyzer.iter_analyze_file(str(path)))
+    clauses = [event["clause"] for event in events if event["event"] == "clause"]
+    overview = next(event for event in events if event["event"] == "overview")
+    assert events[-1] == {"event": "done", "clauses": len(clauses), "risks": len(analysis["risks"])}
+    assert overview["type"] == analysis["type"] and overview["language"] == analysis["language"]
+
+    def summary(clause):
+        return clause["id"], clause["text"], clause["label"], [risk["risk_id"] for risk in clause["risks"]]
+
+    assert [summary(clause) for clause in clauses] == [summary(clause) for clause in analysis["analyzed"]]
+
+
+def test_analyze_directory_writes_one_result_per_file(tmp_path):
+    input_dir, output_dir = tmp_path / "contracts", tmp_path / "results"
+    input_dir.mkdir()
+    (input_dir / "a.txt").write_text(generate_contract(8, seed=1), encoding="utf-8")
+    (input_dir / "b.TXT").write_text(generate_contract(8, style="article", seed=2), encoding="utf-8")
+    (input_dir / "broken.txt").write_bytes(b"\xff\xfe not utf-8")
+    (input_dir / "notes.md").write_text("not a contract", encoding="utf-8")
+
+    files = find_contracts(str(input_dir))
+    assert [os.path.basename(path) for path in files] == ["a.txt", "b.TXT", "broken.txt"]
+
+    outcomes = analyze_directory(str(input_dir), str(output_dir), workers=2, use_cache=False)
+    assert set(outcomes) == set(files)
+    assert outcomes[str(input_dir / "broken.txt")].startswith("ERROR: ")
+    for name in ("a.txt", "b.TXT"):
+        output_path = outcomes[str(input_dir / name)]
+        assert output_path == str(output_dir / f"{name}.json")
+        with open(output_path, encoding="utf-8") as f:
+            result = json.load(f)
+        assert result["file"] == name and result["analyzed"]
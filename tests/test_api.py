@@ -0,0 +1,155 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from api import server as api_server
+from benchmarks.synthetic import generate_contract
+
+CONTRACT = generate_contract(12, seed=2).encode()
+
+
+class Gate:
+    """Makes the job runner's analyses wait until released, after reporting one risk."""
+
+    def __init__(self, analyzer):
+        self.analyze_bytes = analyzer.analyze_bytes
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self, data, file_name, pages=None, progress=None):
+        progress("classifying", 0.5, [{"risk_id": "EARLY"}])
+        self.started.set()
+        assert self.release.wait(10)
+        return self.analyze_bytes(data, file_name, pages, progress)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Starts an API server on a free port; returns a client for it."""
+    servers = []
+
+    def start(gated=False, **options):
+        server = api_server.make_server(port=0, use_cache=False, use_index=False, **options)
+        handler = server.RequestHandlerClass
+        gate = None
+        if gated:
+            gate = Gate(handler.runner.analyzer)
+            monkeypatch.setattr(handler.runner.analyzer, "analyze_bytes", gate)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append((server, gate))
+        return Client(server.server_port, handler, gate)
+
+    yield start
+    for server, gate in servers:
+        if gate is not None:
+            gate.release.set()
+        server.shutdown()
+        server.RequestHandlerClass.runner.shutdown()
+        server.server_close()
+
+
+class Client:
+    def __init__(self, port, handler, gate):
+        self.port = port
+        self.handler = handler
+        self.gate = gate
+
+    def request(self, method, path, body=None):
+        """(status, headers, response body) of one request."""
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        try:
+            conn.request(method, path, body=body)
+            response = conn.getresponse()
+            return response.status, dict(response.getheaders()), response.read()
+        finally:
+            conn.close()
+
+    def wait_done(self, job_id):
+        for _ in range(200):
+            status, _, body = self.request("GET", f"/jobs/{job_id}")
+            payload = json.loads(body)
+            if payload["status"] in ("done", "failed", "cancelled"):
+                return payload
+            time.sleep(0.05)
+        raise AssertionError("job did not finish")
+
+
+def test_job_submission_returns_202_with_location(api):
+    client = api()
+    status, headers, body = client.request("POST", "/jobs?filename=msa.txt", CONTRACT)
+    assert status == 202
+    job = json.loads(body)
+    assert headers["Location"] == job["status_url"] == f"/jobs/{job['job_id']}"
+
+    payload = client.wait_done(job["job_id"])
+    assert payload["status"] == "done" and payload["progress"] == 1.0
+    assert payload["result"]["risks"]
+    assert client.request("GET", "/jobs/unknown")[0] == 404
+
+
+def test_bad_uploads_are_refused(api):
+    client = api()
+    assert client.request("POST", "/jobs?filename=msa.exe", CONTRACT)[0] == 415
+    assert client.request("POST", "/jobs?filename=msa.txt", b"")[0] == 411
+
+
+def test_backpressure_when_too_many_jobs_pending(api):
+    client = api(gated=True, max_pending=1)
+    assert client.request("POST", "/jobs?filename=a.txt", CONTRACT)[0] == 202
+    status, headers, body = client.request("POST", "/jobs?filename=b.txt", CONTRACT)
+    assert status == 429 and headers["Retry-After"] == "5"
+    assert json.loads(body) == {"error": "Too many pending jobs"}
+
+    client.gate.release.set()
+    job_id = client.handler.runner.jobs()[0].job_id
+    assert client.wait_done(job_id)["status"] == "done"
+    assert client.request("POST", "/jobs?filename=b.txt", CONTRACT)[0] == 202
+
+
+def test_503_without_free_request_slots(api):
+    client = api(max_requests=1)
+    # Another request holds the only slot
+    client.handler.request_slots.acquire()
+    try:
+        status, headers, _ = client.request("GET", "/health")
+        assert status == 503 and headers["Retry-After"] == "1"
+    finally:
+        client.handler.request_slots.release()
+    assert client.request("GET", "/health")[0] == 200
+
+
+def test_job_events_stream_ndjson(api, monkeypatch):
+    monkeypatch.setattr(api_server, "EVENT_INTERVAL", 0.01)
+    client = api(gated=True)
+    job_id = json.loads(client.request("POST", "/jobs?filename=a.txt", CONTRACT)[2])["job_id"]
+    assert client.gate.started.wait(5)
+    threading.Timer(0.1, client.gate.release.set).start()
+
+    status, headers, body = client.request("GET", f"/jobs/{job_id}/events?compact=1")
+    assert status == 200 and headers["Content-Type"] == "application/x-ndjson"
+    events = [json.loads(line) for line in body.decode().splitlines()]
+    assert [event["event"] for event in events[:-1]] == ["progress"] * (len(events) - 1)
+    # Each risk found so far is sent once, in the order it was found
+    streamed = [risk for event in events[:-1] for risk in event["new_risks"]]
+    assert streamed[0] == {"risk_id": "EARLY"}
+    assert streamed == client.handler.runner.get(job_id).partial_risks[:len(streamed)]
+    assert events[-1]["event"] == "done" and events[-1]["result"]["risks"]
+
+
+def test_sync_analyze_falls_back_to_job_on_timeout(api, monkeypatch):
+    monkeypatch.setattr(api_server, "SYNC_TIMEOUT", 0.05)
+    client = api(gated=True)
+    status, headers, body = client.request("POST", "/analyze?filename=a.txt", CONTRACT)
+    assert status == 202
+    job_id = json.loads(body)["job_id"]
+    assert headers["Location"] == f"/jobs/{job_id}"
+
+    client.gate.release.set()
+    assert client.wait_done(job_id)["status"] == "done"
+    # Within the timeout the analysis is returned directly
+    monkeypatch.setattr(api_server, "SYNC_TIMEOUT", 10)
+    status, _, body = client.request("POST", "/analyze?filename=a.txt", CONTRACT)
+    assert status == 200 and json.loads(body)["result"]["risks"]
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm_explainer import stub_server
+from llm_explainer.async_explainer import AsyncExplainer, TokenBucket, explain_all_risks
+from llm_explainer.explain_clause import api_error_explanation
+
+groq = pytest.importorskip("groq")
+httpx = pytest.importorskip("httpx")
+
+RISK = {"risk_id": "R1", "severity": "High", "reason": "Unlimited indemnity", "clause_text": "The Supplier shall indemnify."}
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setenv("CARA_EXPLANATION_CACHE", "0")
+
+
+@pytest.fixture
+def stub():
+    """Starts stub servers on free ports; returns a factory taking make_server options."""
+    servers = []
+
+    def start(**options):
+        server = stub_server.make_server(port=0, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class FakeCompletions:
+    """Async chat completions that raise the given errors first, then answer after `delay` seconds."""
+
+    def __init__(self, errors=(), delay=0.0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+        self.active = self.max_active = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.errors:
+                raise self.errors.pop(0)
+            content = json.dumps(stub_server.CANNED_EXPLANATION)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        finally:
+            self.active -= 1
+
+
+def run_with(completions, coroutine, **options):
+    """Runs coroutine(explainer) with an AsyncExplainer using the fake completions."""
+    async def run():
+        explainer = AsyncExplainer(api_key="test", backoff_base=0.001, **options)
+        explainer._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        return await coroutine(explainer)
+
+    return asyncio.run(run())
+
+
+def connection_error():
+    return groq.APIConnectionError(request=httpx.Request("POST", "http://127.0.0.1/chat/completions"))
+
+
+def test_token_bucket_limits_the_rate():
+    async def acquire_all(bucket, times):
+        start = time.monotonic()
+        for _ in range(times):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # A burst of `capacity` passes at once, the rest at `rate` per second
+    assert asyncio.run(acquire_all(TokenBucket(50, capacity=2), 2)) < 0.02
+    assert asyncio.run(acquire_all(TokenBucket(50, capacity=2), 6)) >= 0.07
+
+
+def test_retryable_errors_are_retried():
+    completions = FakeCompletions(errors=[connection_error(), connection_error()])
+    result = run_with(completions, lambda explainer: explainer.explain(RISK["clause_text"], RISK))
+    assert result == stub_server.CANNED_EXPLANATION
+    assert completions.calls == 3
+
+
+def test_other_errors_are_not_retried():
+    error = ValueError("bad request")
+    completions = FakeCompletions(errors=[error])
+    result = run_with(completions, lambda explainer: explainer.explain(RISK["clause_text"], RISK))
+    assert result == api_error_explanation(error)
+    assert completions.calls == 1
+
+
+def test_concurrency_is_bounded():
+    completions = FakeCompletions(delay=0.02)
+    results = run_with(
+        completions, lambda explainer: explainer.explain_all([RISK] * 6), max_concurrency=2, requests_per_second=1000
+    )
+    assert results == [stub_server.CANNED_EXPLANATION] * 6
+    assert completions.max_active == 2
+
+
+def test_rate_limited_requests_give_up_after_max_retries(stub):
+    # The stub answers every request with 429 and "retry-after: 0.1"
+    server = stub(fail_rate=1.0)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    start = time.monotonic()
+    results = explain_all_risks([RISK], batched=False, api_key="test", base_url=base_url, max_retries=2)
+    assert results[0]["plain_explanation"] == api_error_explanation(Exception())["plain_explanation"]
+    assert server.RequestHandlerClass.request_count == 3
+    assert time.monotonic() - start >= 0.2
+
+
+def test_explain_all_against_stub_server(stub):
+    server = stub(latency=0.01)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    results = explain_all_risks([RISK] * 5, batched=False, api_key="test", base_url=base_url, requests_per_second=100)
+    assert results == [stub_server.CANNED_EXPLANATION] * 5
+    assert server.RequestHandlerClass.request_count == 5
@@ -0,0 +1,139 @@
+import json
+import re
+import threading
+
+import pytest
+
+from benchmarks.synthetic import generate_contract
+from llm_explainer import async_explainer, stub_server
+from llm_explainer.async_explainer import AsyncExplainer, explain_all_risks, pack_batches
+from llm_explainer.explain_clause import (
+    MODEL_NAME,
+    PROMPT_VERSION,
+    build_batch_prompt,
+    invalid_json_explanation,
+    parse_batch_explanations,
+)
+from llm_explainer.explanation_cache import ExplanationCache
+from pipeline.analyzer import ContractAnalyzer
+
+EXPLANATION = {
+    "plain_explanation": "a",
+    "why_risky": "b",
+    "business_impact": "c",
+    "suggested_alternative": "d",
+}
+
+
+def risk(number, clause_chars=400):
+    return {
+        "risk_id": f"R{number}",
+        "severity": "High",
+        "reason": f"reason {number}",
+        "clause_text": f"clause {number // 2} ".ljust(clause_chars, "x"),
+    }
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setenv("CARA_EXPLANATION_CACHE", "0")
+
+
+def test_pack_batches_respects_budget_and_item_limit():
+    risks = [risk(i, clause_chars=2000) for i in range(10)]
+    # 2000 chars ~ 500 tokens + 40 per risk line; clauses are shared by pairs
+    batches = pack_batches(risks, range(10), token_budget=1200, max_items=3)
+    assert batches == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    assert pack_batches(risks, range(10), token_budget=600) == [[0, 1], [2, 3], [4, 5], [6, 7], [8, 9]]
+    assert pack_batches(risks, [3, 7], token_budget=10) == [[3], [7]]
+    assert pack_batches(risks, []) == []
+
+
+def test_build_batch_prompt_sends_shared_clauses_once():
+    prompt = build_batch_prompt([risk(0), risk(1), risk(2)])
+    assert prompt.count('Clause C1:\n"""clause 0') == 1
+    assert prompt.count('Clause C2:\n"""clause 1') == 1
+    assert re.findall(r"^Risk (\d+): clause (C\d)", prompt, re.MULTILINE) == [("0", "C1"), ("1", "C1"), ("2", "C2")]
+
+
+def test_parse_batch_explanations():
+    entries = [
+        {"index": 0, **EXPLANATION},
+        {"index": 0, **EXPLANATION, "plain_explanation": "duplicate"},
+        {"index": 1, **EXPLANATION, "why_risky": " "},
+        {"index": 5, **EXPLANATION},
+        {"index": "2", **EXPLANATION},
+        "not an object",
+        {"index": 2, **EXPLANATION, "extra": "ignored"},
+    ]
+    expected = {0: EXPLANATION, 2: EXPLANATION}
+    assert parse_batch_explanations(json.dumps({"explanations": entries}), 3) == expected
+    assert parse_batch_explanations("```json\n" + json.dumps(entries) + "\n```", 3) == expected
+    assert parse_batch_explanations("not json", 3) == {}
+    assert parse_batch_explanations('{"explanations": {}}', 3) == {}
+
+
+def test_missing_entries_are_retried_alone(monkeypatch):
+    prompts = []
+
+    async def complete(self, messages, max_tokens=512):
+        prompt = messages[-1]["content"]
+        prompts.append(prompt)
+        numbers = [int(n) for n in re.findall(r"^Risk (\d+):", prompt, re.MULTILINE)]
+        # The first response leaves out its first risk
+        keep = numbers[1:] if len(prompts) == 1 else numbers
+        return json.dumps([{"index": n, **EXPLANATION} for n in keep])
+
+    monkeypatch.setattr(AsyncExplainer, "_complete", complete)
+    results = explain_all_risks([risk(i) for i in range(5)], api_key="test")
+    assert results == [EXPLANATION] * 5
+    assert len(prompts) == 2
+    assert re.findall(r"^Risk \d+: clause C\d, level High, reason: (.*)$", prompts[1], re.MULTILINE) == ["reason 0"]
+
+
+def test_unanswered_risks_get_an_error_explanation(monkeypatch):
+    async def complete(self, messages, max_tokens=512):
+        return "[]"
+
+    monkeypatch.setattr(AsyncExplainer, "_complete", complete)
+    assert explain_all_risks([risk(0)], api_key="test") == [invalid_json_explanation()]
+
+
+def test_against_stub_server():
+    server = stub_server.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        risks = [risk(i) for i in range(20)]
+        results = explain_all_risks(risks, api_key="test", base_url=f"http://127.0.0.1:{server.server_port}")
+        assert results == [stub_server.CANNED_EXPLANATION] * 20
+        # 8 risks per request at most
+        assert server.RequestHandlerClass.request_count == 3
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_explanations_use_the_whole_clause(tmp_path, monkeypatch):
+    text = generate_contract(20, seed=1)
+    analysis = ContractAnalyzer().analyze_bytes(text.encode(), "a.txt", pages=[text])
+    document = analysis.document
+    risk = next(risk for risk in analysis.risks if len(document.clause_text(risk.clause_index)) > 120)
+    clause_text = document.clause_text(risk.clause_index)
+    risk_dict = risk.to_dict(document, full_text=True)
+    assert risk_dict["clause_text"] == clause_text
+    assert risk.to_dict(document)["clause_text"] == document.snippet(risk.clause_index)
+
+    prompts = []
+
+    async def complete(self, messages, max_tokens=512):
+        prompts.append(messages[-1]["content"])
+        return json.dumps([{"index": 0, **EXPLANATION}])
+
+    cache = ExplanationCache(str(tmp_path / "explanations.sqlite3"))
+    monkeypatch.setattr(async_explainer, "get_explanation_cache", lambda: cache)
+    monkeypatch.setattr(AsyncExplainer, "_complete", complete)
+    assert explain_all_risks([risk_dict], api_key="test") == [EXPLANATION]
+    assert clause_text in prompts[0]
+    # Cached under the whole clause, so the single-risk explain finds it too
+    assert cache.get(clause_text, risk_dict, MODEL_NAME, PROMPT_VERSION) == EXPLANATION
+    assert cache.get(document.snippet(risk.clause_index), risk_dict, MODEL_NAME, PROMPT_VERSION) is None
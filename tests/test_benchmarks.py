@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from benchmarks.run import compare_results, measure, percentile
+from benchmarks.synthetic import generate_contract, generate_corpus, risky_phrases
+from clause_classifier.rule_based import CLAUSE_KEYWORDS
+from clause_extraction.extract_clauses import extract_clauses_from_text
+from contract_classifier.classify_contract_type import CONTRACT_KEYWORDS, classify_contract_type
+from pipeline.analyzer import ContractAnalyzer
+
+
+@pytest.mark.parametrize("style, clause_ids", [
+    ("numbered", [str(number) for number in range(1, 9)]),
+    ("items", [str(number) for number in range(1, 9)]),
+    ("article", [f"Article {numeral}" for numeral in ("I", "II", "III", "IV", "V", "VI", "VII", "VIII")]),
+    # Preamble plus one paragraph per clause
+    ("plain", [str(number) for number in range(1, 10)]),
+])
+def test_styles_segment_into_their_clauses(style, clause_ids):
+    clauses = extract_clauses_from_text(generate_contract(8, style=style, seed=1))
+    assert [clause["clause_id"] for clause in clauses] == clause_ids
+
+
+def test_nested_style_numbers_sub_clauses():
+    clauses = extract_clauses_from_text(generate_contract(8, style="nested", risky_ratio=0.0, sentences=2, seed=1))
+    top_level = [clause for clause in clauses if "." not in clause["clause_id"]]
+    assert [clause["clause_id"] for clause in top_level] == [str(number) for number in range(1, 9)]
+    assert [clause["title"] for clause in top_level] == [category.upper() for category in CLAUSE_KEYWORDS]
+    # Each body line is a sub-clause: the opening sentence and two fillers
+    assert len(clauses) == 8 * 4
+
+
+def test_generation_is_seeded():
+    assert generate_contract(10, seed=7) == generate_contract(10, seed=7)
+    assert generate_contract(10, seed=7) != generate_contract(10, seed=8)
+    with pytest.raises(ValueError):
+        generate_contract(10, style="roman")
+
+
+@pytest.mark.parametrize("contract_type", sorted(CONTRACT_KEYWORDS))
+def test_contract_type_is_recognized(contract_type):
+    text = generate_contract(5, contract_type=contract_type)
+    assert classify_contract_type(text)["contract_type"] == contract_type
+
+
+def test_risky_ratio_controls_the_risks():
+    analyzer = ContractAnalyzer(cache=None)
+    assert analyzer.analyze_text(generate_contract(16, risky_ratio=0.0, seed=2)).risks == []
+    risky = analyzer.analyze_text(generate_contract(16, risky_ratio=1.0, seed=2))
+    categories = list(CLAUSE_KEYWORDS)
+    expected = [i for i in range(16) if categories[i % len(categories)] in risky_phrases()]
+    assert sorted({risk.clause_index for risk in risky.risks}) == expected
+
+
+def test_generate_corpus(tmp_path):
+    corpus = generate_corpus(str(tmp_path), [4, 6], styles=["numbered", "plain"], formats=["txt", "docx"])
+    assert len(corpus) == 2 * 2 * 2
+    assert {(item["clauses"], item["style"], item["format"]) for item in corpus} == {
+        (size, style, fmt) for size in (4, 6) for style in ("numbered", "plain") for fmt in ("txt", "docx")
+    }
+    assert all(os.path.getsize(item["path"]) > 0 for item in corpus)
+
+
+def test_percentile():
+    values = [float(value) for value in range(100, 0, -1)]
+    assert percentile(values, 0.5) == 51.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile(values, 1.0) == 100.0
+    assert percentile([3.0], 0.95) == 3.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_measure_counts_every_call():
+    calls = []
+    stats = measure(calls.append, ["ab", "cde"], repeat=2)
+    # Two timed passes plus one under tracemalloc
+    assert len(calls) == 6 and stats["calls"] == 4
+    assert set(stats) == {"calls", "total_s", "calls_per_s", "chars_per_s", "p50_ms", "p95_ms", "peak_mb"}
+
+
+def test_compare_results_reports_p50_regressions():
+    def results(**p50):
+        return {"stages": {name: {"p50_ms": value} for name, value in p50.items()}}
+
+    baseline = results(clean_text=10.0, extract_clauses=10.0, pdf_report=0.0)
+    current = results(clean_text=12.5, extract_clauses=11.0, pdf_report=5.0, analyze_text=3.0)
+    assert compare_results(current, baseline) == ["clean_text: p50 10.000 ms -> 12.500 ms (+25%)"]
+    assert compare_results(current, baseline, tolerance=0.3) == []
+    assert compare_results(current, {}) == []
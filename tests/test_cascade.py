@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from clause_classifier import cascade as cascade_module
+from clause_classifier.cascade import ClauseCascade, best_label
+
+CLEAR = "Either party may terminate this agreement on notice."  # rules are sure: Termination
+NO_KEYWORDS = "The parties met on a sunny day."
+
+
+@pytest.fixture
+def tiers(monkeypatch):
+    """Fake embedding and LLM tiers that record the clauses they are asked about."""
+    calls = {"embedding": [], "llm": []}
+
+    def embedding(texts):
+        calls["embedding"].append(list(texts))
+        return [{"Payment": 0.9, "Termination": 0.2} if "paid" in text else {"Payment": 0.3, "Liability": 0.29}
+                for text in texts]
+
+    def llm(texts, labels):
+        calls["llm"].append(list(texts))
+        return [{"Liability": 1.0} if "liable" in text else {} for text in texts]
+
+    monkeypatch.setattr(cascade_module, "get_embedding_model", lambda: object())
+    monkeypatch.setattr(cascade_module, "classify_clauses_embedding", embedding)
+    monkeypatch.setattr(cascade_module, "llm_available", lambda: True)
+    monkeypatch.setattr(cascade_module, "classify_clauses_llm", llm)
+    return calls
+
+
+def test_best_label():
+    assert best_label({}) == (None, 0.0, 0.0)
+    label, score, margin = best_label({"A": 0.8, "B": 0.5})
+    assert (label, score) == ("A", 0.8) and margin == pytest.approx(0.3)
+
+
+def test_tiers_only_see_unresolved_clauses(tiers):
+    texts = [CLEAR, "The sum is paid each month.", "The vendor is liable.", NO_KEYWORDS]
+    cascade = ClauseCascade(tiers=("rules", "embedding", "llm"))
+    assert cascade.classify(texts) == ["Termination", "Payment", "Liability", "General"]
+    assert tiers["embedding"] == [texts[1:]]
+    assert tiers["llm"] == [[texts[2], texts[3]]]
+
+    stats = cascade.stats()
+    assert (stats["rules"]["clauses"], stats["rules"]["resolved"]) == (4, 1)
+    assert (stats["embedding"]["clauses"], stats["embedding"]["resolved"]) == (3, 1)
+    assert (stats["llm"]["clauses"], stats["llm"]["resolved"]) == (2, 1)
+    assert stats["unresolved"] == 1
+
+
+def test_disabled_tiers_fall_back_to_rule_labels(tiers):
+    cascade = ClauseCascade(tiers=("rules",))
+    assert cascade.classify([CLEAR, NO_KEYWORDS]) == ["Termination", "General"]
+    assert tiers == {"embedding": [], "llm": []}
+    assert set(cascade.stats()) == {"rules", "unresolved"}
+
+
+def test_unavailable_tier_is_skipped(tiers, monkeypatch):
+    monkeypatch.setattr(cascade_module, "get_embedding_model", lambda: None)
+    ClauseCascade(tiers=("rules", "embedding")).classify([NO_KEYWORDS])
+    assert tiers["embedding"] == []
+
+
+def test_invalid_tiers():
+    with pytest.raises(ValueError):
+        ClauseCascade(tiers=("embedding",))
+    with pytest.raises(ValueError):
+        ClauseCascade(tiers=("rules", "gpu"))
+
+
+def test_fingerprint_tracks_configuration():
+    assert ClauseCascade(tiers=("rules",)).fingerprint != ClauseCascade(tiers=("rules", "embedding")).fingerprint
+    assert ClauseCascade(rule_min_score=0.8).fingerprint != ClauseCascade().fingerprint
+
+
+def test_ties_go_to_the_first_declared_category(tiers):
+    # Jurisdiction is listed after Termination in CLAUSE_KEYWORDS, whatever order the scores come in
+    assert best_label({"Jurisdiction": 0.5, "Termination": 0.5})[0] == "Termination"
+    assert best_label({"Unknown": 0.5, "Jurisdiction": 0.5})[0] == "Jurisdiction"
+    tied = "Either party may terminate this agreement and the governing law shall apply."
+    assert ClauseCascade(tiers=("rules",)).classify([tied]) == ["Termination"]
+
+
+@pytest.mark.skipif("CARA_CLASSIFIER_TIERS" in os.environ, reason="tiers chosen through the environment")
+def test_model_tiers_are_opt_in():
+    assert cascade_module.DEFAULT_TIERS == ("rules",)
+    assert ClauseCascade().tiers == ("rules",)
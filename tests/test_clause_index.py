@@ -0,0 +1,118 @@
+import json
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pytest
+
+from api.server import make_server
+from benchmarks.synthetic import generate_contract
+from pipeline.analyzer import ContractAnalyzer
+from pipeline.result_cache import hash_bytes
+from search.clause_index import ClauseIndex, fts_query, parse_query
+
+
+def test_parse_query_fields_and_words():
+    arguments = parse_query('type:"Service Agreement" risk:INDEM_UNLIMITED Risk:JURIS_FOREIGN arbitration clause')
+    assert arguments == {
+        "contract_types": ["Service Agreement"],
+        "risk_ids": ["INDEM_UNLIMITED", "JURIS_FOREIGN"],
+        "text": "arbitration clause",
+    }
+
+
+def test_parse_query_unknown_field_is_text():
+    assert parse_query("foo:bar") == {"text": "foo:bar"}
+    assert parse_query("risk:") == {"text": "risk:"}
+
+
+def test_parse_query_apostrophes_are_literal():
+    assert parse_query("Licensee's indemnity") == {"text": "Licensee's indemnity"}
+    assert parse_query("party:O'Brien") == {"parties": ["O'Brien"]}
+
+
+def test_parse_query_unclosed_double_quote():
+    with pytest.raises(ValueError):
+        parse_query('type:"Service Agreement')
+
+
+def test_fts_query_quotes_words():
+    assert fts_query('term* "OR" NEAR(') == '"term"* "OR" "NEAR"'
+
+
+@pytest.fixture
+def indexed(tmp_path):
+    index = ClauseIndex(tmp_path / "index.sqlite3")
+    text = generate_contract(20, seed=1)
+    analysis = ContractAnalyzer(index=index).analyze_bytes(text.encode(), "a.txt", pages=[text])
+    return index, analysis, hash_bytes(text.encode())
+
+
+def test_index_add_search_remove(indexed):
+    index, analysis, file_hash = indexed
+    assert index.stats()["clauses"] == len(analysis.document)
+
+    risky = {risk.risk_id for risk in analysis.risks}
+    risk_id = sorted(risky)[0]
+    hits = index.query(f"risk:{risk_id}")
+    assert hits and all(risk_id in {risk["risk_id"] for risk in hit["risks"]} for hit in hits)
+
+    index.remove(file_hash)
+    assert index.stats()["clauses"] == 0
+    assert index.query(f"risk:{risk_id}") == []
+
+
+def test_index_status_survives_reindexing(indexed):
+    index, analysis, file_hash = indexed
+    index.set_status(file_hash, "expired")
+    index.add(analysis, file_hash)
+    assert index.query("status:expired")
+    assert index.query("status:active") == []
+
+
+def test_index_query_with_apostrophe(tmp_path):
+    index = ClauseIndex(tmp_path / "index.sqlite3")
+    text = (
+        "LICENSE AGREEMENT\n\n"
+        "1. Indemnity\nThe Licensee's indemnity obligations shall be unlimited.\n\n"
+        "2. Term\nThis Agreement remains in force for two years.\n"
+    )
+    ContractAnalyzer(index=index).analyze_bytes(text.encode(), "license.txt", pages=[text])
+    hits = index.query("Licensee's indemnity")
+    assert [hit["snippet"].startswith("1. Indemnity") for hit in hits] == [True]
+
+
+def test_api_search_rejects_unparseable_query(tmp_path):
+    server = make_server(port=0, use_cache=False, use_index=False)
+    server.RequestHandlerClass.index = ClauseIndex(tmp_path / "index.sqlite3")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/search?q="
+    try:
+        with urllib.request.urlopen(url + urllib.parse.quote("Licensee's indemnity")) as response:
+            assert json.loads(response.read()) == {"results": []}
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url + urllib.parse.quote('type:"Service'))
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_api_search(indexed):
+    index, analysis, _ = indexed
+    risk_id = analysis.risks[0].risk_id
+    server = make_server(port=0, use_cache=False, use_index=False)
+    server.RequestHandlerClass.index = index
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/search?limit=2&q="
+    try:
+        with urllib.request.urlopen(url + urllib.parse.quote(f"risk:{risk_id}")) as response:
+            results = json.loads(response.read())["results"]
+        assert 0 < len(results) <= 2
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url.replace("limit=2", "limit=many") + "x")
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,54 @@
+import pytest
+
+from benchmarks.synthetic import NUMBERING_STYLES, generate_contract
+from clause_extraction.document import Document
+from clause_extraction.extract_clauses import extract_clauses_from_text
+from pipeline.analysis import ContractAnalysis
+from pipeline.analyzer import ContractAnalyzer
+
+
+@pytest.mark.parametrize("style", NUMBERING_STYLES)
+def test_clauses_match_extract_clauses(style):
+    text = generate_contract(12, style=style, seed=5)
+    assert Document.from_text(text).clauses_to_dicts() == extract_clauses_from_text(text)
+
+
+def test_clause_views_slice_the_shared_text():
+    text = "Preamble.\n1. TERM\nOne year.\n2. FEES\nMonthly.\n3. NOTICE\nIn writing.\n4. LAW\nEnglish law."
+    document = Document.from_text(text)
+    assert len(document) == 4
+    clause = document[1]
+    assert (clause.id, clause.title, clause.text) == ("2", "FEES", "FEES\nMonthly.")
+    assert text[clause.start:clause.end] == clause.text == document.clause_text(1)
+    assert (clause.label, clause.intents, clause.page) == ("General", (), None)
+    assert document[-1].id == "4" and document[-1].index == 3
+    assert [clause.id for clause in document] == ["1", "2", "3", "4"]
+    with pytest.raises(IndexError):
+        document[4]
+    with pytest.raises(IndexError):
+        document[-5]
+
+
+def test_snippet_stops_at_the_clause_end():
+    document = Document("x" * 150 + "short")
+    document.add_clause("1", 0, 150)
+    document.add_clause("2", 150, 155)
+    assert document.snippet(0) == "x" * 100 + "..."
+    assert document.snippet(1) == "short..."
+
+
+def test_page_for_offset():
+    # Page 2 has no text, so it starts where page 3 does
+    document = Document("a" * 30, [0, 10, 10, 20])
+    assert [document.page_for_offset(offset) for offset in (0, 9, 10, 19, 20, 29)] == [1, 1, 3, 3, 4, 4]
+    assert Document("a" * 30).page_for_offset(5) is None
+
+
+def test_analysis_shares_label_and_intent_objects():
+    analysis = ContractAnalyzer(cache=None).analyze_text(generate_contract(40, seed=6))
+    document = analysis.document
+    for restored in (document, ContractAnalysis.from_dict(analysis.to_dict(compact=True)).document):
+        by_value = {}
+        for intents in restored.intents:
+            assert by_value.setdefault(intents, intents) is intents
+        assert len(by_value) < len(restored)
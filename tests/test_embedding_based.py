@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_contract
+from clause_classifier import embedding_based
+from clause_classifier.embedding_based import (
+    CLAUSE_TEMPLATES,
+    PARITY_MIN_COSINE,
+    check_parity,
+    classify_clause_embedding,
+    classify_clauses_embedding,
+    encode_texts,
+    length_batches,
+)
+
+
+class FakeEmbedder:
+    """Bag-of-letters embeddings; records the size of every batch it encodes."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=None, normalize_embeddings=True, **kwargs):
+        self.batches.append(len(texts))
+        vectors = np.zeros((len(texts), 26), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for char in text.lower():
+                if "a" <= char <= "z":
+                    vectors[row, ord(char) - ord("a")] += 1
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+@pytest.fixture
+def template_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_based, "EMBEDDING_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(embedding_based, "_template_matrices", {})
+    return tmp_path
+
+
+def test_length_batches_cover_every_text_once():
+    texts = ["x" * length for length in (10, 4000, 50, 900, 10, 2000, 300)]
+    batches = length_batches(texts, token_budget=600, max_batch=3)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(texts)))
+    assert all(len(batch) <= 3 for batch in batches)
+    # Longest first, so each batch holds texts of similar length
+    assert batches[0][0] == 1
+
+
+def test_encode_texts_keeps_input_order():
+    texts = ["short", "a much longer clause " * 30, "mid length text " * 5]
+    embedder = FakeEmbedder()
+    matrix = encode_texts(texts, batch_size=1, embedder=embedder)
+    assert embedder.batches == [1, 1, 1]
+    expected = FakeEmbedder().encode(texts)
+    np.testing.assert_allclose(matrix, expected, rtol=1e-6)
+
+
+def test_classify_clauses_embedding(template_cache, monkeypatch):
+    monkeypatch.setattr(embedding_based, "get_embedding_model", FakeEmbedder)
+    templates = {"Payment": "invoice payment fees", "Termination": "terminate notice breach"}
+    scores = classify_clauses_embedding(["Fees are invoiced for payment.", "May terminate upon breach."], templates)
+    assert [max(clause, key=clause.get) for clause in scores] == ["Payment", "Termination"]
+    assert classify_clause_embedding("Fees are invoiced for payment.", templates) == pytest.approx(scores[0])
+    # Template vectors are cached on disk
+    assert len(list(template_cache.glob("*.npy"))) == 1
+
+
+def test_model_unavailable(template_cache, monkeypatch):
+    monkeypatch.setattr(embedding_based, "get_embedding_model", lambda: None)
+    assert classify_clauses_embedding(["Fees are invoiced."], {"Payment": "invoice"}) == [{}]
+
+
+def test_model_unavailable_with_cached_templates(template_cache, monkeypatch):
+    # Template vectors written by an earlier run, but the model fails to load now
+    monkeypatch.setattr(embedding_based, "get_embedding_model", FakeEmbedder)
+    templates = {"Payment": "invoice payment fees", "Termination": "terminate notice breach"}
+    classify_clauses_embedding(["warm up"], templates)
+    monkeypatch.setattr(embedding_based, "_template_matrices", {})
+    monkeypatch.setattr(embedding_based, "get_embedding_model", lambda: None)
+
+    assert classify_clauses_embedding(["Fees are invoiced.", "Notice."], templates) == [{}, {}]
+    assert classify_clause_embedding("Fees are invoiced.", templates) == {}
+
+
+@pytest.mark.parametrize("backend", ["torch-int8", "onnx", "onnx-int8"])
+def test_backend_parity_with_float32_reference(backend):
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("torch")
+    if backend.startswith("onnx"):
+        pytest.importorskip("onnxruntime")
+    texts = list(CLAUSE_TEMPLATES.values()) + [line for line in generate_contract(6, seed=3).splitlines() if line]
+    parity = check_parity(texts, backend, threads=1)
+    assert parity["passed"], parity
+    assert PARITY_MIN_COSINE <= parity["min_cosine"] <= parity["mean_cosine"] <= 1.0 + 1e-5
@@ -0,0 +1,94 @@
+import pytest
+
+from clause_extraction.document import Document
+from ner import entity_extractor
+from ner.entity_extractor import (
+    _split_long,
+    extract_clause_entities,
+    extract_entities,
+    extract_portfolio_entities,
+    group_entities,
+)
+
+CONTRACT = (
+    "1. PARTIES\nThis agreement is made between Acme Corporation and Globex Inc.\n"
+    "2. TERM\nIt starts on 1 January 2024 and ends on 31 December 2025.\n"
+    "3. FEES\nGlobex Inc. shall pay Acme Corporation $50,000 per year.\n"
+    "4. GOVERNING LAW\nThis agreement is governed by the laws of California."
+)
+
+
+@pytest.fixture
+def nlp():
+    pytest.importorskip("spacy")
+    nlp = entity_extractor.get_nlp()
+    if nlp is None:
+        pytest.skip("spaCy model en_core_web_sm is not installed")
+    return nlp
+
+
+def test_group_entities_dedupes_in_order():
+    entities = [
+        {"group": "PARTIES", "text": "Globex  Inc."},
+        {"group": "DATES", "text": "1 January 2024"},
+        {"group": "PARTIES", "text": "Acme\nCorporation"},
+        {"group": "PARTIES", "text": "Globex Inc."},
+        {"group": "PARTIES", "text": "Acme Corporation"},
+    ]
+    assert group_entities(entities) == {
+        "PARTIES": ["Globex Inc.", "Acme Corporation"],
+        "DATES": ["1 January 2024"],
+        "MONEY": [],
+        "JURISDICTION": [],
+    }
+
+
+def test_split_long_cuts_at_line_breaks():
+    text = "aaaa\nbbbb\ncccccccccccc"
+    pieces = list(_split_long(text, 0, len(text), 8))
+    assert pieces == [(0, 4), (4, 9), (9, 17), (17, 22)]
+    assert "".join(text[start:end] for start, end in pieces) == text
+    assert list(_split_long(text, 5, 9, 8)) == [(5, 9)]
+
+
+def test_missing_model(monkeypatch):
+    monkeypatch.setattr(entity_extractor, "get_nlp", lambda: None)
+    assert extract_entities(CONTRACT) == {"Error": ["Model en_core_web_sm not loaded"]}
+    with pytest.raises(RuntimeError):
+        extract_portfolio_entities([Document.from_text(CONTRACT)])
+
+
+def test_entity_offsets_are_per_clause(nlp):
+    document = Document.from_text(CONTRACT)
+    clauses = extract_clause_entities(document)
+    assert len(clauses) == len(document) == 4
+    for i, entities in enumerate(clauses):
+        for entity in entities:
+            assert document.text[entity["start"]:entity["end"]] == entity["text"]
+            assert document.starts[i] <= entity["start"] < entity["end"] <= document.ends[i]
+    assert any(entity["group"] == "MONEY" for entity in clauses[2])
+
+
+def test_long_clauses_keep_their_offsets(nlp, monkeypatch):
+    document = Document.from_text(CONTRACT)
+    expected = extract_clause_entities(document)
+    # Only the first clause is longer than this; it is cut after its heading line
+    monkeypatch.setattr(nlp, "max_length", 70)
+    clauses = extract_clause_entities(document)
+    assert clauses[1:] == expected[1:]
+    for entity in clauses[0]:
+        assert document.text[entity["start"]:entity["end"]] == entity["text"]
+        assert document.starts[0] <= entity["start"] < entity["end"] <= document.ends[0]
+
+
+def test_portfolio_matches_single_documents(nlp):
+    other = CONTRACT.replace("Acme Corporation", "Initech LLC")
+    documents = [Document.from_text(CONTRACT), Document.from_text(other)]
+    results = extract_portfolio_entities(documents, batch_size=3)
+    for document, result in zip(documents, results):
+        assert result["clauses"] == extract_clause_entities(document)
+        assert result["entities"] == group_entities(entity for clause in result["clauses"] for entity in clause)
+    # Parties are listed once each, in the order they first appear
+    parties = results[0]["entities"]["PARTIES"]
+    assert len(parties) == len(set(parties))
+    assert extract_entities(CONTRACT)["PARTIES"] == parties
@@ -0,0 +1,113 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from llm_explainer import explain_clause, stub_server
+from llm_explainer.explain_clause import (
+    EXPLANATION_KEYS,
+    generate_clause_explanation,
+    invalid_json_explanation,
+    parse_explanation,
+    stream_clause_explanation,
+    strip_json_fence,
+)
+from llm_explainer.explanation_cache import ExplanationCache
+
+EXPLANATION = {
+    "plain_explanation": "You pay for every claim.",
+    "why_risky": "No cap.",
+    "business_impact": "Unlimited cost.",
+    "suggested_alternative": "Cap it at the fees paid.",
+}
+RISK = {"risk_id": "INDEM_UNLIMITED", "severity": "High", "reason": "Unlimited indemnity"}
+CLAUSE = "The Supplier shall indemnify the Customer without limit."
+
+
+class FakeCompletions:
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+
+    def create(self, stream=False, **kwargs):
+        self.calls += 1
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))])
+        return iter(
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.content[i:i + 5]))])
+            for i in range(0, len(self.content), 5)
+        )
+
+
+def streamed(clause_text, risk_info):
+    """Final item of the explanation stream."""
+    return list(stream_clause_explanation(clause_text, risk_info))[-1]
+
+
+@pytest.fixture
+def llm(tmp_path, monkeypatch):
+    """Installs a fake Groq client answering with `llm.completions.content`, and a fresh cache."""
+    completions = FakeCompletions("")
+    cache = ExplanationCache(str(tmp_path / "explanations.sqlite3"))
+    monkeypatch.setattr(explain_clause, "get_api_key", lambda: "test")
+    monkeypatch.setattr(explain_clause, "get_client", lambda: SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    monkeypatch.setattr(explain_clause, "get_explanation_cache", lambda: cache)
+    return SimpleNamespace(completions=completions, cache=cache)
+
+
+def test_strip_json_fence():
+    assert strip_json_fence('```json\n{"a": 1}\n```') == '{"a": 1}'
+    assert strip_json_fence('```\n{"a": 1}```') == '{"a": 1}'
+    assert strip_json_fence(' {"a": 1} ') == '{"a": 1}'
+
+
+def test_parse_explanation():
+    assert parse_explanation("```json\n" + json.dumps({**EXPLANATION, "extra": "x"}) + "\n```") == EXPLANATION
+    for content in ("not json", "[]", json.dumps({**EXPLANATION, "why_risky": ""}),
+                    json.dumps({key: EXPLANATION[key] for key in EXPLANATION_KEYS[:2]})):
+        with pytest.raises(json.JSONDecodeError):
+            parse_explanation(content)
+
+
+@pytest.mark.parametrize("explain", [generate_clause_explanation, streamed], ids=["blocking", "streaming"])
+def test_fenced_response_is_accepted_and_cached(llm, explain):
+    llm.completions.content = "```json\n" + json.dumps(EXPLANATION) + "\n```"
+    assert explain(CLAUSE, RISK) == EXPLANATION
+    assert explain(CLAUSE, RISK) == EXPLANATION
+    assert llm.completions.calls == 1
+
+
+@pytest.mark.parametrize("explain", [generate_clause_explanation, streamed], ids=["blocking", "streaming"])
+def test_incomplete_response_is_not_cached(llm, explain):
+    llm.completions.content = json.dumps({"plain_explanation": "Only this."})
+    assert explain(CLAUSE, RISK) == invalid_json_explanation()
+    assert llm.cache.stats()["entries"] == 0
+
+
+def test_stream_surfaces_plain_explanation_early(llm):
+    llm.completions.content = json.dumps(EXPLANATION)
+    items = list(stream_clause_explanation(CLAUSE, RISK))
+    partial = [item["plain_explanation"] for item in items[:-1] if "plain_explanation" in item]
+    # Grows chunk by chunk, and is complete before the other fields arrive
+    assert partial == sorted(partial, key=len) and len(set(partial)) > 3
+    first_complete = next(item for item in items if item.get("plain_explanation") == EXPLANATION["plain_explanation"])
+    assert "suggested_alternative" not in first_complete
+    assert items[-1] == EXPLANATION
+
+
+def test_stream_against_stub_server(tmp_path, monkeypatch):
+    groq = pytest.importorskip("groq")
+    server = stub_server.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = groq.Groq(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(explain_clause, "get_api_key", lambda: "test")
+    monkeypatch.setattr(explain_clause, "get_client", lambda: client)
+    monkeypatch.setattr(explain_clause, "get_explanation_cache", lambda: None)
+    try:
+        items = list(stream_clause_explanation(CLAUSE, RISK))
+        assert len(items) > 10
+        assert items[-1] == stub_server.CANNED_EXPLANATION
+    finally:
+        server.shutdown()
+        server.server_close()
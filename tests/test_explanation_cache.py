@@ -0,0 +1,57 @@
+import numpy as np
+
+from llm_explainer.explanation_cache import ExplanationCache, normalize_clause
+
+RISK = {"risk_id": "INDEM_UNLIMITED", "severity": "High"}
+EXPLANATION = {"plain_explanation": "a", "why_risky": "b", "business_impact": "c", "suggested_alternative": "d"}
+
+
+def test_normalize_clause():
+    assert normalize_clause("  The Supplier\n\tSHALL  indemnify ") == "the supplier shall indemnify"
+
+
+def test_exact_hit_ignores_formatting(tmp_path):
+    cache = ExplanationCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("The Supplier shall indemnify.", RISK, "model", "v1", EXPLANATION)
+    assert cache.get("the supplier  shall\nindemnify.", RISK, "model", "v1") == EXPLANATION
+    assert cache.get("The Supplier shall indemnify.", RISK, "model", "v2") is None
+    assert cache.get("The Supplier shall indemnify.", {**RISK, "severity": "Low"}, "model", "v1") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "near_hits": 0, "misses": 2}
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ExplanationCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=-1)
+    cache.put("clause", RISK, "model", "v1", EXPLANATION)
+    assert cache.get("clause", RISK, "model", "v1") is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = ExplanationCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    for text in ("one", "two", "three"):
+        cache.put(text, RISK, "model", "v1", EXPLANATION)
+    assert cache.stats()["entries"] == 2
+    assert cache.get("one", RISK, "model", "v1") is None
+
+
+def test_near_duplicates_are_opt_in(tmp_path, monkeypatch):
+    def fail(texts, *args, **kwargs):
+        raise AssertionError("the embedding model must not be used")
+
+    monkeypatch.setattr("clause_classifier.embedding_based.encode_texts", fail)
+    cache = ExplanationCache(str(tmp_path / "cache.sqlite3"), near_duplicate_threshold=0)
+    cache.put("The Supplier shall indemnify.", RISK, "model", "v1", EXPLANATION)
+    assert cache.get("The Vendor shall indemnify.", RISK, "model", "v1") is None
+
+
+def test_near_duplicate_hit(tmp_path, monkeypatch):
+    def encode(texts, *args, **kwargs):
+        # Clauses differing only in the party name embed identically
+        return np.array([[1.0, 0.0] if "indemnify" in text else [0.0, 1.0] for text in texts], dtype=np.float32)
+
+    monkeypatch.setattr("clause_classifier.embedding_based.encode_texts", encode)
+    cache = ExplanationCache(str(tmp_path / "cache.sqlite3"), near_duplicate_threshold=0.97)
+    cache.put("The Supplier shall indemnify.", RISK, "model", "v1", EXPLANATION)
+    assert cache.get("The Vendor shall indemnify.", RISK, "model", "v1") == EXPLANATION
+    assert cache.get("The Vendor may terminate.", RISK, "model", "v1") is None
+    assert cache.stats()["near_hits"] == 1
+
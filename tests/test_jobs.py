@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+
+from benchmarks.synthetic import generate_contract
+from pipeline import jobs as jobs_module
+from pipeline.analyzer import ContractAnalyzer, build_document
+from pipeline.jobs import CANCELLED, DONE, FAILED, JobRunner
+
+CONTRACT = generate_contract(12, seed=4)
+
+
+class SteppedAnalyzer:
+    """Reports progress, then waits for `release` before finishing (or failing)."""
+
+    def __init__(self, error=None):
+        self.release = threading.Event()
+        self.reported = threading.Event()
+        self.error = error
+
+    def analyze_bytes(self, data, file_name, pages=None, progress=None):
+        progress("classifying", 0.5, [{"risk_id": "R1"}])
+        self.reported.set()
+        assert self.release.wait(5)
+        progress("summarizing", 0.95, [{"risk_id": "R2"}])
+        if self.error:
+            raise self.error
+        return f"analysis of {file_name}"
+
+
+@pytest.fixture
+def runner():
+    runners = []
+
+    def make(analyzer, workers=1):
+        runners.append(JobRunner(analyzer, max_workers=workers))
+        return runners[-1]
+
+    yield make
+    for runner in runners:
+        runner.shutdown()
+
+
+def test_job_reports_progress_and_result(runner):
+    analyzer = SteppedAnalyzer()
+    jobs = runner(analyzer)
+    job = jobs.submit(b"data", "a.txt")
+    assert analyzer.reported.wait(5)
+    status = job.to_dict()
+    assert (status["status"], status["stage"], status["progress"], status["risks_found"]) == ("running", "classifying", 0.5, 1)
+    assert jobs.pending() == 1 and jobs.get(job.job_id) is job
+
+    analyzer.release.set()
+    job.future.result(5)
+    assert job.status == DONE and job.progress == 1.0
+    assert job.result == "analysis of a.txt"
+    assert job.partial_risks == [{"risk_id": "R1"}, {"risk_id": "R2"}]
+    assert job.trace is not None and jobs.pending() == 0
+
+
+def test_cancel_running_and_queued_jobs(runner):
+    analyzer = SteppedAnalyzer()
+    jobs = runner(analyzer)
+    running = jobs.submit(b"data", "a.txt")
+    queued = jobs.submit(b"data", "b.txt")
+    assert analyzer.reported.wait(5)
+
+    # The queued job never starts; the running one stops at its next progress report
+    assert jobs.cancel(queued.job_id) and queued.status == CANCELLED
+    assert jobs.cancel(running.job_id)
+    analyzer.release.set()
+    running.future.result(5)
+    assert running.status == CANCELLED and running.result is None
+    assert not jobs.cancel(running.job_id) and not jobs.cancel("unknown")
+
+
+def test_failed_job_keeps_the_error(runner):
+    analyzer = SteppedAnalyzer(error=ValueError("unreadable"))
+    analyzer.release.set()
+    job = runner(analyzer).submit(b"data", "a.txt")
+    job.future.result(5)
+    assert job.status == FAILED and job.error == "ValueError: unreadable"
+
+
+def test_finished_jobs_are_pruned(runner, monkeypatch):
+    monkeypatch.setattr(jobs_module, "MAX_FINISHED_JOBS", 2)
+    analyzer = SteppedAnalyzer()
+    analyzer.release.set()
+    jobs = runner(analyzer)
+    submitted = []
+    for i in range(4):
+        submitted.append(jobs.submit(b"data", f"{i}.txt"))
+        submitted[-1].future.result(5)
+    # Pruning happens on submit, before the new job runs
+    assert [job.file_name for job in jobs.jobs()] == ["1.txt", "2.txt", "3.txt"]
+
+
+def test_job_runs_the_real_analyzer(runner):
+    jobs = runner(ContractAnalyzer(cache=None))
+    job = jobs.submit(CONTRACT.encode(), "msa.txt")
+    job.future.result(30)
+    assert job.status == DONE and job.result.file == "msa.txt"
+    assert [risk["risk_id"] for risk in job.partial_risks] == [risk.risk_id for risk in job.result.risks]
+
+
+def test_single_and_multi_page_input_clean_the_same():
+    # Pages split the text at arbitrary points, with page footers and a page holding only its footer
+    lines = CONTRACT.split("\n")
+    pages = ["\n".join(lines[:20]) + "\nPage 1 of 3", "Page 2 of 3", "\n".join(lines[20:]) + "\n\n  Page 3 of 3  \n"]
+    whole = build_document(["\n".join(pages)])
+    paged = build_document(pages)
+    assert paged.text == whole.text and "Page 2 of 3" not in whole.text
+    assert [paged.clause_text(i) for i in range(len(paged))] == [whole.clause_text(i) for i in range(len(whole))]
+    assert whole.page_for_offset(0) is None and paged.page_for_offset(len(paged.text) - 1) == 3
@@ -0,0 +1,70 @@
+import json
+import random
+
+import pytest
+
+from llm_explainer.json_stream import IncrementalJsonObject
+
+OBJECT = {
+    "plain_explanation": 'Quotes " and \\ backslashes,\nnew lines, é, € and \U0001F4A1',
+    "why_risky": "",
+    "count": 3,
+    "nested": {"a": [1, {"b": "}"}]},
+    "flag": True,
+    "none": None,
+}
+
+
+def feed_in_chunks(text, sizes):
+    parser = IncrementalJsonObject()
+    snapshots = []
+    position = 0
+    while position < len(text):
+        size = next(sizes)
+        parser.feed(text[position:position + size])
+        snapshots.append(parser.snapshot())
+        position += size
+    return parser, snapshots
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_random_chunking_matches_json_loads(ensure_ascii):
+    text = json.dumps(OBJECT, ensure_ascii=ensure_ascii, indent=1)
+    rng = random.Random(0)
+    for _ in range(200):
+        parser, _ = feed_in_chunks(text, iter(lambda: rng.randint(1, 7), None))
+        assert parser.done
+        assert parser.fields == OBJECT
+
+
+def test_partial_string_field():
+    parser = IncrementalJsonObject()
+    parser.feed('{"plain_explanation": "You pay')
+    assert parser.partial == ("plain_explanation", "You pay")
+    assert parser.snapshot() == {"plain_explanation": "You pay"}
+    assert parser.fields == {}
+
+    parser.feed(' for claims.", "why_risky": "No')
+    assert parser.fields == {"plain_explanation": "You pay for claims."}
+    assert parser.snapshot() == {"plain_explanation": "You pay for claims.", "why_risky": "No"}
+
+
+def test_snapshots_only_grow():
+    text = json.dumps({"plain_explanation": "word " * 20, "why_risky": "x"})
+    _, snapshots = feed_in_chunks(text, iter(lambda: 3, None))
+    values = [snapshot.get("plain_explanation", "") for snapshot in snapshots]
+    assert all(later.startswith(earlier) for earlier, later in zip(values, values[1:]))
+
+
+def test_escape_split_across_chunks():
+    parser = IncrementalJsonObject()
+    for chunk in ['{"a": "x\\', 'u00', 'e9\\', 'n\\ud83d', '\\udca1"}']:
+        parser.feed(chunk)
+    assert parser.fields == {"a": "xé\n\U0001F4A1"}
+
+
+def test_code_fence_and_trailing_text_are_ignored():
+    parser = IncrementalJsonObject()
+    parser.feed('```json\n{"a": "b"}\n```\n{"c": "d"}')
+    assert parser.done
+    assert parser.fields == {"a": "b"}
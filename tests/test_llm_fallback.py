@@ -0,0 +1,81 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from clause_classifier import llm_fallback
+from clause_classifier.llm_fallback import (
+    LLM_CLAUSE_CHARS,
+    OTHER_LABEL,
+    build_classification_prompt,
+    classify_clause_llm,
+    classify_clauses_llm,
+    parse_classification,
+)
+from llm_explainer import explain_clause
+
+LABELS = ("Termination", "Payment")
+
+
+class FakeCompletions:
+    """Labels clause i of each request with answers[i]; raises for requests holding a clause in `failing`."""
+
+    def __init__(self, answers, failing=()):
+        self.answers = answers
+        self.failing = failing
+        self.prompts = []
+
+    def create(self, messages, max_tokens, **kwargs):
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        if any(text in prompt for text in self.failing):
+            raise RuntimeError("request failed")
+        clauses = prompt.count("\n[")
+        content = json.dumps({"labels": self.answers[:clauses]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Installs a fake Groq client; set `llm.completions` to change its answers."""
+    llm = SimpleNamespace(completions=FakeCompletions([]))
+    monkeypatch.setattr(explain_clause, "get_api_key", lambda: "test")
+    monkeypatch.setattr(explain_clause, "get_client", lambda: SimpleNamespace(chat=llm))
+    return llm
+
+
+def test_prompt_numbers_and_truncates_clauses():
+    prompt = build_classification_prompt(["a" * (LLM_CLAUSE_CHARS + 50), "second clause"], LABELS)
+    assert f"Termination, Payment, {OTHER_LABEL}" in prompt
+    assert "[0]\n" + "a" * LLM_CLAUSE_CHARS + "\n\n[1]\nsecond clause" in prompt
+
+
+def test_parse_classification():
+    content = json.dumps({"labels": ["Payment", "Unknown", OTHER_LABEL, 3]})
+    assert parse_classification(content, 5, LABELS) == [{"Payment": 1.0}, {}, {OTHER_LABEL: 1.0}, {}, {}]
+    assert parse_classification("not json", 2, LABELS) == [{}, {}]
+    assert parse_classification("[]", 1, LABELS) == [{}]
+
+
+def test_clauses_are_batched(llm, monkeypatch):
+    monkeypatch.setattr(llm_fallback, "LLM_BATCH_SIZE", 2)
+    llm.completions = FakeCompletions(["Payment", "Termination"])
+    texts = [f"clause {i}" for i in range(5)]
+    assert classify_clauses_llm(texts, LABELS) == [{"Payment": 1.0}, {"Termination": 1.0}] * 2 + [{"Payment": 1.0}]
+    assert len(llm.completions.prompts) == 3
+    assert "[0]\nclause 4" in llm.completions.prompts[-1]
+
+
+def test_failed_request_only_loses_its_batch(llm, monkeypatch):
+    monkeypatch.setattr(llm_fallback, "LLM_BATCH_SIZE", 2)
+    llm.completions = FakeCompletions(["Payment", "Payment"], failing=["clause 2"])
+    texts = [f"clause {i}" for i in range(4)]
+    assert classify_clauses_llm(texts, LABELS) == [{"Payment": 1.0}, {"Payment": 1.0}, {}, {}]
+    assert classify_clause_llm("clause 0") == {"Payment": 1.0}
+
+
+def test_unavailable_without_api_key(llm, monkeypatch):
+    monkeypatch.setattr(explain_clause, "get_api_key", lambda: None)
+    assert not llm_fallback.llm_available()
+    assert classify_clauses_llm(["clause 0", "clause 1"], LABELS) == [{}, {}]
+    assert llm.completions.prompts == []
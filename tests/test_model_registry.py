@@ -0,0 +1,79 @@
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from resources import model_registry
+from resources.model_registry import ResourceRegistry, warm_up_from_env
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class Loader:
+    """Counts its calls; sleeps a little so concurrent first uses overlap."""
+
+    def __init__(self, value="model", error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(0.01)
+        if self.error:
+            raise self.error
+        return self.value
+
+
+def test_resources_load_once_on_first_use():
+    registry = ResourceRegistry()
+    loader = Loader()
+    registry.register("model", loader)
+    assert not registry.is_loaded("model") and loader.calls == 0
+
+    threads = [threading.Thread(target=registry.get, args=("model",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.get("model") == "model"
+    assert loader.calls == 1
+    assert list(registry.load_times()) == ["model"] and registry.load_times()["model"] > 0
+
+
+def test_failed_load_is_remembered():
+    registry = ResourceRegistry()
+    loader = Loader(error=OSError("model not installed"))
+    registry.register("model", loader)
+    assert registry.get("model") is None
+    assert registry.get("model") is None
+    assert loader.calls == 1
+    assert registry.errors() == {"model": "model not installed"}
+
+
+def test_warm_up_from_env(monkeypatch):
+    registry = ResourceRegistry()
+    loaders = {name: Loader(name) for name in ("spacy", "embedding", "groq")}
+    for name, loader in loaders.items():
+        registry.register(name, loader)
+    monkeypatch.setattr(model_registry, "registry", registry)
+
+    monkeypatch.delenv("CARA_WARMUP", raising=False)
+    assert warm_up_from_env() == {}
+    monkeypatch.setenv("CARA_WARMUP", " spacy, groq ,")
+    assert set(warm_up_from_env()) == {"spacy", "groq"}
+    assert not registry.is_loaded("embedding")
+    monkeypatch.setenv("CARA_WARMUP", "all")
+    assert set(warm_up_from_env()) == set(loaders)
+    assert all(loader.calls == 1 for loader in loaders.values())
+
+
+def test_importing_the_pipeline_loads_no_models():
+    code = (
+        "import sys\n"
+        "import api.server, main, ner.entity_extractor, llm_explainer.async_explainer, clause_classifier.embedding_based\n"
+        "print(' '.join(m for m in ('spacy', 'groq', 'sentence_transformers', 'torch', 'dotenv') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT)
+    assert result.stdout.strip() == ""
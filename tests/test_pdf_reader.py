@@ -0,0 +1,71 @@
+import pytest
+
+from ingestion import pdf_reader
+from ingestion.pdf_reader import iter_pdf_pages, join_pages, read_pdf, read_pdf_pages, read_pdf_with_pages
+from pipeline.analyzer import load_document, read_contract_pages
+
+PAGES = [
+    ["MASTER SERVICE AGREEMENT", "1. PAYMENT", "Fees are invoiced monthly.", "2. TERM", "This agreement runs for two years.",
+     "Page 1 of 3"],
+    [],
+    ["3. TERMINATION", "Either party may terminate this agreement on notice.", "4. GOVERNING LAW",
+     "This agreement is governed by the laws of India."],
+]
+
+
+def write_pdf(path, pages):
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    pdf = canvas.Canvas(str(path))
+    for lines in pages:
+        for i, line in enumerate(lines):
+            pdf.drawString(72, 760 - 20 * i, line)
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+
+@pytest.fixture
+def contract_pdf(tmp_path):
+    return write_pdf(tmp_path / "contract.pdf", PAGES)
+
+
+def test_join_pages_offsets():
+    text, offsets = join_pages(["ab", "", "cd", "e"])
+    assert text == "ab\ncd\ne"
+    # The empty page starts where the next one does
+    assert offsets == [0, 3, 3, 6]
+
+
+@pytest.mark.parametrize("options", [{}, {"fast": True}, {"parallel": True, "workers": 2}], ids=["pdfplumber", "pypdf", "parallel"])
+def test_extraction_modes_agree(contract_pdf, monkeypatch, options):
+    monkeypatch.setattr(pdf_reader, "PARALLEL_MIN_PAGES", 1)
+    pages = read_pdf_pages(contract_pdf, **options)
+    assert len(pages) == 3 and not pages[1].strip()
+    assert [page.split() for page in pages] == [" ".join(lines).split() for lines in PAGES]
+
+
+def test_read_pdf_with_pages(contract_pdf):
+    text, offsets = read_pdf_with_pages(contract_pdf)
+    assert text == read_pdf(contract_pdf)
+    assert text[offsets[0]:].startswith("MASTER SERVICE AGREEMENT")
+    assert offsets[1] == offsets[2] and text[offsets[2]:].startswith("3. TERMINATION")
+    assert list(iter_pdf_pages(contract_pdf)) == [page for page in read_pdf_pages(contract_pdf) if page]
+
+
+def test_clauses_map_to_their_pages(contract_pdf):
+    document = load_document(contract_pdf)
+    pages = {document.clause_ids[i]: document.page_for_offset(document.starts[i]) for i in range(len(document))}
+    assert pages == {"1": 1, "2": 1, "3": 3, "4": 3}
+    assert document.clause_text(2).startswith("TERMINATION")
+    # The page footer was cleaned out of the clause
+    assert "Page 1 of 3" not in document.text
+
+
+def test_pdf_without_text_is_refused(tmp_path):
+    blank = write_pdf(tmp_path / "scan.pdf", [[], []])
+    assert read_pdf_pages(blank) == ["", ""]
+    for read in (read_pdf, read_contract_pages, lambda path: list(iter_pdf_pages(path))):
+        with pytest.raises(ValueError, match="No text extracted"):
+            read(blank)
+    with pytest.raises(FileNotFoundError):
+        read_pdf_pages(str(tmp_path / "missing.pdf"))
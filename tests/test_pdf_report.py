@@ -0,0 +1,88 @@
+import io
+from collections import OrderedDict
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+from export import pdf_report
+from export.pdf_report import context_chunks, render_pdf_report, report_key
+
+REPORT = {
+    "contract_type": "Service Agreement",
+    "confidence": 0.8,
+    "risks": [{
+        "risk_id": "LIAB_UNCAPPED",
+        "severity": "High",
+        "reason": "Liability <b>not capped & unlimited",
+        "clause_text": "Damages if x < y & z > 0.\nSecond line",
+        "explanation": {"plain_explanation": "Costs <unbounded>", "suggested_alternative": "Cap at 1 & 2"},
+    }],
+}
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Fresh report cache; returns the list of reports actually rendered."""
+    monkeypatch.setattr(pdf_report, "_report_cache", OrderedDict())
+    rendered = []
+    generate = pdf_report.generate_pdf_report
+
+    def counting(analysis_data, output_path):
+        rendered.append(analysis_data)
+        generate(analysis_data, output_path)
+
+    monkeypatch.setattr(pdf_report, "generate_pdf_report", counting)
+    return rendered
+
+
+def pdf_text(pdf):
+    pypdf = pytest.importorskip("pypdf")
+    reader = pypdf.PdfReader(io.BytesIO(pdf))
+    return "\n".join(page.extract_text() for page in reader.pages), len(reader.pages)
+
+
+def test_context_chunks():
+    text = "\n".join(["short line"] * 30 + ["word " * 100 + "x" * 120])
+    chunks = context_chunks(text, limit=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "".join("".join(chunks).split()) == "".join(text.split())
+    # Lines are kept whole where they fit
+    assert chunks[0] == "\n".join(["short line"] * 9)
+    assert context_chunks("y" * 250, limit=100) == ["y" * 100, "y" * 100, "y" * 50]
+    assert context_chunks("") == []
+
+
+def test_markup_characters_are_escaped(renders):
+    text, _ = pdf_text(render_pdf_report(REPORT))
+    for fragment in ("<b>not capped & unlimited", "x < y & z > 0.", "Costs <unbounded>", "Cap at 1 & 2"):
+        assert fragment in text
+
+
+def test_reports_are_memoized_on_their_data(renders, monkeypatch):
+    pdf = render_pdf_report(REPORT)
+    reordered = dict(reversed(list(REPORT.items())))
+    assert report_key(reordered) == report_key(REPORT)
+    assert render_pdf_report(reordered) is pdf
+    assert len(renders) == 1
+
+    changed = {**REPORT, "confidence": 0.9}
+    assert render_pdf_report(changed) != pdf and len(renders) == 2
+
+    # Least recently used reports are dropped first
+    monkeypatch.setattr(pdf_report, "REPORT_CACHE_SIZE", 2)
+    render_pdf_report(REPORT)
+    render_pdf_report({**REPORT, "risks": []})
+    assert len(renders) == 3
+    render_pdf_report(REPORT)
+    assert len(renders) == 3
+    render_pdf_report(changed)
+    assert len(renders) == 4
+
+
+def test_long_clauses_span_pages(renders):
+    clause = "\n".join(f"Line {i} of a very long schedule of fees and charges." for i in range(600))
+    report = {**REPORT, "risks": [{**REPORT["risks"][0], "clause_text": clause}]}
+    text, pages = pdf_text(render_pdf_report(report))
+    assert pages > 5
+    assert "Line 599 of a very long schedule" in text
@@ -0,0 +1,50 @@
+from benchmarks.synthetic import generate_contract
+from pipeline.analysis import ContractAnalysis
+from pipeline.analyzer import ContractAnalyzer
+from pipeline.result_cache import ResultCache, hash_bytes
+
+RESULT = {"clauses": [{"id": "1", "text": "Payment is due in 30 days."}]}
+
+
+def test_get_put_and_versions(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    assert cache.get("hash", "v1") is None
+    cache.put("hash", "v1", "extracted text", RESULT)
+    assert cache.get("hash", "v1") == RESULT
+    # Another pipeline version misses, but can reuse the extracted text
+    assert cache.get("hash", "v2") is None
+    assert cache.get_text("hash") == "extracted text"
+    assert cache.get_text("other") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_eviction_keeps_recently_used(tmp_path):
+    entry_size = len('{"text": "' + "x" * 100 + '"}') + 1
+    cache = ResultCache(str(tmp_path / "results.sqlite3"), max_bytes=entry_size * 2)
+    cache.put("a", "v1", "a", {"text": "x" * 100})
+    cache.put("b", "v1", "b", {"text": "x" * 100})
+    cache.get("a", "v1")
+    cache.put("c", "v1", "c", {"text": "x" * 100})
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") is not None and cache.get("c", "v1") is not None
+    assert cache.stats()["bytes"] <= entry_size * 2
+
+
+def test_oversized_results_are_not_stored(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite3"), max_bytes=10)
+    cache.put("a", "v1", "text", RESULT)
+    assert cache.stats()["entries"] == 0
+
+
+def test_analyzer_serves_repeat_files_from_cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    analyzer = ContractAnalyzer(cache=cache)
+    data = generate_contract(15, seed=3).encode()
+
+    first = analyzer.analyze_bytes(data, "contract.txt")
+    second = analyzer.analyze_bytes(data, "contract.txt")
+    assert cache.stats()["hits"] == 1
+    assert second.to_dict() == first.to_dict()
+    # The file name is set per upload, not cached
+    cached = ContractAnalysis.from_dict(cache.get(hash_bytes(data), analyzer.version)).to_dict()
+    assert {**cached, "file": first.file} == first.to_dict()
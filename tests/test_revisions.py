@@ -0,0 +1,63 @@
+import pytest
+
+from pipeline.analyzer import ContractAnalyzer, build_document
+from pipeline.revisions import align_documents, compare_analyses
+
+CLAUSES = [
+    "1. Term\nThis Agreement starts on the Effective Date and lasts two years.",
+    "2. Payment\nFees are invoiced monthly and payable within 30 days.",
+    "3. Indemnity\nThe Supplier shall indemnify the Customer against all claims.",
+    "4. Jurisdiction\nThis Agreement is governed by the laws of India.",
+    "5. Confidentiality\nEach party keeps the other's information confidential.",
+]
+
+
+def contract(clauses):
+    return "SERVICE AGREEMENT\n\n" + "\n\n".join(clauses)
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return ContractAnalyzer()
+
+
+def test_align_identical():
+    old = build_document([contract(CLAUSES)])
+    matches, unchanged = align_documents(old, build_document([contract(CLAUSES)]))
+    assert matches == list(range(len(old)))
+    assert all(unchanged)
+
+
+def test_align_edit_insert_remove_reorder():
+    old = build_document([contract(CLAUSES)])
+    revised = [
+        "1. Payment\nFees are invoiced monthly and payable within 45 days.",  # edited, moved up
+        "2. Term\nThis Agreement starts on the Effective Date and lasts two years.",  # renumbered only
+        CLAUSES[2],
+        "4. Audit\nThe Customer may audit the Supplier once a year at its own cost.",  # added
+        CLAUSES[4],
+    ]  # Jurisdiction removed
+    new = build_document([contract(revised)])
+    matches, unchanged = align_documents(old, new)
+    assert matches == [1, 0, 2, None, 4]
+    assert unchanged == [False, True, True, False, True]
+
+
+def test_revision_matches_full_analysis(analyzer):
+    previous = analyzer.analyze_pages([contract(CLAUSES)])
+    revised = list(CLAUSES)
+    revised[3] = "4. Jurisdiction\nThis Agreement is governed by the laws of England."
+    del revised[2]
+    revised.append("6. Limitation of Liability\nThe Supplier accepts unlimited liability and liability for consequential damages.")
+    pages = [contract(revised)]
+
+    incremental, delta = analyzer.analyze_revision(previous, pages)
+    full = analyzer.analyze_pages(pages)
+    assert incremental.document.labels == full.document.labels
+    assert [(r.risk_id, r.clause_index) for r in incremental.risks] == [(r.risk_id, r.clause_index) for r in full.risks]
+
+    summary = delta.to_dict(previous, incremental)
+    assert {risk["risk_id"] for risk in summary["risks"]["new"]} >= {"JURIS_FOREIGN", "LIAB_UNLIMITED"}
+    assert "INDEM_BROAD" in {risk["risk_id"] for risk in summary["risks"]["resolved"]}
+    assert len(summary["clauses"]["added"]) == 1 and len(summary["clauses"]["removed"]) == 1
+    assert compare_analyses(previous, full).to_dict(previous, full) == summary
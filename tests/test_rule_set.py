@@ -0,0 +1,91 @@
+import os
+import random
+
+import pytest
+
+from pipeline.analyzer import DEFAULT_RULES_PATH
+from risk_engine.risk_evaluator import evaluate_risk
+from risk_engine.rule_set import RuleSet, load_risk_rules, load_rule_set
+
+
+def reference_evaluate(clause_text, category, rules_db):
+    """The original per-rule substring checks, with keywords compared case-insensitively."""
+    text_lower = clause_text.lower()
+    risks = []
+    for rule in rules_db.get(category, []):
+        keyword = str(rule["keyword"]).lower() if "keyword" in rule else None
+        risk_found = keyword is not None and keyword in text_lower
+        if "negative_keyword" in rule:
+            risk_found = keyword in text_lower and str(rule["negative_keyword"]).lower() not in text_lower
+        if rule.get("condition") == "no_cap" and "cap" not in text_lower and "limit" not in text_lower:
+            risk_found = True
+        elif rule.get("condition") == "unilateral" and (
+            "without cause" in text_lower or "at its sole discretion" in text_lower
+        ):
+            risk_found = True
+        if risk_found:
+            risks.append(rule["id"])
+    return risks
+
+
+@pytest.fixture(scope="module")
+def rules_db():
+    return load_risk_rules(DEFAULT_RULES_PATH)
+
+
+def test_rule_set_matches_reference(rules_db):
+    rule_set = RuleSet(rules_db)
+    phrases = sorted({
+        str(rule[field]) for rules in rules_db.values() for rule in rules
+        for field in ("keyword", "negative_keyword") if field in rule
+    }) + ["cap", "limit", "without cause", "at its sole discretion", "the supplier", "shall", "India"]
+    rng = random.Random(0)
+    for _ in range(500):
+        text = " ".join(rng.choice(phrases) for _ in range(rng.randint(0, 8)))
+        for category in rules_db:
+            expected = reference_evaluate(text, category, rules_db)
+            assert [risk["risk_id"] for risk in rule_set.evaluate(text, category)] == expected, (category, text)
+            # The raw-dict path of evaluate_risk agrees as well
+            assert [risk["risk_id"] for risk in evaluate_risk(text, category, rules_db)] == expected
+
+
+def test_evaluate_output(rules_db):
+    risks = RuleSet(rules_db).evaluate("Governed by the laws of England.", "Jurisdiction")
+    assert [risk["risk_id"] for risk in risks] == ["JURIS_FOREIGN"]
+    assert risks[0]["clause_text"] == "Governed by the laws of England...."
+    assert RuleSet(rules_db).evaluate("Governed by the laws of India.", "Jurisdiction") == []
+    assert RuleSet(rules_db).evaluate("anything", "Unknown category") == []
+
+
+
+def test_negative_keyword_is_case_insensitive(rules_db):
+    # Behavior change: the original checks compared the rule's "India" with the
+    # lower-cased clause, so it never matched and JURIS_FOREIGN fired for Indian law too
+    for clause in ("Governed by the laws of India.", "governed by the LAWS OF INDIA"):
+        assert RuleSet(rules_db).evaluate(clause, "Jurisdiction") == []
+        assert evaluate_risk(clause, "Jurisdiction", rules_db) == []
+    assert [risk["risk_id"] for risk in evaluate_risk("The laws of Singapore apply.", "Jurisdiction", rules_db)] == ["JURIS_FOREIGN"]
+
+@pytest.mark.parametrize("rule, message", [
+    ({"id": "X", "severity": "High"}, "missing reason"),
+    ({"id": "X", "severity": "High", "reason": "r", "condition": "nope"}, "Unknown condition"),
+    ({"id": "X", "severity": "High", "reason": "r"}, "needs a keyword or a condition"),
+])
+def test_invalid_rules(rule, message):
+    with pytest.raises(ValueError, match=message):
+        RuleSet({"Termination": [rule]})
+
+
+def test_load_rule_set_reloads_on_change(tmp_path):
+    path = tmp_path / "rules.yaml"
+    path.write_text("Payment:\n  - {id: P1, keyword: late fee, severity: Low, reason: r}\n")
+    first = load_rule_set(str(path))
+    assert load_rule_set(str(path)) is first
+    assert len(first) == 1
+
+    path.write_text("Payment:\n  - {id: P1, keyword: late fee, severity: Low, reason: r}\n"
+                    "  - {id: P2, keyword: interest, severity: Low, reason: r}\n")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    reloaded = load_rule_set(str(path))
+    assert len(reloaded) == 2 and reloaded.fingerprint != first.fingerprint
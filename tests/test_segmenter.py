@@ -0,0 +1,151 @@
+import random
+import re
+
+import pytest
+
+from clause_extraction.extract_clauses import extract_clauses_from_text, iter_clauses
+from clause_extraction.segmenter import match_heading, segment_clauses, segment_paragraphs
+from preprocessing.text_cleaner import clean_text, iter_clean_lines
+
+# The clause regex used before the single-pass segmenter
+OLD_CLAUSE_PATTERN = re.compile(r'(?:^|\n)(\d+(?:\.\d+)*)\.?\s*(.*?)(?=\n\d+(?:\.\d+)*\.?|\Z)', re.DOTALL)
+
+
+def old_extract_clauses(text):
+    matches = list(OLD_CLAUSE_PATTERN.finditer(text))
+    clauses = []
+    if len(matches) > 3:
+        for match in matches:
+            content = match.group(2).strip()
+            first_line = content.split('\n')[0].strip()
+            title = first_line if len(first_line) < 50 and (first_line.isupper() or first_line.istitle()) else ""
+            clauses.append({"clause_id": match.group(1), "text": content, "title": title})
+    else:
+        for i, para in enumerate(text.split('\n\n')):
+            if para.strip():
+                clauses.append({"clause_id": str(i + 1), "text": para.strip(), "title": ""})
+    return clauses
+
+
+LINES = [
+    "1. Term", "2. PAYMENT TERMS", "2.1 Invoices", "3.", "4.2.1 Late fees", "10 Confidentiality",
+    "The Supplier shall deliver the goods.", "Payment is due within 30 days.", "Governing Law",
+    "30 days notice is required.", "", "", "  ", "This Agreement may be terminated by either party.",
+]
+
+
+def random_document(rng):
+    return "\n".join(rng.choice(LINES) for _ in range(rng.randint(0, 30)))
+
+
+def without_offsets(clauses):
+    return [{key: clause[key] for key in ("clause_id", "text", "title")} for clause in clauses]
+
+
+def test_numbered_documents_match_old_regex():
+    rng = random.Random(0)
+    for _ in range(3000):
+        text = random_document(rng)
+        assert without_offsets(extract_clauses_from_text(text)) == old_extract_clauses(text), text
+
+
+def test_offsets_point_into_the_text():
+    rng = random.Random(1)
+    for _ in range(500):
+        text = random_document(rng)
+        for clause in extract_clauses_from_text(text):
+            assert text[clause["start"]:clause["end"]] == clause["text"]
+
+
+def test_streaming_matches_whole_text():
+    # The stream is fed cleaned lines, as in the streaming pipeline
+    rng = random.Random(2)
+    for _ in range(500):
+        text = random_document(rng)
+        lines = list(iter_clean_lines([text]))
+        assert "\n".join(lines) == clean_text(text)
+        assert list(iter_clauses(lines, decision_chars=None)) == extract_clauses_from_text(clean_text(text)), text
+
+
+def test_streaming_matches_raw_lines():
+    # Uncleaned lines too: runs of blank lines, whitespace-only lines, trailing newlines
+    rng = random.Random(3)
+    for _ in range(500):
+        text = random_document(rng) + rng.choice(["", "\n", "\n\n"])
+        assert list(iter_clauses(text.split("\n"), decision_chars=None)) == extract_clauses_from_text(text), text
+
+
+def test_streaming_paragraphs_with_early_decision():
+    # Without headings the output doesn't depend on when the stream commits to paragraphs
+    rng = random.Random(4)
+    prose = [line for line in LINES if match_heading(line) is None]
+    for _ in range(300):
+        text = "\n".join(rng.choice(prose) for _ in range(rng.randint(0, 30)))
+        expected = extract_clauses_from_text(text)
+        for decision_chars in (0, 40, None):
+            assert list(iter_clauses(text.split("\n"), decision_chars)) == expected, text
+
+
+def test_streaming_emits_clauses_before_the_end():
+    consumed = []
+
+    def lines():
+        for number in range(1, 1001):
+            for line in (f"{number}. CLAUSE {number}", f"Text of clause {number}.", ""):
+                consumed.append(line)
+                yield line
+
+    clauses = iter_clauses(lines())
+    # The first clause is known once the fifth heading closes the fourth clause
+    first = next(clauses)
+    assert first == {"clause_id": "1", "text": "CLAUSE 1\nText of clause 1.", "title": "CLAUSE 1", "start": 3, "end": 29}
+    assert len(consumed) == 13
+    rest = list(clauses)
+    assert [clause["clause_id"] for clause in rest] == [str(number) for number in range(2, 1001)]
+    text = "\n".join(consumed)
+    assert all(text[clause["start"]:clause["end"]] == clause["text"] for clause in rest)
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("1. Term", ("numbered", "1", 1, 3)),
+    ("2.1.3 Notice", ("numbered", "2.1.3", 3, 6)),
+    ("ARTICLE IV: Payment", ("article", "Article IV", 0, 12)),
+    ("Schedule B: Fees", ("schedule", "Schedule B", 0, 12)),
+    ("EXHIBIT 2", ("schedule", "Exhibit 2", 0, 9)),
+    ("(iv) the Buyer", ("item", "(iv)", 100, 5)),
+    ("Articles of association", None),
+    ("(Note) text", None),
+    ("The Supplier", None),
+])
+def test_match_heading(line, expected):
+    assert match_heading(line) == expected
+
+
+def test_clause_tree():
+    text = (
+        "ARTICLE I\nDefinitions\n"
+        "1. Term\nThe term is one year.\n"
+        "(a) renewal is automatic;\n(b) unless terminated.\n"
+        "1.1 Renewal\nRenews yearly.\n"
+        "2. Payment\nDue monthly.\n"
+        "Schedule A\nFees."
+    )
+    spans = segment_clauses(text)
+    ids = [span.clause_id for span in spans]
+    assert ids == ["Article I", "1", "1(a)", "1(b)", "1.1", "2", "Schedule A"]
+    parents = [spans[span.parent].clause_id if span.parent is not None else None for span in spans]
+    assert parents == [None, "Article I", "1", "1", "1", "Article I", None]
+
+    term = spans[1]
+    # Items stay inside the clause body; the section also covers 1.1
+    assert term.text(text) == "Term\nThe term is one year.\n(a) renewal is automatic;\n(b) unless terminated."
+    assert text[term.start:term.section_end].endswith("Renews yearly.")
+    assert spans[2].text(text) == "renewal is automatic;"
+    assert term.title(text) == "Term"
+
+
+def test_segment_paragraphs():
+    text = "First para.\n\n\n\nSecond\npara.\n\n  \n\nThird."
+    assert [(number, text[start:end]) for number, start, end in segment_paragraphs(text)] == [
+        (number, para.strip()) for number, para in enumerate(text.split("\n\n"), 1) if para.strip()
+    ]
@@ -0,0 +1,50 @@
+import threading
+
+from resources.tracing import count, span, start_trace
+
+
+def test_spans_and_counters_record_into_the_active_trace():
+    with start_trace("contract") as trace:
+        with span("segment", clauses=3):
+            with span("classify"):
+                count("clauses", 3)
+    count("outside")  # no active trace: ignored
+    assert trace.summary().keys() == {"segment", "classify"}
+    parent = next(s for s in trace.spans if s.name == "segment")
+    assert next(s for s in trace.spans if s.name == "classify").parent == parent.span_id
+    assert trace.counters == {"clauses": 3}
+
+
+def test_only_one_concurrent_trace_is_profiled(monkeypatch):
+    import tracemalloc
+
+    monkeypatch.setenv("CARA_PROFILE", "cpu,memory")
+    started, release = threading.Event(), threading.Event()
+    traces = {}
+
+    def profiled():
+        with start_trace("first") as trace:
+            started.set()
+            release.wait(5)
+        traces["first"] = trace
+
+    thread = threading.Thread(target=profiled)
+    thread.start()
+    assert started.wait(5)
+    try:
+        with start_trace("second") as second:
+            sum(range(1000))
+        # The first trace still holds the profilers: this one runs without them
+        assert second.profile is None and second.memory is None
+        assert tracemalloc.is_tracing()
+    finally:
+        release.set()
+        thread.join(5)
+
+    first = traces["first"]
+    assert first.profile and first.memory["peak_mb"] >= 0
+    assert not tracemalloc.is_tracing()
+    # Once it finished, the next trace is profiled again
+    with start_trace("third") as third:
+        pass
+    assert third.profile and third.memory
@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+import pytest
+
+from search.vector_store import ROW_DTYPE, ROW_DTYPE_V1, ClauseVectorStore
+
+DIM = 8
+
+
+def clause(clause_id, label="Liability", risks=()):
+    return {
+        "clause_id": clause_id,
+        "text": f"Clause {clause_id}",
+        "label": label,
+        "risks": [{"risk_id": risk_id, "severity": "High"} for risk_id in risks],
+    }
+
+
+def unit(i):
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[i % DIM] = 1.0
+    return vector
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ClauseVectorStore(str(tmp_path / "vectors"))
+    store.add_contract(
+        "hash-a", "v1", "a.txt", "Service Agreement",
+        [clause("1", risks=["INDEM_UNLIMITED"]), clause("2", label="Termination"), clause("3")],
+        np.stack([unit(0), unit(1), unit(2)])
+    )
+    store.add_contract(
+        "hash-b", "v1", "b.txt", "Lease Agreement",
+        [clause("1", risks=["JURIS_FOREIGN"]), clause("2", label="Termination")],
+        np.stack([unit(0) + 0.1 * unit(3), unit(1)])
+    )
+    return store
+
+
+def test_search_ranks_by_cosine(store):
+    hits = store.search(unit(0), k=2)
+    assert [(hit["file"], hit["clause_id"]) for hit in hits] == [("a.txt", "1"), ("b.txt", "1")]
+    assert hits[0]["score"] == pytest.approx(1.0, abs=1e-3)
+    assert hits[0]["risks"] == [{"risk_id": "INDEM_UNLIMITED", "severity": "High"}]
+
+
+def test_search_filters(store):
+    assert [hit["file"] for hit in store.search(unit(0), labels=["Termination"])] == ["a.txt", "b.txt"]
+    assert [hit["file"] for hit in store.search(unit(0), contract_types=["Lease Agreement"])] == ["b.txt", "b.txt"]
+    assert [hit["file"] for hit in store.search(unit(0), risk_ids=["JURIS_FOREIGN"])] == ["b.txt"]
+    assert all(hit["file"] == "b.txt" for hit in store.search(unit(0), exclude_file_hash="hash-a"))
+    assert store.search(unit(0), labels=["Unknown"]) == []
+
+
+def test_replace_and_remove(store):
+    store.add_contract("hash-a", "v2", "a2.txt", "Service Agreement", [clause("9")], np.stack([unit(5)]))
+    assert store.contract_versions() == {"hash-a": "v2", "hash-b": "v1"}
+    assert [hit["file"] for hit in store.search(unit(5), k=1)] == ["a2.txt"]
+    assert store.stats()["live_rows"] == 3
+
+    store.remove("hash-b")
+    assert {hit["file"] for hit in store.search(unit(0), k=10)} == {"a2.txt"}
+    assert store.stats()["live_rows"] == 1
+
+
+def test_store_reopens_from_disk(store):
+    reopened = ClauseVectorStore(store.directory)
+    assert len(reopened) == 5
+    assert reopened.search(unit(1), k=1)[0]["label"] == "Termination"
+
+
+def test_rebuild_small_store(store):
+    # Fewer rows than the default list count (or an explicit one)
+    store.rebuild()
+    assert store.stats()["lists"] == 5
+    store.rebuild(lists=100)
+    assert {hit["file"] for hit in store.search(unit(0), k=5, nprobe=5)} == {"a.txt", "b.txt"}
+
+
+
+def test_more_than_64_risk_ids(store):
+    risk_ids = [f"RISK_{i}" for i in range(100)]
+    store.add_contract(
+        "hash-c", "v1", "c.txt", "Service Agreement",
+        [clause(str(i), risks=risk_ids[i:i + 2]) for i in range(0, 100, 2)],
+        np.stack([unit(i) for i in range(50)])
+    )
+    assert [hit["clause_id"] for hit in store.search(unit(0), risk_ids=["RISK_99"])] == ["98"]
+    assert {hit["clause_id"] for hit in store.search(unit(0), risk_ids=["RISK_0", "RISK_70"])} == {"0", "70"}
+    # Risk filters also apply to the rows of the IVF lists and survive a reopen
+    store.rebuild(lists=4)
+    reopened = ClauseVectorStore(store.directory)
+    assert [hit["file"] for hit in reopened.search(unit(0), risk_ids=["INDEM_UNLIMITED"], nprobe=4)] == ["a.txt"]
+    assert [hit["clause_id"] for hit in reopened.search(unit(0), risk_ids=["RISK_64"], nprobe=4)] == ["64"]
+
+
+def test_format_1_store_is_upgraded(store):
+    # Rewrite the store as the uint64 risk bit sets of format 1
+    rows = np.fromfile(store.rows_path, dtype=ROW_DTYPE)
+    old = np.zeros(len(rows), dtype=ROW_DTYPE_V1)
+    for name in ROW_DTYPE.names:
+        old[name] = rows[name]
+    old["risks"] = [1, 0, 0, 2, 0]
+    old.tofile(store.rows_path)
+    os.remove(store.risks_path)
+    del store.meta["row_format"]
+    store._save_meta()
+
+    reopened = ClauseVectorStore(store.directory)
+    assert [hit["file"] for hit in reopened.search(unit(0), risk_ids=["JURIS_FOREIGN"])] == ["b.txt"]
+    assert [hit["file"] for hit in reopened.search(unit(0), risk_ids=["INDEM_UNLIMITED"])] == ["a.txt"]
+    assert reopened.search(unit(1), k=1)[0]["label"] == "Termination"
+
+def test_ivf_search_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(0)
+    topics = rng.standard_normal((20, DIM * 4)).astype(np.float32)
+    vectors = topics[rng.integers(0, 20, 2000)] + 0.05 * rng.standard_normal((2000, DIM * 4)).astype(np.float32)
+    store = ClauseVectorStore(str(tmp_path / "vectors"))
+    for start in range(0, 2000, 200):
+        store.add_contract(
+            f"hash-{start}", "v1", f"{start}.txt", "Service Agreement",
+            [clause(str(i)) for i in range(start, start + 200)], vectors[start:start + 200]
+        )
+    exact = {(hit["file"], hit["clause_id"]) for hit in store.search(vectors[7], k=10)}
+    store.rebuild(lists=16)
+    assert store.stats()["lists"] == 16
+    approximate = {(hit["file"], hit["clause_id"]) for hit in store.search(vectors[7], k=10, nprobe=4)}
+    assert len(exact & approximate) >= 9
@@ -1,23 +1,26 @@
 import streamlit as st
 import os
 import sys
+import time
+from html import escape
 
 # ---------------------------------------------------------
 # PATH SETUP
 # ---------------------------------------------------------
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from ingestion.pdf_reader import read_pdf
-from ingestion.docx_reader import read_docx
-from preprocessing.text_cleaner import clean_text
+from preprocessing.text_cleaner import clean_pages
 from language.detect_language import detect_language_code
-from clause_extraction.extract_clauses import extract_clauses_from_text
-from contract_classifier.classify_contract_type import classify_contract_type
-from clause_classifier.rule_based import classify_clause_rule_based
-from intent_detection.intent_rules import detect_clause_intent
-from risk_engine.risk_evaluator import load_risk_rules, evaluate_risk
-from llm_explainer.explain_clause import generate_clause_explanation
-from export.pdf_report import generate_pdf_report
+from pipeline.analyzer import ContractAnalyzer
+from pipeline.result_cache import ResultCache, hash_bytes
+from pipeline.jobs import JobRunner, DONE, FAILED, CANCELLED
+from search.clause_index import ClauseIndex, parse_query
+from search.vector_store import ClauseVectorStore
+from llm_explainer.explain_clause import stream_clause_explanation
+from llm_explainer.async_explainer import explain_all_risks
+from export.pdf_report import render_pdf_report, report_key
+from resources.model_registry import registry, warm_up_from_env
+from resources.tracing import start_trace
 
 
 # ---------------------------------------------------------
@@ -29,6 +32,39 @@ st.set_page_config(
     layout="wide"
 )
 
+
+@st.cache_resource
+def get_registry():
+    # Models and clients load on first use and are shared by all sessions;
+    # CARA_WARMUP=all (or e.g. "spacy,embedding") preloads them at startup
+    warm_up_from_env()
+    return registry
+
+
+@st.cache_resource
+def get_clause_index():
+    return ClauseIndex()
+
+
+@st.cache_resource
+def get_vector_store():
+    return ClauseVectorStore()
+
+
+@st.cache_resource
+def get_analyzer():
+    # Shared across sessions and reruns: rules are loaded once per process,
+    # repeat uploads of the same file are served from the result cache,
+    # every analyzed contract is added to the portfolio search index
+    return ContractAnalyzer(cache=ResultCache(), parallel_pdf=True, index=get_clause_index())
+
+
+@st.cache_resource
+def get_job_runner():
+    # One worker pool for all sessions (CARA_JOB_WORKERS threads), so analyses
+    # run off the script thread and sessions don't wait on each other
+    return JobRunner(get_analyzer())
+
 # ---------------------------------------------------------
 # GLOBAL STYLES (DARK/LIGHT SAFE)
 # ---------------------------------------------------------
@@ -96,6 +132,13 @@ with st.sidebar:
         "• No cloud storage\n"
         "• LLM used only for explanations"
     )
+    view = st.radio("View", ["📄 Analyze Contract", "🔎 Portfolio Search"], label_visibility="collapsed")
+
+    load_times = get_registry().load_times()
+    if load_times:
+        with st.expander("⏱️ Model load times"):
+            for name, seconds in load_times.items():
+                st.caption(f"{name}: {seconds:.2f}s")
 
 # ---------------------------------------------------------
 # HERO
@@ -106,6 +149,63 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# ---------------------------------------------------------
+# PORTFOLIO SEARCH
+# ---------------------------------------------------------
+if view == "🔎 Portfolio Search":
+    index = get_clause_index()
+    stats = index.stats()
+    st.markdown("### 🔎 Portfolio Search")
+    st.caption(
+        f"{stats['clauses']} clauses from {stats['contracts']} analyzed contracts. "
+        "Filters: risk:, label:, severity:, type:, party:, status:, lang: — "
+        'e.g. risk:INDEM_UNLIMITED type:"Service Agreement" status:active arbitration'
+    )
+    query = st.text_input("Search", placeholder="Words and/or field:value filters", label_visibility="collapsed")
+
+    facets = index.facets()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        risk_filter = st.multiselect("Risks", facets["risk_ids"])
+        severity_filter = st.multiselect("Severity", facets["severities"])
+    with col2:
+        label_filter = st.multiselect("Clause type", facets["labels"])
+        type_filter = st.multiselect("Contract type", facets["contract_types"])
+    with col3:
+        status_filter = st.multiselect("Status", facets["statuses"])
+        limit = st.number_input("Max results", min_value=10, max_value=1000, value=50, step=10)
+
+    if query or risk_filter or severity_filter or label_filter or type_filter or status_filter:
+        try:
+            arguments = parse_query(query)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+        for name, values in (
+            ("risk_ids", risk_filter), ("severities", severity_filter), ("labels", label_filter),
+            ("contract_types", type_filter), ("statuses", status_filter)
+        ):
+            if values:
+                arguments[name] = arguments.get(name, []) + values
+
+        started = time.perf_counter()
+        hits = index.search(limit=int(limit), **arguments)
+        st.caption(f"{len(hits)} results in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        for hit in hits:
+            level = "safe"
+            if hit["risks"]:
+                level = "high" if any(risk["severity"] in ["High", "Critical"] for risk in hit["risks"]) else "medium"
+            risks = ", ".join(f"{risk['risk_id']} ({risk['severity']})" for risk in hit["risks"]) or "No risks"
+            st.markdown(f"""
+            <div class="risk-card {level}">
+                <h4>{escape(hit['file'])} • Clause {escape(hit['clause_id'])} • {hit['label']}</h4>
+                <p class="small">{hit['contract_type']} • {hit['status']} • page {hit['page']} • {risks}</p>
+                <p class="small">{escape(hit['snippet'])}…</p>
+            </div>
+            """, unsafe_allow_html=True)
+    st.stop()
+
 # ---------------------------------------------------------
 # MAIN FILE UPLOAD (CENTER)
 # ---------------------------------------------------------
@@ -131,100 +231,124 @@ if not uploaded_file:
 # ---------------------------------------------------------
 # FILE INGESTION
 # ---------------------------------------------------------
-os.makedirs("temp", exist_ok=True)
-temp_path = os.path.join("temp", uploaded_file.name)
-
-with open(temp_path, "wb") as f:
-    f.write(uploaded_file.getbuffer())
-
-with st.spinner("Reading contract…"):
-    if uploaded_file.name.endswith(".pdf"):
-        raw_text = read_pdf(temp_path)
-    elif uploaded_file.name.endswith(".docx"):
-        raw_text = read_docx(temp_path)
-    else:
-        raw_text = uploaded_file.read().decode("utf-8")
-
-clean_txt = clean_text(raw_text)
-lang = detect_language_code(clean_txt)
+file_bytes = uploaded_file.getvalue()
+file_hash = hash_bytes(file_bytes)
+
+# Progress polling reruns the script every 0.5 s: extract each upload only once
+ingested = st.session_state.get("ingested")
+if ingested is None or ingested["file_hash"] != file_hash:
+    with st.spinner("Reading contract…"):
+        raw_pages = get_analyzer().extract_pages(file_bytes, uploaded_file.name)
+    ingested = {
+        "file_hash": file_hash,
+        "pages": raw_pages,
+        "lang": detect_language_code(clean_pages(raw_pages)[0])
+    }
+    st.session_state["ingested"] = ingested
+raw_pages = ingested["pages"]
+lang = ingested["lang"]
 
 st.markdown(f"**File:** `{uploaded_file.name}` &nbsp;&nbsp;|&nbsp;&nbsp; **Language:** `{lang.upper()}`")
 
+previous = st.session_state.get("analysis")
+compare = False
+if previous is not None and previous.file != uploaded_file.name:
+    # Redlines: only clauses that changed since the last analyzed version are re-analyzed
+    compare = st.checkbox(f"Compare with previous version (`{previous.file}`)", value=True)
+
 analyze_btn = st.button("🚀 Analyze Contract", type="primary")
 
 # ---------------------------------------------------------
 # ANALYSIS PIPELINE
 # ---------------------------------------------------------
 if analyze_btn:
-    with st.spinner("Analyzing contract…"):
-        contract_type_info = classify_contract_type(clean_txt)
-        clauses = extract_clauses_from_text(clean_txt)
-
-        rules_path = os.path.join(os.path.dirname(__file__), "..", "risk_engine", "risk_rules.yaml")
-        risk_rules = load_risk_rules(rules_path)
-
-        analyzed_clauses, all_risks = [], []
-
-        for clause in clauses:
-            scores = classify_clause_rule_based(clause["text"])
-            label = max(scores, key=scores.get) if scores else "General"
-            intents = detect_clause_intent(clause["text"])
-            risks = evaluate_risk(clause["text"], label, risk_rules)
-
-            if risks:
-                all_risks.extend(risks)
-
-            analyzed_clauses.append({
-                "id": clause["clause_id"],
-                "text": clause["text"],
-                "label": label,
-                "intents": intents,
-                "risks": risks
-            })
-
-        st.session_state["analysis"] = {
-            "type": contract_type_info,
-            "clauses": clauses,
-            "analyzed": analyzed_clauses,
-            "risks": all_risks,
-            "text": clean_txt
-        }
+    # Runs in the background; only the job ID survives reruns
+    job = get_job_runner().submit(file_bytes, uploaded_file.name, raw_pages, previous if compare else None)
+    st.session_state["job_id"] = job.job_id
+
+job = get_job_runner().get(st.session_state["job_id"]) if "job_id" in st.session_state else None
+if job is not None:
+    if job.status == DONE:
+        st.session_state["analysis"] = job.result
+        if job.delta is not None:
+            st.session_state["revision_delta"] = job.delta
+        else:
+            st.session_state.pop("revision_delta", None)
+        st.session_state["traces"] = [job.trace]
+        del st.session_state["job_id"]
+    elif job.status == FAILED:
+        st.error(f"Analysis failed: {job.error}")
+        del st.session_state["job_id"]
+    elif job.status == CANCELLED:
+        st.warning("Analysis cancelled.")
+        del st.session_state["job_id"]
+    else:
+        status = job.to_dict()
+        st.progress(status["progress"], text=f"Analyzing `{job.file_name}` — {status['stage']}…")
+        if st.button("✖ Cancel analysis"):
+            job.cancel()
+        # Risks show up while the remaining clauses are still being evaluated
+        for risk in list(job.partial_risks):
+            st.markdown(f"⚠ **{risk['risk_id']}** ({risk['severity']}) — {risk['reason']}")
+        time.sleep(0.5)
+        st.rerun()
 
 # ---------------------------------------------------------
 # RESULTS
 # ---------------------------------------------------------
 if "analysis" in st.session_state:
     data = st.session_state["analysis"]
+    document = data.document
 
     st.markdown("### 📊 Contract Overview")
     c1, c2, c3, c4 = st.columns(4)
 
     with c1:
-        st.markdown(f"<div class='card metric'><h3>Type</h3><p>{data['type']['contract_type']}</p></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='card metric'><h3>Type</h3><p>{data.contract_type['contract_type']}</p></div>", unsafe_allow_html=True)
     with c2:
-        st.markdown(f"<div class='card metric'><h3>Confidence</h3><p>{data['type']['confidence']*100:.0f}%</p></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='card metric'><h3>Confidence</h3><p>{data.contract_type['confidence']*100:.0f}%</p></div>", unsafe_allow_html=True)
     with c3:
-        st.markdown(f"<div class='card metric'><h3>Clauses</h3><p>{len(data['clauses'])}</p></div>", unsafe_allow_html=True)
+        st.markdown(f"<div class='card metric'><h3>Clauses</h3><p>{len(document)}</p></div>", unsafe_allow_html=True)
     with c4:
-        color = "#dc2626" if data["risks"] else "#16a34a"
-        st.markdown(f"<div class='card metric'><h3>Risks</h3><p style='color:{color}'>{len(data['risks'])}</p></div>", unsafe_allow_html=True)
+        color = "#dc2626" if data.risks else "#16a34a"
+        st.markdown(f"<div class='card metric'><h3>Risks</h3><p style='color:{color}'>{len(data.risks)}</p></div>", unsafe_allow_html=True)
+
+    delta = st.session_state.get("revision_delta")
+    if delta:
+        st.markdown("### 🔁 Changes Since Previous Version")
+        clauses = delta["clauses"]
+        st.caption(
+            f"{clauses['unchanged']} unchanged • {len(clauses['modified'])} modified • "
+            f"{len(clauses['added'])} added • {len(clauses['removed'])} removed clauses • "
+            f"risks {delta['risks']['previous']} → {delta['risks']['current']}"
+        )
+        for risk in delta["risks"]["new"]:
+            st.error(f"New: {risk['risk_id']} ({risk['severity']}) — {risk['reason']}")
+        for risk in delta["risks"]["resolved"]:
+            st.success(f"Resolved: {risk['risk_id']} ({risk['severity']}) — {risk['reason']}")
 
     # -----------------------------------------------------
     # DOWNLOAD PDF (CLEAR & VISIBLE)
     # -----------------------------------------------------
     st.markdown("### 📥 Export Risk Report")
 
-    report_path = os.path.join("temp", "CARA_Bot_Risk_Report.pdf")
-    generate_pdf_report({
-        "contract_type": data["type"]["contract_type"],
-        "confidence": data["type"]["confidence"],
-        "risks": data["risks"]
-    }, report_path)
-
-    with open(report_path, "rb") as f:
+    report_data = {
+        "contract_type": data.contract_type["contract_type"],
+        "confidence": data.contract_type["confidence"],
+        "risks": data.risk_dicts()
+    }
+    # Rendered only on request, in memory, and again only when the report content changed
+    current_report = report_key(report_data)
+    if st.session_state.get("report_key") != current_report:
+        if st.button("📄 Prepare Risk Report (PDF)", use_container_width=True):
+            with st.spinner("Rendering report…"):
+                st.session_state["report_pdf"] = render_pdf_report(report_data)
+                st.session_state["report_key"] = current_report
+
+    if st.session_state.get("report_key") == current_report:
         st.download_button(
             label="📥 Download Risk Report (PDF)",
-            data=f.read(),
+            data=st.session_state["report_pdf"],
             file_name="CARA_Bot_Risk_Report.pdf",
             mime="application/pdf",
             use_container_width=True
@@ -233,22 +357,31 @@ if "analysis" in st.session_state:
     # -----------------------------------------------------
     # TABS
     # -----------------------------------------------------
-    risk_tab, clause_tab, text_tab = st.tabs(["⚠️ Risks", "📝 Clauses", "📄 Full Text"])
+    risk_tab, clause_tab, text_tab, perf_tab = st.tabs(["⚠️ Risks", "📝 Clauses", "📄 Full Text", "⏱️ Performance"])
 
     with risk_tab:
-        if not data["risks"]:
+        if not data.risks:
             st.success("No major risks detected.")
         else:
-            for i, risk in enumerate(data["risks"]):
-                level = "high" if risk["severity"] in ["High", "Critical"] else "medium"
+            unexplained = [risk for risk in data.risks if not risk.explanation]
+            if unexplained and st.button(f"🤖 Explain all risks ({len(unexplained)})", key="exp_all"):
+                with st.spinner("Generating explanations…"), start_trace("explain_all") as trace:
+                    explanations = explain_all_risks([risk.to_dict(document, full_text=True) for risk in unexplained])
+                    for risk, expl in zip(unexplained, explanations):
+                        risk.explanation = expl
+                st.session_state.setdefault("traces", []).append(trace)
+                st.rerun()
+
+            for i, risk in enumerate(data.risks):
+                level = "high" if risk.severity in ["High", "Critical"] else "medium"
                 # Check for existing explanation
-                explanation = risk.get("explanation")
+                explanation = risk.explanation
                 
                 st.markdown(f"""
                 <div class="risk-card {level}">
-                    <h4>⚠ {risk['risk_id']} ({risk['severity']})</h4>
-                    <p><b>Reason:</b> {risk['reason']}</p>
-                    <p class="small">{risk['clause_text']}</p>
+                    <h4>⚠ {risk.risk_id} ({risk.severity})</h4>
+                    <p><b>Reason:</b> {risk.reason}</p>
+                    <p class="small">{document.snippet(risk.clause_index)}</p>
                 </div>
                 """, unsafe_allow_html=True)
                 
@@ -257,17 +390,102 @@ if "analysis" in st.session_state:
                      st.caption(f"Suggestion: {explanation['suggested_alternative']}")
 
                 if st.button("🤖 Explain in simple language", key=f"exp_{i}"):
-                    with st.spinner("Generating explanation…"):
-                        expl = generate_clause_explanation(risk["clause_text"], risk)
+                    placeholder = st.empty()
+                    with start_trace("explain", risk_id=risk.risk_id) as trace:
+                        risk_dict = risk.to_dict(document, full_text=True)
+                        # Show the explanation as it streams in; the last item is the complete one
+                        expl = None
+                        for expl in stream_clause_explanation(risk_dict["clause_text"], risk_dict):
+                            placeholder.info(f"💡 Explanation: {expl.get('plain_explanation', '')}▌")
                         # Store in session state persistence
-                        data["risks"][i]["explanation"] = expl
-                        st.rerun()
+                        risk.explanation = expl
+                    st.session_state.setdefault("traces", []).append(trace)
+                    st.rerun()
 
     with clause_tab:
-        for c in data["analyzed"]:
-            with st.expander(f"Clause {c['id']} • {c['label']}"):
-                st.write(c["text"])
-                st.caption(f"Intent: {', '.join(c['intents']) or 'N/A'}")
+        for i, c in enumerate(document):
+            with st.expander(f"Clause {c.id} • {c.label}"):
+                st.write(c.text)
+                st.caption(f"Intent: {', '.join(c.intents) or 'N/A'}")
+
+                if st.button("🔁 Similar clauses in other contracts", key=f"sim_{i}"):
+                    store = get_vector_store()
+                    with st.spinner("Searching the portfolio…"):
+                        # Embeds contracts analyzed since the last search, then queries the store
+                        store.sync(get_clause_index())
+                        similar = store.search_text(c.text, k=5, exclude_file_hash=file_hash)
+                    if not similar:
+                        st.info("No similar clauses found (the embedding model may be unavailable).")
+                    for hit in similar:
+                        decisions = ", ".join(f"{risk['risk_id']} ({risk['severity']})" for risk in hit["risks"]) or "No risks"
+                        st.markdown(
+                            f"**{hit['file']}** • Clause {hit['clause_id']} • {hit['label']} • "
+                            f"similarity {hit['score']:.2f} • {decisions}"
+                        )
+                        st.caption(hit["snippet"])
 
     with text_tab:
-        st.text_area("Contract Text", data["text"], height=600)
+        st.text_area("Contract Text", document.text, height=600)
+
+    with perf_tab:
+        traces = st.session_state.get("traces", [])
+        if not traces:
+            st.info("Timings appear here after analyzing a contract.")
+        for trace in traces:
+            st.markdown(f"**{trace.name}** — {trace.duration * 1000:.0f} ms")
+            stages = trace.summary()
+            st.dataframe(
+                [
+                    {
+                        "Stage": name,
+                        "Calls": stats["count"],
+                        "Total (ms)": round(stats["total_s"] * 1000, 2),
+                        "Max (ms)": round(stats["max_s"] * 1000, 2),
+                        "Share": f"{stats['total_s'] / trace.duration:.0%}" if trace.duration else "-"
+                    }
+                    for name, stats in sorted(stages.items(), key=lambda item: -item[1]["total_s"])
+                ],
+                use_container_width=True
+            )
+            if trace.counters:
+                st.caption(" • ".join(f"{name}: {value:g}" for name, value in sorted(trace.counters.items())))
+            if trace.profile:
+                with st.expander("cProfile"):
+                    st.code(trace.profile)
+            if trace.memory:
+                with st.expander(f"Memory (peak {trace.memory['peak_mb']:.1f} MB)"):
+                    st.code("\n".join(trace.memory["top"]))
+
+        tier_stats = get_analyzer().cascade.stats()
+        unresolved = tier_stats.pop("unresolved")
+        with st.expander("Clause classifier tiers (all analyses since start)"):
+            st.dataframe(
+                [
+                    {
+                        "Tier": tier,
+                        "Clauses seen": stats["clauses"],
+                        "Resolved": stats["resolved"],
+                        "Time (ms)": round(stats["seconds"] * 1000, 2)
+                    }
+                    for tier, stats in tier_stats.items()
+                ],
+                use_container_width=True
+            )
+            st.caption(f"Unresolved (kept the best rule label): {unresolved}")
+
+        if traces:
+            c1, c2 = st.columns(2)
+            with c1:
+                st.download_button(
+                    "Download trace (JSON lines)",
+                    data="".join(line + "\n" for trace in traces for line in trace.iter_json_lines()),
+                    file_name="cara_trace.jsonl",
+                    mime="application/x-ndjson"
+                )
+            with c2:
+                st.download_button(
+                    "Download metrics (Prometheus)",
+                    data=traces[0].to_prometheus(),
+                    file_name="cara_metrics.prom",
+                    mime="text/plain"
+                )